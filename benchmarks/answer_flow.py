@@ -0,0 +1,100 @@
+"""Measure per-click latency of the answer handler against a stubbed Bot.
+
+Run with ``python -m benchmarks.answer_flow``. Every Telegram call sleeps for
+a fixed round trip time; the result is compared with making the same calls
+one after another. Uses a temporary database.
+"""
+
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from bot.db import repository
+from bot.db.models import Base
+from bot.db.repository import QuizSessionRepository, UserRepository
+from bot.handlers.quiz import handle_answer
+from bot.keyboards import ANSWER_PREFIX, QuizCallback, encode_callback
+from bot.services.quiz_service import QuizService
+
+ROUND_TRIP = 0.05
+TOPIC = "bash"
+LEVEL = "junior"
+
+
+class StubTelegram:
+    """Stands in for the Bot, the message and the callback query."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.chat = SimpleNamespace(id=1)
+        self.photo = None
+        self.reply_markup = None
+        self.message_id = 1
+
+    async def _call(self, *args, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(ROUND_TRIP)
+        return self
+
+    answer = edit_text = edit_caption = reply = answer_photo = _call
+    send_message = edit_message_text = pin_chat_message = _call
+
+
+class StubState:
+    async def set_state(self, state):
+        pass
+
+    async def clear(self):
+        pass
+
+
+async def run() -> tuple[list[float], list[int]]:
+    stub = StubTelegram()
+    state = StubState()
+    total = QuizService.get_question_count(TOPIC, LEVEL)
+    quiz = QuizSessionRepository.start(
+        1, 1, TOPIC, LEVEL, total, QuizService.get_version()
+    )
+
+    latencies, calls = [], []
+    for idx in range(total):
+        data = encode_callback(
+            ANSWER_PREFIX,
+            QuizCallback(TOPIC, LEVEL, idx, nonce=quiz.nonce, version=quiz.version),
+        )
+        callback = SimpleNamespace(
+            data=data, message=stub, from_user=SimpleNamespace(id=1)
+        )
+        callback.answer = stub.answer
+        before = stub.calls
+        started = time.perf_counter()
+        await handle_answer(callback, state, stub)
+        latencies.append(time.perf_counter() - started)
+        calls.append(stub.calls - before)
+    return latencies, calls
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{Path(directory) / 'bench.db'}")
+        Base.metadata.create_all(engine)
+        repository.get_session = sessionmaker(bind=engine)
+        UserRepository.create(1, "Bench")
+        latencies, calls = asyncio.run(run())
+        engine.dispose()
+
+    sequential = [count * ROUND_TRIP for count in calls]
+    print(f"{len(latencies)} answers, {ROUND_TRIP * 1000:.0f} ms per Telegram call")
+    print(f"Telegram calls per click  {statistics.mean(calls):8.2f}")
+    print(f"per-click, one by one     {statistics.mean(sequential) * 1000:8.1f} ms")
+    print(f"per-click, concurrent     {statistics.mean(latencies) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Measure how long routing a callback query to its handler takes.
+
+Run with ``python -m benchmarks.callback_dispatch``. The bot's routers are
+used with every callback query handler replaced by a no-op, and each kind of
+button is dispatched through the aiogram filter chain and then through the
+prefix table of ``CallbackRouter``. Uses in-memory FSM storage.
+"""
+
+import asyncio
+import time
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+from bot.handlers import callback_routes, setup_routers
+from bot.keyboards import (
+    ANSWER_PREFIX,
+    FEEDBACK,
+    LEVEL_MENU,
+    LEVEL_PREFIX,
+    REFERENCE_PREFIX,
+    TOPIC_MENU,
+    TOPIC_PREFIX,
+    QuizCallback,
+    encode_callback,
+    encode_choice,
+)
+
+ROUNDS = 5000
+BUTTONS = {
+    "answer": encode_callback(ANSWER_PREFIX, QuizCallback("bash", "junior", 3, 1)),
+    "reference": encode_callback(REFERENCE_PREFIX, QuizCallback("bash", "junior", 3)),
+    "topic": encode_choice(TOPIC_PREFIX, "bash"),
+    "level": encode_choice(LEVEL_PREFIX, "junior"),
+    "topic menu": TOPIC_MENU,
+    "level menu": LEVEL_MENU,
+    "feedback": FEEDBACK,
+    "outdated": "ans:0:1",
+}
+
+
+async def _noop(*args, **kwargs) -> None:
+    pass
+
+
+def _stub_handlers(dp: Dispatcher) -> None:
+    handlers = [
+        handler
+        for router in dp.chain_tail
+        for handler in router.callback_query.handlers
+    ]
+    handlers += [
+        handler for routes in callback_routes._routes.values() for _, handler in routes
+    ]
+    for handler in handlers:
+        handler.callback = _noop
+        handler.__post_init__()
+
+
+def _update(update_id: int, data: str) -> Update:
+    return Update(
+        update_id=update_id,
+        callback_query={
+            "id": str(update_id),
+            "from": {"id": 1, "is_bot": False, "first_name": "Bench"},
+            "chat_instance": "1",
+            "data": data,
+        },
+    )
+
+
+async def measure(dp: Dispatcher, bot: Bot) -> dict[str, float]:
+    """Return microseconds per dispatched callback query, by button."""
+    results = {}
+    for name, data in BUTTONS.items():
+        updates = [_update(index, data) for index in range(ROUNDS)]
+        started = time.perf_counter()
+        for update in updates:
+            await dp.feed_update(bot, update)
+        results[name] = (time.perf_counter() - started) / ROUNDS * 1e6
+    return results
+
+
+async def run() -> tuple[dict[str, float], dict[str, float]]:
+    dp = Dispatcher()
+    dp.include_router(setup_routers())
+    _stub_handlers(dp)
+    bot = Bot(token="1:BENCH")
+    try:
+        before = await measure(dp, bot)
+        dp.callback_query.outer_middleware(callback_routes)
+        after = await measure(dp, bot)
+    finally:
+        await bot.session.close()
+    return before, after
+
+
+def main() -> None:
+    before, after = asyncio.run(run())
+    print(f"{ROUNDS} callback queries per button, no FSM state, handlers stubbed")
+    print(f"{'button':12} {'filters':>10} {'prefix':>10}")
+    for name in BUTTONS:
+        print(f"{name:12} {before[name]:8.1f}us {after[name]:8.1f}us")
+    mean_before = sum(before.values()) / len(before)
+    mean_after = sum(after.values()) / len(after)
+    print(f"{'mean':12} {mean_before:8.1f}us {mean_after:8.1f}us")
+
+
+if __name__ == "__main__":
+    main()
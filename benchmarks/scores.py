@@ -0,0 +1,104 @@
+"""Compare JSON score strings with integer score columns.
+
+Run with ``python -m benchmarks.scores``. Uses a temporary database.
+"""
+
+import json
+import tempfile
+import timeit
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from bot.db import repository
+from bot.db.models import Base, User
+from bot.db.repository import UserRepository
+
+USERS = 200
+UPDATES = 2000
+RENDERS = 200_000
+
+
+def _legacy_add_to_scores(connection, telegram_id: int) -> None:
+    connection.execute(
+        text(
+            "UPDATE legacy_users SET scores_junior = json_object("
+            "'correct', coalesce(json_extract(scores_junior, '$.correct'), 0) + 1, "
+            "'total', coalesce(json_extract(scores_junior, '$.total'), 0) + 1) "
+            "WHERE telegram_id = :telegram_id"
+        ),
+        {"telegram_id": telegram_id},
+    )
+
+
+def _legacy_get_all_scores(row: tuple[str, str, str]) -> dict:
+    return {
+        level: json.loads(value)
+        for level, value in zip(("junior", "middle", "senior"), row)
+    }
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{Path(directory) / 'bench.db'}")
+        Base.metadata.create_all(engine)
+        repository.get_session = sessionmaker(bind=engine)
+        empty = json.dumps({"correct": 0, "total": 0})
+
+        with engine.begin() as connection:
+            connection.execute(
+                text(
+                    "CREATE TABLE legacy_users (telegram_id BIGINT PRIMARY KEY, "
+                    "scores_junior TEXT, scores_middle TEXT, scores_senior TEXT)"
+                )
+            )
+            for telegram_id in range(USERS):
+                connection.execute(
+                    text(
+                        "INSERT INTO legacy_users VALUES (:id, :empty, :empty, :empty)"
+                    ),
+                    {"id": telegram_id, "empty": empty},
+                )
+        for telegram_id in range(USERS):
+            UserRepository.create(telegram_id, f"User {telegram_id}")
+
+        def legacy_updates() -> None:
+            with engine.begin() as connection:
+                for index in range(UPDATES):
+                    _legacy_add_to_scores(connection, index % USERS)
+
+        def integer_updates() -> None:
+            with engine.begin() as connection:
+                for index in range(UPDATES):
+                    connection.execute(
+                        text(
+                            "UPDATE users SET junior_correct = junior_correct + 1, "
+                            "junior_total = junior_total + 1 "
+                            "WHERE telegram_id = :telegram_id"
+                        ),
+                        {"telegram_id": index % USERS},
+                    )
+
+        user = User(telegram_id=0, name="Render")
+        user.set_scores("junior", 7, 10)
+        legacy_row = (json.dumps({"correct": 7, "total": 10}), empty, empty)
+
+        results = {
+            "score update, JSON": timeit.timeit(legacy_updates, number=1) / UPDATES,
+            "score update, integer": timeit.timeit(integer_updates, number=1) / UPDATES,
+            "score card, JSON": timeit.timeit(
+                lambda: _legacy_get_all_scores(legacy_row), number=RENDERS
+            )
+            / RENDERS,
+            "score card, integer": timeit.timeit(user.get_all_scores, number=RENDERS)
+            / RENDERS,
+        }
+        engine.dispose()
+
+    for name, seconds in results.items():
+        print(f"{name:<24} {seconds * 1_000_000:8.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Load-test the webhook endpoint with synthetic updates.
+
+Run with ``python -m benchmarks.webhook [url]``. Without a URL, an in-process
+webhook app around an empty dispatcher is served, which measures the HTTP and
+update parsing overhead alone. To load-test the full bot, start it with
+``BOT_MODE=webhook`` and pass its local URL, e.g.
+``http://127.0.0.1:8080/webhook``. The WEBHOOK_SECRET of the environment is
+sent with every request.
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+from typing import Optional
+
+from aiogram import Bot, Dispatcher
+from aiohttp import ClientSession, web
+
+from bot.config import webhook_secret
+from bot.webhook import create_app
+
+UPDATES = 5000
+CONCURRENCY = 50
+PORT = 8089
+
+
+def _update(update_id: int) -> dict:
+    user_id = update_id % 1000 + 1
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Load"},
+            "text": "/start",
+        },
+    }
+
+
+async def _post_updates(url: str, secret: Optional[str]) -> list[float]:
+    headers = {"X-Telegram-Bot-Api-Secret-Token": secret} if secret else {}
+    queue = iter(range(1, UPDATES + 1))
+    latencies = []
+
+    async def worker(session: ClientSession) -> None:
+        for update_id in queue:
+            started = time.perf_counter()
+            async with session.post(url, json=_update(update_id), headers=headers) as r:
+                if r.status != 200:
+                    raise RuntimeError(f"Webhook answered {r.status}")
+            latencies.append(time.perf_counter() - started)
+
+    async with ClientSession() as session:
+        await asyncio.gather(*(worker(session) for _ in range(CONCURRENCY)))
+    return latencies
+
+
+async def main() -> None:
+    url = sys.argv[1] if len(sys.argv) > 1 else None
+    runner = None
+    if url is None:
+        app = create_app(Dispatcher(), Bot(token="1:BENCH"), "/webhook", "bench")
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", PORT).start()
+        url, secret = f"http://127.0.0.1:{PORT}/webhook", "bench"
+    else:
+        secret = webhook_secret
+
+    try:
+        started = time.perf_counter()
+        latencies = await _post_updates(url, secret)
+        elapsed = time.perf_counter() - started
+    finally:
+        if runner:
+            await runner.cleanup()
+
+    latencies.sort()
+    print(f"{UPDATES} updates, {CONCURRENCY} concurrent requests to {url}")
+    print(f"throughput  {UPDATES / elapsed:10.0f} updates/s")
+    print(f"latency p50 {statistics.median(latencies) * 1000:10.2f} ms")
+    print(f"latency p99 {latencies[int(len(latencies) * 0.99)] * 1000:10.2f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,16 +1,51 @@
 import asyncio
 import logging
 import os
+from typing import Optional
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 from aiogram.types import BotCommand, BotCommandScopeDefault
 
-from bot.config import bot_token, feedback_channel_id
+from bot.config import (
+    bot_mode,
+    bot_token,
+    callback_throttle_ms,
+    feedback_channel_id,
+    fsm_cache_size,
+    fsm_flush_batch,
+    fsm_flush_interval_ms,
+    fsm_write_behind,
+    quiz_reload_interval,
+    telegram_chat_burst,
+    telegram_chat_rate,
+    telegram_global_rate,
+    update_concurrency,
+    update_queue_size,
+    webhook_host,
+    webhook_path,
+    webhook_port,
+    webhook_secret,
+    webhook_url,
+    workers,
+)
 from bot.db import init_db
 from bot.db.fsm_storage import SQLiteStorage
-from bot.handlers import setup_routers
+from bot.handlers import callback_routes, setup_routers
+from bot.handlers.feedback import close_feedback_delivery, start_feedback_delivery
+from bot.handlers.quiz_poll import flush_poll_answers
+from bot.middlewares import (
+    CallbackThrottleMiddleware,
+    FSMScopeMiddleware,
+    RateLimitMiddleware,
+    UpdateScheduler,
+)
+from bot.services.quiz_service import QuizService
+from bot.services.user_service import UserService
+from bot.shutdown import register_shutdown_hooks
+from bot.webhook import run_webhook
+from bot.workers import run_front
 
 # Configuration
 ENV = os.getenv("ENV", "dev").lower()
@@ -19,6 +54,10 @@ BOT_TOKEN = bot_token
 
 if not BOT_TOKEN:
     raise RuntimeError("BOT_TOKEN environment variable is not set")
+if bot_mode not in {"polling", "webhook"}:
+    raise RuntimeError("BOT_MODE must be 'polling' or 'webhook'")
+if bot_mode == "webhook" and not webhook_url:
+    raise RuntimeError("WEBHOOK_URL environment variable is not set")
 
 # Setup logging
 logging.basicConfig(
@@ -30,23 +69,63 @@ logger = logging.getLogger(__name__)
 bot = Bot(
     token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.MARKDOWN_V2)
 )
-dp = Dispatcher(storage=SQLiteStorage())
+# With several workers every process paces its own share of the global limit
+rate_limiter = RateLimitMiddleware(
+    global_rate=telegram_global_rate / workers,
+    chat_rate=telegram_chat_rate,
+    chat_burst=telegram_chat_burst,
+)
+bot.session.middleware(rate_limiter)
+storage = SQLiteStorage(
+    write_behind=fsm_write_behind,
+    cache_size=fsm_cache_size,
+    flush_interval=fsm_flush_interval_ms / 1000,
+    flush_batch=fsm_flush_batch,
+)
+dp = Dispatcher(storage=storage, disable_fsm=True)
+# Repeated button clicks are answered before they are queued or touch storage
+callback_throttle = CallbackThrottleMiddleware(callback_throttle_ms / 1000)
+if callback_throttle_ms > 0:
+    dp.update.outer_middleware(callback_throttle)
+# Queues the rest of each update's processing
+scheduler = UpdateScheduler(update_concurrency, update_queue_size, dispatcher=dp)
+dp.update.outer_middleware(scheduler)
+# The FSM middleware is registered manually so the per-update record cache
+# wraps it and its initial get_state() is served from the same scope.
+dp.update.outer_middleware(FSMScopeMiddleware(storage))
+dp.update.outer_middleware(dp.fsm)
+# Callback queries are routed by the prefix of their data, see CallbackRouter
+dp.callback_query.outer_middleware(callback_routes)
 
 
 async def on_startup(bot: Bot) -> None:
     """Startup hook - runs when bot starts."""
-    # Clear an old webhook while preserving updates received during downtime.
-    await bot.delete_webhook(drop_pending_updates=False)
+    if bot_mode == "webhook":
+        await bot.set_webhook(
+            url=webhook_url + webhook_path,
+            secret_token=webhook_secret,
+            allowed_updates=dp.resolve_used_update_types(),
+            drop_pending_updates=False,
+        )
+        if not webhook_secret:
+            logger.warning(
+                "WEBHOOK_SECRET is not set; webhook requests are not verified"
+            )
+    else:
+        # Clear an old webhook while preserving updates received during downtime.
+        await bot.delete_webhook(drop_pending_updates=False)
 
     # Get bot info
     me = await bot.get_me()
     logger.info(
-        f"Bot started: ENV={ENV}, bot_id={me.id}, "
+        f"Bot started: ENV={ENV}, mode={bot_mode}, bot_id={me.id}, "
         f"username=@{me.username}, name={me.first_name}"
     )
 
     if not feedback_channel_id:
         logger.warning("FEEDBACK_CHANNEL_ID is not set; feedback delivery will fail")
+    # Send feedback stored but not delivered before the last shutdown
+    start_feedback_delivery(bot)
 
     # Set bot commands menu
     await bot.set_my_commands(
@@ -61,23 +140,66 @@ async def on_startup(bot: Bot) -> None:
     logger.info("Bot commands menu updated")
 
 
-async def main() -> None:
-    """Main entry point."""
+def prepare() -> Optional[asyncio.Task]:
+    """Set up the database, content and handlers of a process handling updates.
+
+    Returns the content watcher task, if reloading is enabled.
+    """
     # Initialize database
     init_db()
     logger.info("Database initialized")
 
-    # Register startup hook
-    dp.startup.register(on_startup)
+    # Compile quiz content before the first update arrives
+    questions = sum(len(items) for items in QuizService.load_index().values())
+    logger.info(f"Quiz index compiled: {questions} questions")
+
+    # Finish queued updates, then send answers and pinned score updates
+    # still waiting in the background. Undelivered feedback stays stored.
+    # FSM storage is closed after all of them.
+    register_shutdown_hooks(
+        dp,
+        scheduler.join,
+        flush_poll_answers,
+        UserService.flush_pinned_scores,
+        close_feedback_delivery,
+    )
 
     # Setup routers
     router = setup_routers()
     dp.include_router(router)
     logger.info("Routers registered")
 
-    # Start polling
-    logger.info("Starting bot polling...")
-    await dp.start_polling(bot)
+    # Pick up quiz content edits without a restart
+    watcher = None
+    if quiz_reload_interval > 0:
+        watcher = asyncio.create_task(QuizService.watch(quiz_reload_interval))
+        logger.info(f"Watching quiz content every {quiz_reload_interval}s")
+    return watcher
+
+
+async def main() -> None:
+    """Main entry point."""
+    watcher = prepare()
+
+    # Register startup hook
+    dp.startup.register(on_startup)
+
+    try:
+        if workers > 1:
+            logger.info(f"Starting {workers} worker processes...")
+            await run_front(bot, dp, workers)
+        elif bot_mode == "webhook":
+            logger.info("Starting webhook server...")
+            await run_webhook(
+                dp, bot, webhook_host, webhook_port, webhook_path, webhook_secret
+            )
+        else:
+            logger.info("Starting bot polling...")
+            # Updates are fetched no faster than the scheduler accepts them
+            await dp.start_polling(bot, handle_as_tasks=False)
+    finally:
+        if watcher:
+            watcher.cancel()
 
 
 if __name__ == "__main__":
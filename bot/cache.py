@@ -0,0 +1,76 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Thread-safe bounded mapping with LRU eviction and an optional TTL.
+
+    ``invalidate()`` also bumps a generation counter. Read-through callers take
+    ``generation`` before loading a value and pass it to ``set()``, so a value
+    loaded before a concurrent write is not stored over the invalidation.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._items: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: K) -> Optional[V]:
+        """Return a cached value, counting the lookup as a hit or a miss."""
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and (
+                self.ttl is None or self._clock() - item[0] < self.ttl
+            ):
+                self._items.move_to_end(key)
+                self.hits += 1
+                return item[1]
+
+            if item is not None:
+                del self._items[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: K, value: V, generation: Optional[int] = None) -> None:
+        """Store a value unless the cache was invalidated since ``generation``."""
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._items[key] = (self._clock(), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def invalidate(self, key: K) -> None:
+        """Drop one entry."""
+        with self._lock:
+            self.generation += 1
+            self._items.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self.generation += 1
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss counters and the current size."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._items)}
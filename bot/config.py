@@ -9,6 +9,80 @@ load_dotenv(Path(__file__).parent.parent / env_file)
 bot_token = os.getenv("BOT_TOKEN")  # ← единственное, что нужно наружу
 feedback_channel_id = os.getenv("FEEDBACK_CHANNEL_ID")
 
+# Ключ подписи callback_data кнопок квиза; по умолчанию выводится из токена
+callback_secret = os.getenv("CALLBACK_SECRET") or bot_token or ""
+
+# FSM write-behind: изменения состояния пишутся в SQLite пачками.
+# FSM_FLUSH_INTERVAL_MS — окно, за которое изменения могут потеряться при сбое.
+fsm_write_behind = os.getenv("FSM_WRITE_BEHIND", "").lower() in {"1", "true", "yes"}
+fsm_flush_interval_ms = int(os.getenv("FSM_FLUSH_INTERVAL_MS", "500"))
+fsm_flush_batch = int(os.getenv("FSM_FLUSH_BATCH", "100"))
+fsm_cache_size = int(os.getenv("FSM_CACHE_SIZE", "10000"))
+
+# Кэш пользователей в памяти процесса: размер и время жизни записи (сек).
+user_cache_size = int(os.getenv("USER_CACHE_SIZE", "10000"))
+user_cache_ttl = float(os.getenv("USER_CACHE_TTL", "300"))
+
+# Период проверки quizzes.json/references.json на изменения (сек); 0 — выключено.
+quiz_reload_interval = float(os.getenv("QUIZ_RELOAD_INTERVAL", "0"))
+
+# Скомпилированный банк вопросов (python -m bot.services.quiz_bank).
+quiz_bank_path = os.getenv("QUIZ_BANK_PATH")
+
+# Размер кэша готовых текстов ответов (MarkdownV2).
+render_cache_size = int(os.getenv("RENDER_CACHE_SIZE", "4096"))
+
+# Компактный режим: весь тест идёт в одном сообщении, которое редактируется.
+quiz_compact_mode = os.getenv("QUIZ_COMPACT_MODE", "").lower() in {"1", "true", "yes"}
+
+# Закреплённое сообщение со счётом обновляется в фоне; запросы в пределах
+# этого окна (сек) объединяются в одно изменение.
+pinned_score_delay = float(os.getenv("PINNED_SCORE_DELAY", "1"))
+
+# Вопросы отправляются нативными опросами-викторинами Telegram.
+quiz_poll_mode = os.getenv("QUIZ_POLL_MODE", "").lower() in {"1", "true", "yes"}
+# Ответы на опросы засчитываются пачками: раз в интервал или по размеру пачки.
+poll_batch_interval_ms = int(os.getenv("POLL_BATCH_INTERVAL_MS", "200"))
+poll_batch_size = int(os.getenv("POLL_BATCH_SIZE", "100"))
+
+# Ограничение исходящих запросов к Telegram (запросов в секунду):
+# общий лимит бота и лимит на один чат с допустимым всплеском.
+telegram_global_rate = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))
+telegram_chat_rate = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+telegram_chat_burst = float(os.getenv("TELEGRAM_CHAT_BURST", "3"))
+
+# Обработка апдейтов: не больше UPDATE_CONCURRENCY одновременно, апдейты
+# одного пользователя по очереди. При UPDATE_QUEUE_SIZE ожидающих апдейтах
+# приём новых (getUpdates) приостанавливается.
+update_concurrency = int(os.getenv("UPDATE_CONCURRENCY", "100"))
+update_queue_size = int(os.getenv("UPDATE_QUEUE_SIZE", "1000"))
+
+# Повторные нажатия той же кнопки тем же пользователем в течение окна (мс)
+# подтверждаются пустым ответом и не обрабатываются. 0 — отключить.
+callback_throttle_ms = int(os.getenv("CALLBACK_THROTTLE_MS", "1000"))
+
+# Отзывы сохраняются в БД и отправляются в канал в фоне. Неудачная отправка
+# повторяется через FEEDBACK_RETRY_DELAY секунд, пауза удваивается с каждой
+# попыткой, но не больше FEEDBACK_RETRY_MAX_DELAY.
+feedback_retry_delay = float(os.getenv("FEEDBACK_RETRY_DELAY", "5"))
+feedback_retry_max_delay = float(os.getenv("FEEDBACK_RETRY_MAX_DELAY", "3600"))
+# После стольких неудачных попыток отзыв удаляется, а его текст пишется в журнал.
+feedback_max_attempts = int(os.getenv("FEEDBACK_MAX_ATTEMPTS", "50"))
+
+# Число процессов-обработчиков. Больше 1 — апдейты принимает основной процесс
+# и распределяет по процессам по id пользователя.
+workers = max(1, int(os.getenv("WORKERS", "1")))
+
+# Получение апдейтов: polling (по умолчанию) или webhook.
+# В режиме webhook Telegram шлёт апдейты на WEBHOOK_URL + WEBHOOK_PATH,
+# а бот слушает WEBHOOK_HOST:WEBHOOK_PORT (обычно за reverse proxy с TLS).
+bot_mode = os.getenv("BOT_MODE", "polling").lower()
+webhook_url = os.getenv("WEBHOOK_URL", "").rstrip("/")
+webhook_path = os.getenv("WEBHOOK_PATH", "/webhook")
+webhook_secret = os.getenv("WEBHOOK_SECRET")
+webhook_host = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+webhook_port = int(os.getenv("WEBHOOK_PORT", "8080"))
+
 
 def get_feedback_chat_id(value: str | None = None) -> int | str:
     """Return a Telegram chat ID as an integer or @username."""
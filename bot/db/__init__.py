@@ -1,4 +1,20 @@
 from bot.db.models import init_db, get_session
-from bot.db.repository import FSMRepository, UserRepository
+from bot.db.repository import (
+    FeedbackRepository,
+    FSMRepository,
+    QuizReportRepository,
+    QuizSessionRepository,
+    TelegramFileRepository,
+    UserRepository,
+)
 
-__all__ = ["init_db", "get_session", "FSMRepository", "UserRepository"]
+__all__ = [
+    "init_db",
+    "get_session",
+    "FeedbackRepository",
+    "FSMRepository",
+    "QuizReportRepository",
+    "QuizSessionRepository",
+    "TelegramFileRepository",
+    "UserRepository",
+]
@@ -1,14 +1,100 @@
+import asyncio
 import json
-from typing import Any, Optional
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, suppress
+from contextvars import ContextVar
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Optional, TypeVar
 
 from aiogram.fsm.state import State
 from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
 
 from bot.db.repository import FSMRepository
 
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_PENDING = 1000
+DEFAULT_CACHE_SIZE = 10_000
+DEFAULT_FLUSH_INTERVAL = 0.5
+DEFAULT_FLUSH_BATCH = 100
+
+
+class FSMScope:
+    """Storage keys and query counters for one update."""
+
+    __slots__ = ("keys", "selects", "upserts")
+
+    def __init__(self) -> None:
+        self.keys: set[str] = set()
+        self.selects = 0
+        self.upserts = 0
+
+
+class _CachedRecord:
+    """In-memory copy of one FSM row shared by the updates that use it."""
+
+    __slots__ = ("state", "data", "dirty", "holders")
+
+    def __init__(self, state: Optional[str], data: dict[str, Any]) -> None:
+        self.state = state
+        self.data = data
+        self.dirty = False
+        self.holders = 0
+
+
+_current_scope: ContextVar[Optional[FSMScope]] = ContextVar("fsm_scope", default=None)
+
 
 class SQLiteStorage(BaseStorage):
-    """Persist aiogram FSM state in the application's SQLite database."""
+    """Persist aiogram FSM state in the application's SQLite database.
+
+    Repository calls are blocking, so they run on a dedicated database thread.
+    A single worker keeps writes for one key in submission order, and the
+    number of queued operations is bounded so a slow disk applies backpressure
+    to handlers instead of growing an unbounded backlog.
+
+    Inside ``update_scope()`` a record is loaded once and written once: reads
+    are served from memory and changes are flushed with a single upsert when
+    the scope ends. Concurrent updates for the same key share one in-memory
+    record, so each sees the other's writes and neither overwrites them with
+    a stale copy when its scope ends.
+
+    With ``write_behind`` enabled, records stay in an LRU cache of
+    ``cache_size`` entries and changes are not written when a scope ends.
+    Dirty records are flushed together in one transaction every
+    ``flush_interval`` seconds, or as soon as ``flush_batch`` keys are dirty,
+    and once more on ``close()``. ``flush_interval`` is therefore the window
+    of FSM changes that a crash can lose.
+    """
+
+    def __init__(
+        self,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        write_behind: bool = False,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        flush_batch: int = DEFAULT_FLUSH_BATCH,
+    ) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="fsm-sqlite"
+        )
+        self._pending = asyncio.Semaphore(max_pending)
+        self._records: OrderedDict[str, _CachedRecord] = OrderedDict()
+        self.write_behind = write_behind
+        self.cache_size = cache_size
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self._dirty: set[str] = set()
+        self._flush_wakeup = asyncio.Event()
+        self._flusher: Optional[asyncio.Task] = None
+        self._closed = False
+        self.select_count = 0
+        self.upsert_count = 0
+        self.flush_count = 0
 
     @staticmethod
     def _key(key: StorageKey) -> str:
@@ -24,20 +110,187 @@ class SQLiteStorage(BaseStorage):
             separators=(",", ":"),
         )
 
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        """Run a blocking repository call on the database thread."""
+        async with self._pending:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(func, *args))
+
+    async def _select(
+        self, key: str, scope: Optional[FSMScope]
+    ) -> tuple[Optional[str], dict]:
+        self.select_count += 1
+        if scope is not None:
+            scope.selects += 1
+        return await self._run(FSMRepository.get, key)
+
+    async def _save(self, key: str, record: _CachedRecord, scope: FSMScope) -> None:
+        self.upsert_count += 1
+        scope.upserts += 1
+        record.dirty = False
+        await self._run(FSMRepository.save, key, record.state, record.data.copy())
+
+    async def _acquire(self, key: str) -> Optional[_CachedRecord]:
+        """Return the shared record for a key, loading it once per scope."""
+        scope = _current_scope.get()
+        record = self._records.get(key)
+        if record is not None and self.write_behind:
+            self._records.move_to_end(key)
+        if scope is None and not self.write_behind:
+            return record
+        if scope is not None and key in scope.keys:
+            return record
+
+        if record is None:
+            state, data = await self._select(key, scope)
+            # Another update may have loaded the key while this one waited.
+            record = self._records.get(key)
+            if record is None:
+                if self.write_behind:
+                    self._evict(room=1)
+                record = self._records[key] = _CachedRecord(state, data)
+        if scope is not None:
+            record.holders += 1
+            scope.keys.add(key)
+        return record
+
+    async def _release(self, scope: FSMScope) -> None:
+        """Flush records changed during a scope and drop unused ones."""
+        for key in scope.keys:
+            record = self._records[key]
+            try:
+                if record.dirty and not self.write_behind:
+                    await self._save(key, record, scope)
+            finally:
+                record.holders -= 1
+                if record.holders == 0 and not self.write_behind:
+                    del self._records[key]
+        if self.write_behind:
+            self._evict()
+
+    def _evict(self, room: int = 0) -> None:
+        """Drop least recently used records that are clean and not in use."""
+        overflow = len(self._records) + room - self.cache_size
+        if overflow <= 0:
+            return
+
+        for key in list(self._records):
+            record = self._records[key]
+            if record.holders or record.dirty:
+                continue
+            del self._records[key]
+            overflow -= 1
+            if overflow == 0:
+                return
+
+    def _mark_dirty(self, key: str, record: _CachedRecord) -> None:
+        record.dirty = True
+        if not self.write_behind:
+            return
+
+        self._dirty.add(key)
+        if self._flusher is None and not self._closed:
+            self._flusher = asyncio.create_task(self._flush_periodically())
+        if len(self._dirty) >= self.flush_batch:
+            self._flush_wakeup.set()
+
+    async def _flush_periodically(self) -> None:
+        while not self._closed:
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._flush_wakeup.wait(), self.flush_interval)
+            self._flush_wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to flush FSM records; will retry")
+
+    async def flush(self) -> None:
+        """Write all dirty records in a single transaction."""
+        keys = list(self._dirty)
+        if not keys:
+            return
+
+        self._dirty.clear()
+        rows = [
+            (key, self._records[key].state, self._records[key].data.copy())
+            for key in keys
+        ]
+        try:
+            await self._run(FSMRepository.save_many, rows)
+        except Exception:
+            self._dirty.update(keys)
+            raise
+
+        self.upsert_count += len(rows)
+        self.flush_count += 1
+        for key in keys:
+            # Keys written again during the flush stay dirty for the next one.
+            if key not in self._dirty:
+                self._records[key].dirty = False
+        self._evict()
+
+    @asynccontextmanager
+    async def update_scope(self) -> AsyncIterator[FSMScope]:
+        """Cache FSM records for the duration of one update."""
+        scope = FSMScope()
+        token = _current_scope.set(scope)
+        try:
+            yield scope
+        finally:
+            _current_scope.reset(token)
+            await self._release(scope)
+
     async def set_state(self, key: StorageKey, state: StateType = None) -> None:
         value = state.state if isinstance(state, State) else state
-        FSMRepository.set_state(self._key(key), value)
+        storage_key = self._key(key)
+        record = await self._acquire(storage_key)
+        if record is not None:
+            record.state = value
+            if _current_scope.get() is not None or self.write_behind:
+                self._mark_dirty(storage_key, record)
+                return
+
+        self.upsert_count += 1
+        await self._run(FSMRepository.set_state, storage_key, value)
 
     async def get_state(self, key: StorageKey) -> Optional[str]:
-        state, _ = FSMRepository.get(self._key(key))
+        storage_key = self._key(key)
+        record = await self._acquire(storage_key)
+        if record is not None:
+            return record.state
+
+        state, _ = await self._select(storage_key, None)
         return state
 
     async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
-        FSMRepository.set_data(self._key(key), data.copy())
+        storage_key = self._key(key)
+        record = await self._acquire(storage_key)
+        if record is not None:
+            record.data = data.copy()
+            if _current_scope.get() is not None or self.write_behind:
+                self._mark_dirty(storage_key, record)
+                return
+
+        self.upsert_count += 1
+        await self._run(FSMRepository.set_data, storage_key, data.copy())
 
     async def get_data(self, key: StorageKey) -> dict[str, Any]:
-        _, data = FSMRepository.get(self._key(key))
+        storage_key = self._key(key)
+        record = await self._acquire(storage_key)
+        if record is not None:
+            return record.data.copy()
+
+        _, data = await self._select(storage_key, None)
         return data.copy()
 
     async def close(self) -> None:
-        pass
+        self._closed = True
+        if self._flusher is not None:
+            self._flush_wakeup.set()
+            await self._flusher
+            self._flusher = None
+        try:
+            await self.flush()
+        finally:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._executor.shutdown)
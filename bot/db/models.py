@@ -1,7 +1,18 @@
-import json
 import os
 from pathlib import Path
-from sqlalchemy import create_engine, Column, Integer, String, BigInteger, Text
+from sqlalchemy import (
+    create_engine,
+    inspect,
+    text,
+    Column,
+    Engine,
+    Float,
+    Integer,
+    String,
+    BigInteger,
+    LargeBinary,
+    Text,
+)
 from sqlalchemy.orm import declarative_base, sessionmaker, Session
 
 Base = declarative_base()
@@ -23,10 +34,13 @@ class User(Base):
     name = Column(String(100), nullable=False)
     level = Column(String(20), nullable=True)  # junior, middle, senior
 
-    # Scores stored as JSON: {"correct": X, "total": Y}
-    scores_junior = Column(String(100), default='{"correct": 0, "total": 0}')
-    scores_middle = Column(String(100), default='{"correct": 0, "total": 0}')
-    scores_senior = Column(String(100), default='{"correct": 0, "total": 0}')
+    # Correct and total answer counters per level
+    junior_correct = Column(Integer, nullable=False, default=0, server_default="0")
+    junior_total = Column(Integer, nullable=False, default=0, server_default="0")
+    middle_correct = Column(Integer, nullable=False, default=0, server_default="0")
+    middle_total = Column(Integer, nullable=False, default=0, server_default="0")
+    senior_correct = Column(Integer, nullable=False, default=0, server_default="0")
+    senior_total = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Pinned message ID for score display
     pinned_message_id = Column(BigInteger, nullable=True)
@@ -36,26 +50,25 @@ class User(Base):
         if level not in VALID_LEVELS:
             raise ValueError(f"Unsupported quiz level: {level}")
 
-        scores_field = getattr(self, f"scores_{level}")
-        if scores_field:
-            return json.loads(scores_field)
-        return {"correct": 0, "total": 0}
+        return {
+            "correct": getattr(self, f"{level}_correct") or 0,
+            "total": getattr(self, f"{level}_total") or 0,
+        }
 
     def set_scores(self, level: str, correct: int, total: int) -> None:
         """Set scores for a specific level."""
         if level not in VALID_LEVELS:
             raise ValueError(f"Unsupported quiz level: {level}")
 
-        setattr(
-            self, f"scores_{level}", json.dumps({"correct": correct, "total": total})
-        )
+        setattr(self, f"{level}_correct", correct)
+        setattr(self, f"{level}_total", total)
 
     def get_all_scores(self) -> dict:
         """Get scores for all levels."""
         return {
-            "junior": self.get_scores("junior"),
-            "middle": self.get_scores("middle"),
-            "senior": self.get_scores("senior"),
+            "junior": {"correct": self.junior_correct, "total": self.junior_total},
+            "middle": {"correct": self.middle_correct, "total": self.middle_total},
+            "senior": {"correct": self.senior_correct, "total": self.senior_total},
         }
 
 
@@ -69,10 +82,145 @@ class FSMRecord(Base):
     data = Column(Text, nullable=False, default="{}")
 
 
+class TelegramFile(Base):
+    """Telegram file_id of an uploaded local file, keyed by content hash."""
+
+    __tablename__ = "telegram_files"
+
+    sha256 = Column(String(64), primary_key=True)
+    file_id = Column(String(255), nullable=False)
+
+
+class QuizSession(Base):
+    """Progress of the quiz a user is taking in one chat."""
+
+    __tablename__ = "quiz_sessions"
+
+    chat_id = Column(BigInteger, primary_key=True)
+    user_id = Column(BigInteger, primary_key=True)
+    topic = Column(String(50), nullable=False)
+    level = Column(String(20), nullable=False)
+    idx = Column(Integer, nullable=False, default=0)  # next question to answer
+    score = Column(Integer, nullable=False, default=0)
+    version = Column(BigInteger, nullable=True)  # quiz content version
+    # Quiz poll showing the current question, when sent as a poll
+    poll_id = Column(String(64), nullable=True, index=True)
+    # Random number of this quiz, carried by its answer buttons
+    nonce = Column(Integer, nullable=True)
+
+    # Bit i is set when question i was answered correctly. The bitset is
+    # allocated for the whole quiz up front, so every answer rewrites a row
+    # of the same size.
+    answers = Column(LargeBinary, nullable=False)
+
+    def is_correct(self, index: int) -> bool:
+        """Check whether a question was answered correctly."""
+        return bool(self.answers[index // 8] >> (index % 8) & 1)
+
+    def get_results(self) -> list[bool]:
+        """Get correctness of every answered question in order."""
+        return [self.is_correct(index) for index in range(self.idx)]
+
+
+class QuizReport(Base):
+    """Results of the last quiz a user finished in one chat.
+
+    Kept so the pages of the results message can be rendered when the user
+    opens them. Replaced when the next quiz is finished.
+    """
+
+    __tablename__ = "quiz_reports"
+
+    chat_id = Column(BigInteger, primary_key=True)
+    user_id = Column(BigInteger, primary_key=True)
+    topic = Column(String(50), nullable=False)
+    level = Column(String(20), nullable=False)
+    version = Column(BigInteger, nullable=True)  # quiz content version
+    nonce = Column(Integer, nullable=True)  # nonce of the finished quiz
+    score = Column(Integer, nullable=False)
+    total = Column(Integer, nullable=False)
+    answers = Column(LargeBinary, nullable=False)  # see QuizSession.answers
+
+    def is_correct(self, index: int) -> bool:
+        """Check whether a question was answered correctly."""
+        return bool(self.answers[index // 8] >> (index % 8) & 1)
+
+
+class FeedbackMessage(Base):
+    """Feedback waiting to be delivered to the feedback channel."""
+
+    __tablename__ = "feedback_outbox"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    text = Column(Text, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)  # failed deliveries
+    # Unix time of the next delivery attempt; while a process is sending the
+    # feedback, the time its claim expires
+    next_attempt = Column(Float, nullable=False, default=0, index=True)
+
+
+def migrate_scores(bind: Engine) -> None:
+    """Move legacy JSON score strings into integer score columns.
+
+    Databases created before the integer columns existed keep the old
+    ``scores_<level>`` columns. The new columns are added and filled in one
+    transaction; the legacy columns are left in place and no longer read.
+    """
+    columns = {column["name"] for column in inspect(bind).get_columns("users")}
+    if "junior_correct" in columns:
+        return
+
+    with bind.begin() as connection:
+        for level in sorted(VALID_LEVELS):
+            for field in ("correct", "total"):
+                connection.execute(
+                    text(
+                        f"ALTER TABLE users ADD COLUMN {level}_{field} "
+                        "INTEGER NOT NULL DEFAULT 0"
+                    )
+                )
+                if f"scores_{level}" in columns:
+                    connection.execute(
+                        text(
+                            f"UPDATE users SET {level}_{field} = coalesce("
+                            f"json_extract(scores_{level}, '$.{field}'), 0)"
+                        )
+                    )
+
+
+def migrate_quiz_sessions(bind: Engine) -> None:
+    """Add columns missing from quiz sessions created by older versions."""
+    columns = {column["name"] for column in inspect(bind).get_columns("quiz_sessions")}
+    if "version" not in columns:
+        with bind.begin() as connection:
+            connection.execute(
+                text("ALTER TABLE quiz_sessions ADD COLUMN version BIGINT")
+            )
+    if "poll_id" not in columns:
+        with bind.begin() as connection:
+            connection.execute(
+                text("ALTER TABLE quiz_sessions ADD COLUMN poll_id VARCHAR(64)")
+            )
+            connection.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_quiz_sessions_poll_id "
+                    "ON quiz_sessions (poll_id)"
+                )
+            )
+
+    if "nonce" not in columns:
+        with bind.begin() as connection:
+            connection.execute(
+                text("ALTER TABLE quiz_sessions ADD COLUMN nonce INTEGER")
+            )
+
+
 def init_db() -> None:
     """Initialize the database and create tables."""
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
     Base.metadata.create_all(engine)
+    migrate_scores(engine)
+    migrate_quiz_sessions(engine)
 
 
 def get_session() -> Session:
@@ -1,10 +1,25 @@
 import json
+import secrets
 from typing import Optional
 
-from sqlalchemy import Integer, cast, func, update
+from sqlalchemy import delete, func, select, update
 from sqlalchemy.dialects.sqlite import insert
 
-from bot.db.models import FSMRecord, User, VALID_LEVELS, get_session
+from bot.cache import LRUCache
+from bot.config import user_cache_size, user_cache_ttl
+from bot.db.models import (
+    FeedbackMessage,
+    FSMRecord,
+    QuizReport,
+    QuizSession,
+    TelegramFile,
+    User,
+    VALID_LEVELS,
+    get_session,
+)
+
+# Read-through cache of detached User rows. Every write invalidates the entry.
+_user_cache: LRUCache[int, User] = LRUCache(user_cache_size, ttl=user_cache_ttl)
 
 
 class UserRepository:
@@ -13,8 +28,26 @@ class UserRepository:
     @staticmethod
     def get_by_telegram_id(telegram_id: int) -> Optional[User]:
         """Get user by Telegram ID."""
+        user = _user_cache.get(telegram_id)
+        if user is not None:
+            return user
+
+        generation = _user_cache.generation
         with get_session() as session:
-            return session.query(User).filter(User.telegram_id == telegram_id).first()
+            user = session.query(User).filter(User.telegram_id == telegram_id).first()
+        if user is not None:
+            _user_cache.set(telegram_id, user, generation)
+        return user
+
+    @staticmethod
+    def cache_stats() -> dict[str, int]:
+        """Get hit/miss counters of the user cache."""
+        return _user_cache.stats()
+
+    @staticmethod
+    def clear_cache() -> None:
+        """Drop all cached users."""
+        _user_cache.clear()
 
     @staticmethod
     def create(telegram_id: int, name: str) -> User:
@@ -24,7 +57,8 @@ class UserRepository:
             session.add(user)
             session.commit()
             session.refresh(user)
-            return user
+        _user_cache.invalidate(telegram_id)
+        return user
 
     @staticmethod
     def get_or_create(telegram_id: int, name: str) -> tuple[User, bool]:
@@ -43,7 +77,8 @@ class UserRepository:
                 user.name = name
                 session.commit()
                 session.refresh(user)
-            return user
+        _user_cache.invalidate(telegram_id)
+        return user
 
     @staticmethod
     def update_level(telegram_id: int, level: str) -> Optional[User]:
@@ -54,7 +89,8 @@ class UserRepository:
                 user.level = level
                 session.commit()
                 session.refresh(user)
-            return user
+        _user_cache.invalidate(telegram_id)
+        return user
 
     @staticmethod
     def update_scores(
@@ -67,7 +103,8 @@ class UserRepository:
                 user.set_scores(level, correct, total)
                 session.commit()
                 session.refresh(user)
-            return user
+        _user_cache.invalidate(telegram_id)
+        return user
 
     @staticmethod
     def add_to_scores(
@@ -77,13 +114,8 @@ class UserRepository:
         if level not in VALID_LEVELS:
             raise ValueError(f"Unsupported quiz level: {level}")
 
-        score_column = getattr(User, f"scores_{level}")
-        correct = func.coalesce(
-            cast(func.json_extract(score_column, "$.correct"), Integer), 0
-        )
-        total = func.coalesce(
-            cast(func.json_extract(score_column, "$.total"), Integer), 0
-        )
+        correct_column = getattr(User, f"{level}_correct")
+        total_column = getattr(User, f"{level}_total")
 
         with get_session() as session:
             result = session.execute(
@@ -91,12 +123,8 @@ class UserRepository:
                 .where(User.telegram_id == telegram_id)
                 .values(
                     {
-                        score_column: func.json_object(
-                            "correct",
-                            correct + correct_delta,
-                            "total",
-                            total + total_delta,
-                        )
+                        correct_column: correct_column + correct_delta,
+                        total_column: total_column + total_delta,
                     }
                 )
             )
@@ -105,6 +133,7 @@ class UserRepository:
                 return None
 
             session.commit()
+            _user_cache.invalidate(telegram_id)
             return session.query(User).filter(User.telegram_id == telegram_id).first()
 
     @staticmethod
@@ -116,7 +145,8 @@ class UserRepository:
                 user.pinned_message_id = message_id
                 session.commit()
                 session.refresh(user)
-            return user
+        _user_cache.invalidate(telegram_id)
+        return user
 
     @staticmethod
     def get_pinned_message_id(telegram_id: int) -> Optional[int]:
@@ -125,6 +155,277 @@ class UserRepository:
         return user.pinned_message_id if user else None
 
 
+class QuizSessionRepository:
+    """Repository for in-progress quiz sessions."""
+
+    @staticmethod
+    def start(
+        chat_id: int,
+        user_id: int,
+        topic: str,
+        level: str,
+        total: int,
+        version: Optional[int] = None,
+    ) -> QuizSession:
+        """Start a new quiz, replacing any unfinished one in the chat."""
+        answers = bytes((total + 7) // 8)
+        values = {
+            "topic": topic,
+            "level": level,
+            "idx": 0,
+            "score": 0,
+            "version": version,
+            "poll_id": None,
+            "nonce": secrets.randbits(32),
+        }
+        with get_session() as session:
+            statement = insert(QuizSession).values(
+                chat_id=chat_id, user_id=user_id, answers=answers, **values
+            )
+            session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[QuizSession.chat_id, QuizSession.user_id],
+                    set_={**values, "answers": answers},
+                )
+            )
+            session.commit()
+            return session.get(QuizSession, (chat_id, user_id))
+
+    @staticmethod
+    def get(chat_id: int, user_id: int) -> Optional[QuizSession]:
+        """Get the quiz a user is taking in a chat."""
+        with get_session() as session:
+            return session.get(QuizSession, (chat_id, user_id))
+
+    @staticmethod
+    def get_by_polls(poll_ids: list[str]) -> dict[str, QuizSession]:
+        """Get the quizzes whose current question is one of the given polls."""
+        with get_session() as session:
+            quizzes = (
+                session.query(QuizSession)
+                .filter(QuizSession.poll_id.in_(poll_ids))
+                .all()
+            )
+        return {quiz.poll_id: quiz for quiz in quizzes}
+
+    @staticmethod
+    def set_poll(chat_id: int, user_id: int, poll_id: str) -> None:
+        """Remember the poll that shows the current question."""
+        with get_session() as session:
+            session.execute(
+                update(QuizSession)
+                .where(QuizSession.chat_id == chat_id, QuizSession.user_id == user_id)
+                .values(poll_id=poll_id)
+            )
+            session.commit()
+
+    @staticmethod
+    def record_answer(quiz: QuizSession, is_correct: bool) -> bool:
+        """Store the answer to the current question and advance the quiz.
+
+        The update is a compare-and-set: it only applies while the stored
+        index, answers and nonce still equal those of ``quiz``, so concurrent
+        callers, in any process, store an answer exactly once. Returns False
+        if the question was already answered.
+        """
+        return QuizSessionRepository.record_answers([(quiz, is_correct)])[0]
+
+    @staticmethod
+    def record_answers(answers: list[tuple[QuizSession, bool]]) -> list[bool]:
+        """Record answers to several quizzes in one transaction.
+
+        Each quiz must appear at most once. Returns whether each answer was
+        stored; see ``record_answer()``.
+        """
+        recorded, bitsets = [], []
+        with get_session() as session:
+            for quiz, is_correct in answers:
+                bitset = bytearray(quiz.answers)
+                if is_correct:
+                    bitset[quiz.idx // 8] |= 1 << (quiz.idx % 8)
+                bitsets.append(bytes(bitset))
+                result = session.execute(
+                    update(QuizSession)
+                    .where(
+                        QuizSession.chat_id == quiz.chat_id,
+                        QuizSession.user_id == quiz.user_id,
+                        QuizSession.idx == quiz.idx,
+                        QuizSession.answers == quiz.answers,
+                        QuizSession.nonce == quiz.nonce,
+                    )
+                    .values(
+                        idx=QuizSession.idx + 1,
+                        score=QuizSession.score + int(is_correct),
+                        answers=bytes(bitset),
+                    )
+                )
+                recorded.append(result.rowcount == 1)
+            session.commit()
+
+        for (quiz, is_correct), bitset, stored in zip(answers, bitsets, recorded):
+            if stored:
+                quiz.answers = bitset
+                quiz.idx += 1
+                quiz.score += int(is_correct)
+        return recorded
+
+    @staticmethod
+    def finish(chat_id: int, user_id: int) -> None:
+        """Remove a completed quiz."""
+        with get_session() as session:
+            session.execute(
+                delete(QuizSession).where(
+                    QuizSession.chat_id == chat_id, QuizSession.user_id == user_id
+                )
+            )
+            session.commit()
+
+
+class QuizReportRepository:
+    """Repository for the results of finished quizzes."""
+
+    @staticmethod
+    def save(quiz: QuizSession) -> QuizReport:
+        """Keep the results of a finished quiz, replacing the previous ones."""
+        values = {
+            "topic": quiz.topic,
+            "level": quiz.level,
+            "version": quiz.version,
+            "nonce": quiz.nonce,
+            "score": quiz.score,
+            "total": quiz.idx,
+            "answers": quiz.answers,
+        }
+        with get_session() as session:
+            statement = insert(QuizReport).values(
+                chat_id=quiz.chat_id, user_id=quiz.user_id, **values
+            )
+            session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[QuizReport.chat_id, QuizReport.user_id],
+                    set_=values,
+                )
+            )
+            session.commit()
+            return session.get(QuizReport, (quiz.chat_id, quiz.user_id))
+
+    @staticmethod
+    def get(chat_id: int, user_id: int) -> Optional[QuizReport]:
+        """Get the results of the last quiz a user finished in a chat."""
+        with get_session() as session:
+            return session.get(QuizReport, (chat_id, user_id))
+
+
+class FeedbackRepository:
+    """Repository for feedback waiting to be delivered."""
+
+    @staticmethod
+    def add(text: str) -> int:
+        """Store feedback for delivery and return its id."""
+        with get_session() as session:
+            message = FeedbackMessage(text=text)
+            session.add(message)
+            session.commit()
+            return message.id
+
+    @staticmethod
+    def add_all(texts: list[str]) -> list[int]:
+        """Store several pieces of feedback in one transaction; return their ids."""
+        with get_session() as session:
+            messages = [FeedbackMessage(text=text) for text in texts]
+            session.add_all(messages)
+            session.commit()
+            return [message.id for message in messages]
+
+    @staticmethod
+    def claim(now: float, limit: int, lease: float) -> list[FeedbackMessage]:
+        """Take up to ``limit`` due messages, oldest first, for ``lease`` seconds.
+
+        The claim is one UPDATE, so a message is claimed by one process at a
+        time. Messages that are neither delivered nor postponed before the
+        lease expires are due again.
+        """
+        due = (
+            select(FeedbackMessage.id)
+            .where(FeedbackMessage.next_attempt <= now)
+            .order_by(FeedbackMessage.id)
+            .limit(limit)
+        )
+        with get_session() as session:
+            ids = session.scalars(
+                update(FeedbackMessage)
+                .where(FeedbackMessage.id.in_(due))
+                .values(next_attempt=now + lease)
+                .returning(FeedbackMessage.id)
+            ).all()
+            session.commit()
+            if not ids:
+                return []
+            return list(
+                session.scalars(
+                    select(FeedbackMessage)
+                    .where(FeedbackMessage.id.in_(ids))
+                    .order_by(FeedbackMessage.id)
+                )
+            )
+
+    @staticmethod
+    def postpone(ids: list[int], next_attempt: float) -> None:
+        """Count a failed delivery and schedule the next attempt."""
+        with get_session() as session:
+            session.execute(
+                update(FeedbackMessage)
+                .where(FeedbackMessage.id.in_(ids))
+                .values(
+                    attempts=FeedbackMessage.attempts + 1, next_attempt=next_attempt
+                )
+            )
+            session.commit()
+
+    @staticmethod
+    def delete(ids: list[int]) -> None:
+        """Remove delivered messages."""
+        with get_session() as session:
+            session.execute(delete(FeedbackMessage).where(FeedbackMessage.id.in_(ids)))
+            session.commit()
+
+    @staticmethod
+    def next_attempt() -> Optional[float]:
+        """Get the time of the earliest delivery attempt, if any is pending."""
+        with get_session() as session:
+            return session.scalar(select(func.min(FeedbackMessage.next_attempt)))
+
+
+class TelegramFileRepository:
+    """Repository for file_ids of uploaded files."""
+
+    @staticmethod
+    def get(sha256: str) -> Optional[str]:
+        """Get the file_id of an uploaded file by its content hash."""
+        with get_session() as session:
+            record = session.get(TelegramFile, sha256)
+            return record.file_id if record else None
+
+    @staticmethod
+    def save(sha256: str, file_id: str) -> None:
+        """Remember the file_id of an uploaded file."""
+        with get_session() as session:
+            statement = insert(TelegramFile).values(sha256=sha256, file_id=file_id)
+            session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[TelegramFile.sha256], set_={"file_id": file_id}
+                )
+            )
+            session.commit()
+
+    @staticmethod
+    def delete(sha256: str) -> None:
+        """Forget a file_id that Telegram no longer accepts."""
+        with get_session() as session:
+            session.execute(delete(TelegramFile).where(TelegramFile.sha256 == sha256))
+            session.commit()
+
+
 class FSMRepository:
     """Persistence operations used by the aiogram FSM storage adapter."""
 
@@ -158,3 +459,42 @@ class FSMRepository:
                 )
             )
             session.commit()
+
+    @staticmethod
+    def save(key: str, state: Optional[str], data: dict) -> None:
+        """Write state and data for one key in a single upsert."""
+        encoded = json.dumps(data, ensure_ascii=False)
+        with get_session() as session:
+            statement = insert(FSMRecord).values(key=key, state=state, data=encoded)
+            session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[FSMRecord.key],
+                    set_={"state": state, "data": encoded},
+                )
+            )
+            session.commit()
+
+    @staticmethod
+    def save_many(rows: list[tuple[str, Optional[str], dict]]) -> None:
+        """Upsert several (key, state, data) rows in one transaction."""
+        if not rows:
+            return
+
+        statement = insert(FSMRecord)
+        statement = statement.on_conflict_do_update(
+            index_elements=[FSMRecord.key],
+            set_={"state": statement.excluded.state, "data": statement.excluded.data},
+        )
+        with get_session() as session:
+            session.execute(
+                statement,
+                [
+                    {
+                        "key": key,
+                        "state": state,
+                        "data": json.dumps(data, ensure_ascii=False),
+                    }
+                    for key, state, data in rows
+                ],
+            )
+            session.commit()
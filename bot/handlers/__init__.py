@@ -2,8 +2,10 @@ from aiogram import Router
 
 from bot.handlers.start import router as start_router
 from bot.handlers.quiz import router as quiz_router
+from bot.handlers.quiz_poll import router as quiz_poll_router
 from bot.handlers.feedback import router as feedback_router
 from bot.handlers.fallback import router as fallback_router
+from bot.handlers.routes import callback_routes
 
 
 def setup_routers() -> Router:
@@ -12,8 +14,9 @@ def setup_routers() -> Router:
     router.include_router(feedback_router)
     router.include_router(start_router)
     router.include_router(quiz_router)
+    router.include_router(quiz_poll_router)
     router.include_router(fallback_router)
     return router
 
 
-__all__ = ["setup_routers"]
+__all__ = ["callback_routes", "setup_routers"]
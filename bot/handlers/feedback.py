@@ -1,24 +1,70 @@
+import asyncio
+import contextvars
 import logging
+import time
+from typing import Callable, Optional
 
-from aiogram import Router, F, Bot
+from aiogram import Router, Bot
 from aiogram.exceptions import (
     TelegramAPIError,
     TelegramBadRequest,
     TelegramForbiddenError,
     TelegramNetworkError,
     TelegramNotFound,
+    TelegramRetryAfter,
 )
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, CallbackQuery
+from sqlalchemy.exc import SQLAlchemyError
 
-from bot.config import feedback_channel_id, get_feedback_chat_id
+from bot.config import (
+    feedback_channel_id,
+    feedback_max_attempts,
+    feedback_retry_delay,
+    feedback_retry_max_delay,
+    get_feedback_chat_id,
+)
+from bot.db.models import FeedbackMessage
+from bot.db.repository import FeedbackRepository
+from bot.handlers.routes import callback_routes
+from bot.keyboards import FEEDBACK
+from bot.middlewares import low_priority
 from bot.states import QuizState
 
 router = Router()
+logger = logging.getLogger(__name__)
 
 _FEEDBACK_RETURN_STATE_KEY = "_feedback_return_state"
 
+# Telegram's limit for a message, minus room for the digest header
+MAX_DIGEST_LENGTH = 4096 - 64
+_DIGEST_SEPARATOR = "\n\n➖➖➖\n\n"
+_PART_HEADER = "📎 Часть {index}/{count}\n\n"
+
+
+def _is_missing_rights(error: Exception) -> bool:
+    """Check whether the bot may not post in the feedback channel."""
+    description = str(error).lower()
+    return isinstance(error, TelegramBadRequest) and (
+        "not enough rights" in description
+        or "need administrator rights" in description
+        or "message can't be sent" in description
+    )
+
+
+def _is_undeliverable(error: Exception) -> bool:
+    """Check whether sending the same text again cannot succeed.
+
+    Missing access to the channel does not count: it is fixed by the
+    bot's configuration, after which the feedback can be delivered.
+    """
+    return (
+        isinstance(error, TelegramBadRequest)
+        and "chat not found" not in str(error).lower()
+        and not _is_missing_rights(error)
+    )
+
 
 def _feedback_error_message(error: Exception) -> str:
     """Return an actionable message for feedback delivery failures."""
@@ -27,11 +73,7 @@ def _feedback_error_message(error: Exception) -> str:
         return "Бот не имеет доступа к каналу отзывов. Добавь его администратором."
     if isinstance(error, TelegramNotFound) or "chat not found" in description:
         return "Канал отзывов не найден. Проверь FEEDBACK_CHANNEL_ID."
-    if isinstance(error, TelegramBadRequest) and (
-        "not enough rights" in description
-        or "need administrator rights" in description
-        or "message can't be sent" in description
-    ):
+    if _is_missing_rights(error):
         return (
             "Боту не разрешено публиковать в канале отзывов. Выдай право Post Messages."
         )
@@ -42,6 +84,215 @@ def _feedback_error_message(error: Exception) -> str:
     return "Не удалось отправить отзыв. Ошибка записана в журнал бота."
 
 
+def _split_feedback(text: str) -> list[str]:
+    """Split feedback into parts that fit one channel message each.
+
+    Parts end at a line break where possible and are numbered.
+    """
+    if len(text) <= MAX_DIGEST_LENGTH:
+        return [text]
+    size = MAX_DIGEST_LENGTH - len(_PART_HEADER.format(index=999, count=999))
+    chunks = []
+    while len(text) > size:
+        end = text.rfind("\n", size // 2, size)
+        if end == -1:
+            end = size
+        chunks.append(text[:end])
+        text = text[end:].lstrip("\n")
+    chunks.append(text)
+    return [
+        _PART_HEADER.format(index=index, count=len(chunks)) + chunk
+        for index, chunk in enumerate(chunks, 1)
+    ]
+
+
+def _build_digests(messages: list[FeedbackMessage]) -> list[tuple[list[int], str]]:
+    """Merge feedback into as few channel messages as fit Telegram's limit.
+
+    Returns the ids of the merged feedback and the text of each message.
+    """
+    groups: list[list[FeedbackMessage]] = []
+    length = 0
+    for message in messages:
+        size = len(message.text) + len(_DIGEST_SEPARATOR)
+        if groups and length + size <= MAX_DIGEST_LENGTH:
+            groups[-1].append(message)
+            length += size
+        else:
+            groups.append([message])
+            length = size
+
+    digests = []
+    for group in groups:
+        if len(group) == 1:
+            text = f"✉️ Новый отзыв от @LinuxQuizBot\n\n{group[0].text}"
+        else:
+            text = f"✉️ Новые отзывы от @LinuxQuizBot: {len(group)}\n\n" + (
+                _DIGEST_SEPARATOR.join(message.text for message in group)
+            )
+        digests.append(([message.id for message in group], text))
+    return digests
+
+
+class FeedbackOutbox:
+    """Delivers feedback stored in the database to the feedback channel.
+
+    ``submit()`` commits the feedback before the user is thanked, so it
+    survives Telegram outages and restarts. A background task claims due
+    feedback in batches of ``batch_size`` and sends it: a single feedback as
+    is, several that piled up while the previous batch was being sent as one
+    digest. A failed delivery is retried after ``retry_delay`` seconds,
+    doubling with every attempt up to ``max_retry_delay``.
+
+    Feedback that Telegram rejects as such, or that failed ``max_attempts``
+    times, is dropped and its text logged as an error.
+    """
+
+    def __init__(
+        self,
+        retry_delay: float,
+        max_retry_delay: float,
+        max_attempts: int = 50,
+        batch_size: int = 20,
+        lease: float = 60,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_attempts = max_attempts
+        self.batch_size = batch_size
+        self.lease = lease
+        self._clock = clock
+        self._bot: Optional[Bot] = None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.sent = 0
+        self.delivered = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def submit(self, bot: Bot, text: str) -> None:
+        """Store feedback and have it delivered in the background.
+
+        Feedback too long for one channel message is stored in parts, all
+        or none of them. Raises ``SQLAlchemyError`` if it cannot be stored.
+        """
+        FeedbackRepository.add_all(_split_feedback(text))
+        self.start(bot)
+
+    def start(self, bot: Bot) -> None:
+        """Start delivering stored feedback, if not running already."""
+        self._bot = bot
+        self._closing = False
+        self._wakeup.set()
+        if self._task is None or self._task.done():
+            # Not in the context of the update that started the task, so
+            # delivery is not tied to that update's FSM scope
+            self._task = asyncio.create_task(self._run(), context=contextvars.Context())
+
+    async def _run(self) -> None:
+        with low_priority():
+            try:
+                while not self._closing:
+                    self._wakeup.clear()
+                    batch = FeedbackRepository.claim(
+                        self._clock(), self.batch_size, self.lease
+                    )
+                    if batch:
+                        await self.deliver(batch)
+                        continue
+                    due = FeedbackRepository.next_attempt()
+                    if due is None:
+                        return
+                    try:
+                        await asyncio.wait_for(
+                            self._wakeup.wait(), max(0.0, due - self._clock())
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+            except Exception:
+                logger.exception("Failed to deliver feedback")
+
+    async def deliver(self, batch: list[FeedbackMessage]) -> None:
+        """Send claimed feedback; postpone what could not be sent."""
+        messages = {message.id: message for message in batch}
+        for ids, text in _build_digests(batch):
+            try:
+                await self._bot.send_message(
+                    chat_id=get_feedback_chat_id(feedback_channel_id),
+                    text=text,
+                    parse_mode=None,
+                )
+            except (TelegramAPIError, ValueError) as error:
+                self.failed += 1
+                if len(ids) > 1 and _is_undeliverable(error):
+                    # Send the items one by one to find the rejected ones
+                    for id_ in ids:
+                        await self.deliver([messages[id_]])
+                    continue
+                retries = max(messages[id_].attempts for id_ in ids)
+                if _is_undeliverable(error):
+                    reason = "rejected by Telegram"
+                elif retries + 1 >= self.max_attempts:
+                    reason = f"after {retries + 1} failed attempts"
+                else:
+                    reason = None
+                if reason is not None:
+                    logger.error(
+                        "Dropping feedback %s: %s (%s)\n%s",
+                        reason,
+                        error,
+                        _feedback_error_message(error),
+                        text,
+                    )
+                    FeedbackRepository.delete(ids)
+                    self.dropped += len(ids)
+                    continue
+                delay = min(self.retry_delay * 2**retries, self.max_retry_delay)
+                if isinstance(error, TelegramRetryAfter):
+                    delay = max(delay, error.retry_after)
+                logger.error(
+                    "Failed to deliver feedback to %r, retrying in %.0fs: %s (%s)",
+                    feedback_channel_id,
+                    delay,
+                    error,
+                    _feedback_error_message(error),
+                )
+                FeedbackRepository.postpone(ids, self._clock() + delay)
+            else:
+                FeedbackRepository.delete(ids)
+                self.sent += 1
+                self.delivered += len(ids)
+
+    async def close(self) -> None:
+        """Finish the batch being sent and stop; the rest waits in the database."""
+        self._closing = True
+        self._wakeup.set()
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+        logger.info(
+            f"Feedback outbox stopped: {self.delivered} delivered "
+            f"in {self.sent} messages, {self.failed} failed attempts, "
+            f"{self.dropped} dropped"
+        )
+
+
+_outbox = FeedbackOutbox(
+    feedback_retry_delay, feedback_retry_max_delay, feedback_max_attempts
+)
+
+
+def start_feedback_delivery(bot: Bot) -> None:
+    """Deliver feedback left over from a previous run."""
+    _outbox.start(bot)
+
+
+async def close_feedback_delivery() -> None:
+    """Stop delivering feedback."""
+    await _outbox.close()
+
+
 @router.message(Command("feedback"))
 async def cmd_feedback(msg: Message, state: FSMContext) -> None:
     """Handle /feedback command."""
@@ -53,7 +304,7 @@ async def cmd_feedback(msg: Message, state: FSMContext) -> None:
     await state.set_state(QuizState.waiting_for_feedback)
 
 
-@router.callback_query(F.data == "feedback")
+@callback_routes.callback_query(router, FEEDBACK, exact=True)
 async def callback_feedback(cb: CallbackQuery, state: FSMContext) -> None:
     """Handle feedback button click."""
     await _remember_feedback_return_state(state)
@@ -77,29 +328,28 @@ async def handle_feedback(msg: Message, state: FSMContext, bot: Bot) -> None:
         await msg.answer("Не удалось отправить отзыв. Попробуй позже.", parse_mode=None)
         return
 
+    try:
+        get_feedback_chat_id(feedback_channel_id)
+    except ValueError as error:
+        logging.error("Invalid FEEDBACK_CHANNEL_ID %r: %s", feedback_channel_id, error)
+        await msg.answer(_feedback_error_message(error), parse_mode=None)
+        return
+
     username = msg.from_user.username
     sender = f"@{username}" if username else f"id:{msg.from_user.id}"
     full_name = msg.from_user.full_name
     text = (
-        "✉️ Новый отзыв от @LinuxQuizBot\n\n"
         f"👤 Пользователь: {full_name}\n"
         f"🔎 Telegram: {sender}\n"
         f"🆔 ID: {msg.from_user.id}\n\n"
         f"📝 Сообщение:\n{feedback_text}"
     )
 
+    # Delivered to the channel in the background, see FeedbackOutbox
     try:
-        await bot.send_message(
-            chat_id=get_feedback_chat_id(feedback_channel_id),
-            text=text,
-            parse_mode=None,
-        )
-    except (TelegramAPIError, ValueError) as error:
-        logging.exception(
-            "Failed to deliver feedback to %r: %s",
-            feedback_channel_id,
-            error,
-        )
+        _outbox.submit(bot, text)
+    except SQLAlchemyError as error:
+        logging.exception("Failed to store feedback from %s", sender)
         await msg.answer(_feedback_error_message(error), parse_mode=None)
         return
 
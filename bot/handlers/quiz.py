@@ -1,8 +1,8 @@
 import asyncio
 import logging
-import weakref
+from typing import Any, Awaitable, Optional
 
-from aiogram import Router, F, Bot
+from aiogram import Router, Bot
 from aiogram.fsm.context import FSMContext
 from aiogram.types import (
     CallbackQuery,
@@ -12,30 +12,39 @@ from aiogram.types import (
 )
 from aiogram.exceptions import TelegramBadRequest
 
+from bot.cache import LRUCache
+from bot.config import quiz_compact_mode, quiz_poll_mode, render_cache_size
+from bot.db.models import QuizReport, QuizSession
+from bot.db.repository import QuizReportRepository, QuizSessionRepository
+from bot.handlers.routes import callback_routes
 from bot.states import QuizState
 from bot.keyboards import (
+    ANSWER_PREFIX,
+    REFERENCE_MESSAGE_PREFIX,
+    REFERENCE_PREFIX,
+    RESULTS_PAGE_PREFIX,
+    TOPIC_PREFIX,
+    QuizCallback,
     build_answers_keyboard,
     build_restart_keyboard,
     build_topics_keyboard,
+    decode_callback,
+    decode_choice,
+    encode_callback,
 )
-from bot.keyboards.builders import LEVELS, TOPICS, get_topic_name, get_level_name
-from bot.services.quiz_service import QuizService
+from bot.keyboards.builders import LEVELS, get_topic_name, get_level_name
+from bot.services.image_service import ImageService
+from bot.services.quiz_service import Question, QuizService
 from bot.services.user_service import UserService, escape_md
 
 router = Router()
-_answer_locks: weakref.WeakValueDictionary[tuple[int, int], asyncio.Lock] = (
-    weakref.WeakValueDictionary()
-)
-
-
-def _get_answer_lock(chat_id: int, user_id: int) -> asyncio.Lock:
-    """Return the lock that serializes answers from one user in one chat."""
-    key = (chat_id, user_id)
-    lock = _answer_locks.get(key)
-    if lock is None:
-        lock = asyncio.Lock()
-        _answer_locks[key] = lock
-    return lock
+# Question lines per results page. Lines are capped in length, so a page
+# stays well under Telegram's 4096 character limit.
+RESULTS_PER_PAGE = 10
+MAX_RESULT_ANSWER_LENGTH = 100
+# Rendered answer texts. Keys include the content version, so entries of a
+# replaced version are never hit again and age out of the LRU.
+_render_cache: LRUCache[tuple, str] = LRUCache(render_cache_size)
 
 
 def _build_answered_keyboard(
@@ -69,25 +78,38 @@ def _build_answer_feedback(
     question_idx: int,
     is_correct: bool,
     include_reference: bool = False,
+    version: int | None = None,
 ) -> str:
     """Build answer text, optionally including the expanded reference."""
+    if version is None:
+        version = QuizService.get_version()
+    key = (
+        "feedback",
+        topic,
+        level,
+        question_idx,
+        is_correct,
+        include_reference,
+        version,
+    )
+    text = _render_cache.get(key)
+    if text is not None:
+        return text
+
     status = "✅ Верно" if is_correct else "❌ Неверно"
-    answer = QuizService.get_correct_answer(topic, level, question_idx) or "N/A"
+    answer = (
+        QuizService.get_correct_answer(topic, level, question_idx, version=version)
+        or "N/A"
+    )
     text = f"{status}\\!\n*Ответ:* {escape_md(answer)}"
     if include_reference:
-        reference = QuizService.get_reference(topic, level, question_idx)
+        reference = QuizService.get_reference(
+            topic, level, question_idx, version=version
+        )
         if not reference:
             reference = "Краткая справка пока не заполнена."
         text += f"\n\n*Краткая справка:*\n{escape_md(reference)}"
-    return text
-
-
-def _build_question_text(question: dict, index: int, total: int) -> str:
-    """Build the MarkdownV2 text shared by text and photo questions."""
-    lines = question["question"].splitlines()
-    text = f"❓ _Вопрос {index + 1} из {total}_\n\n*{escape_md(lines[0])}*"
-    if len(lines) > 1:
-        text += "\n" + "\n".join(escape_md(line) for line in lines[1:])
+    _render_cache.set(key, text)
     return text
 
 
@@ -97,34 +119,69 @@ def _build_answered_question_text(
     question_idx: int,
     is_correct: bool,
     include_reference: bool = False,
+    version: int | None = None,
 ) -> str:
     """Build the question followed by its answer and optional reference."""
-    question = QuizService.get_question(topic, level, question_idx)
-    if not question:
-        return _build_answer_feedback(
-            topic, level, question_idx, is_correct, include_reference
-        )
+    if version is None:
+        version = QuizService.get_version()
+    key = (
+        "answered",
+        topic,
+        level,
+        question_idx,
+        is_correct,
+        include_reference,
+        version,
+    )
+    text = _render_cache.get(key)
+    if text is not None:
+        return text
 
-    total = QuizService.get_question_count(topic, level)
-    return (
-        f"{_build_question_text(question, question_idx, total)}\n\n"
-        f"{_build_answer_feedback(topic, level, question_idx, is_correct, include_reference)}"
+    text = _build_answer_feedback(
+        topic, level, question_idx, is_correct, include_reference, version
     )
+    question = QuizService.get_question(topic, level, question_idx, version=version)
+    if question:
+        text = f"{question.header}\n\n{text}"
+    _render_cache.set(key, text)
+    return text
+
+
+def render_cache_stats() -> dict[str, float]:
+    """Get hit/miss counters and the hit rate of the rendered text cache."""
+    stats: dict[str, float] = dict(_render_cache.stats())
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
 
 
 def _build_reference_keyboard(
-    topic: str, level: str, question_idx: int, is_correct: bool
+    topic: str,
+    level: str,
+    question_idx: int,
+    is_correct: bool,
+    as_message: bool = False,
+    version: Optional[int] = None,
 ) -> InlineKeyboardMarkup:
-    """Build the action that expands a question's short reference."""
-    callback_data = f"ref:{topic}:{level}:{question_idx}:{int(is_correct)}"
+    """Build the action that expands a question's short reference.
+
+    With ``as_message`` the reference is sent as a new message instead of
+    replacing the one with the button.
+    """
+    prefix = REFERENCE_MESSAGE_PREFIX if as_message else REFERENCE_PREFIX
+    callback_data = encode_callback(
+        prefix,
+        QuizCallback(
+            topic, level, question_idx, is_correct=is_correct, version=version
+        ),
+    )
+    text = (
+        f"🔗 Справка к вопросу {question_idx + 1}"
+        if as_message
+        else "🔗 Краткая справка"
+    )
     return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(
-                    text="🔗 Краткая справка", callback_data=callback_data
-                )
-            ]
-        ]
+        inline_keyboard=[[InlineKeyboardButton(text=text, callback_data=callback_data)]]
     )
 
 
@@ -135,31 +192,58 @@ def _build_answered_reference_keyboard(
     level: str,
     question_idx: int,
     is_correct: bool,
+    version: Optional[int] = None,
 ) -> InlineKeyboardMarkup:
     """Mark the selected option and add the reference action below it."""
     answered = _build_answered_keyboard(keyboard, selected_callback_data, is_correct)
     rows = list(answered.inline_keyboard) if answered else []
     rows.extend(
         _build_reference_keyboard(
-            topic, level, question_idx, is_correct
+            topic, level, question_idx, is_correct, version=version
         ).inline_keyboard
     )
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
-@router.callback_query(QuizState.selecting_topic, F.data.startswith("topic:"))
-async def choose_topic(cb: CallbackQuery, state: FSMContext) -> None:
+def _build_question_keyboard(
+    quiz: QuizSession, question: Question
+) -> InlineKeyboardMarkup:
+    """Build the answer buttons of the quiz's current question.
+
+    Each button carries the signed question and quiz nonce, see
+    ``bot.keyboards.callbacks``.
+    """
+    callback = QuizCallback(
+        quiz.topic, quiz.level, quiz.idx, nonce=quiz.nonce or 0, version=quiz.version
+    )
+    keyboard, _ = build_answers_keyboard(
+        question.options,
+        [
+            encode_callback(ANSWER_PREFIX, callback._replace(option=option))
+            for option in range(len(question.options))
+        ],
+    )
+    return keyboard
+
+
+@callback_routes.callback_query(router, TOPIC_PREFIX, QuizState.selecting_topic)
+async def choose_topic(cb: CallbackQuery, state: FSMContext, bot: Bot) -> None:
     """Handle topic selection and start quiz."""
-    topic = cb.data.split(":", 1)[1]
     data = await state.get_data()
     level = data.get("level", "junior")
+    try:
+        topic = decode_choice(cb.data)
+    except ValueError:
+        topic = None
 
-    if topic not in TOPICS or level not in LEVELS:
+    if topic is None or level not in LEVELS:
         await cb.answer("Неизвестная тема или уровень", show_alert=True)
         return
 
-    # Check if there are questions for this topic/level
-    question_count = QuizService.get_question_count(topic, level)
+    # Check if there are questions for this topic/level. The quiz stays on
+    # this content version even if the content is reloaded meanwhile.
+    version = QuizService.get_version()
+    question_count = QuizService.get_question_count(topic, level, version=version)
     if question_count == 0:
         await cb.answer(
             f"Нет вопросов для уровня {get_level_name(level)} в этой теме",
@@ -167,13 +251,17 @@ async def choose_topic(cb: CallbackQuery, state: FSMContext) -> None:
         )
         return
 
-    # Initialize quiz state
-    await state.update_data(topic=topic, level=level, idx=0, score=0, results=[])
+    # Initialize quiz progress
+    quiz = QuizSessionRepository.start(
+        cb.message.chat.id, cb.from_user.id, topic, level, question_count, version
+    )
 
     topics_keyboard = build_topics_keyboard(selected_topic=topic)
     if cb.message.reply_markup != topics_keyboard:
         await cb.message.edit_reply_markup(reply_markup=topics_keyboard)
 
+    # Set once per quiz: answer buttons are checked against the quiz itself
+    await state.set_state(QuizState.answering)
     await cb.message.answer(
         f"📚 *{escape_md(get_topic_name(topic))}*\n"
         f"Уровень: *{get_level_name(level)}*\n"
@@ -182,144 +270,294 @@ async def choose_topic(cb: CallbackQuery, state: FSMContext) -> None:
         parse_mode="MarkdownV2",
     )
 
-    await ask_question(cb.message, state)
+    await ask_question(bot, state, quiz)
     await cb.answer()
 
 
-async def ask_question(msg: Message, state: FSMContext) -> None:
+def _build_poll(question: Question, idx: int, total: int) -> dict | None:
+    """Build sendPoll arguments for a question, or None if it does not fit.
+
+    Polls are plain text with at most 300 characters in the question, 2-10
+    options of at most 100 characters and a 200 character explanation.
+    """
+    text = f"{idx + 1}/{total}. {question.text}"
+    if (
+        len(text) > 300
+        or not 2 <= len(question.options) <= 10
+        or any(len(option) > 100 for option in question.options)
+    ):
+        return None
+    return {
+        "question": text,
+        "options": list(question.options),
+        "type": "quiz",
+        "correct_option_id": question.correct,
+        "is_anonymous": False,
+        "explanation": question.reference[:200] or None,
+        "question_parse_mode": None,
+        "explanation_parse_mode": None,
+    }
+
+
+async def end_outdated_quiz(bot: Bot, state: FSMContext, quiz: QuizSession) -> None:
+    """End a quiz whose content version is no longer kept.
+
+    Its question indices refer to replaced content, so it can be neither
+    scored nor continued against the current questions.
+    """
+    QuizSessionRepository.finish(quiz.chat_id, quiz.user_id)
+    await state.clear()
+    await bot.send_message(
+        quiz.chat_id,
+        "🔄 Вопросы теста обновились, и этот тест нельзя продолжить. "
+        "Начни заново: /start",
+        parse_mode=None,
+    )
+
+
+async def ask_question(bot: Bot, state: FSMContext, quiz: QuizSession) -> None:
     """Send the current question to the user."""
-    data = await state.get_data()
-    topic = data["topic"]
-    level = data["level"]
-    idx = data["idx"]
+    topic = quiz.topic
+    level = quiz.level
+    idx = quiz.idx
+    chat_id = quiz.chat_id
 
-    question = QuizService.get_question(topic, level, idx)
+    if not QuizService.has_version(quiz.version):
+        await end_outdated_quiz(bot, state, quiz)
+        return
+
+    question = QuizService.get_question(topic, level, idx, version=quiz.version)
     if not question:
-        await msg.answer("❗ Ошибка: вопрос не найден. Нажми /start")
+        await bot.send_message(chat_id, "❗ Ошибка: вопрос не найден. Нажми /start")
+        QuizSessionRepository.finish(quiz.chat_id, quiz.user_id)
         await state.clear()
         return
 
-    total = QuizService.get_question_count(topic, level)
-    keyboard, _ = build_answers_keyboard(question["options"], idx)
+    total = QuizService.get_question_count(topic, level, version=quiz.version)
+    poll = _build_poll(question, idx, total) if quiz_poll_mode else None
+    if poll and not question.has_image:
+        # Answers arrive as poll_answer updates, see bot.handlers.quiz_poll
+        sent = await bot.send_poll(chat_id, **poll)
+        QuizSessionRepository.set_poll(quiz.chat_id, quiz.user_id, sent.poll.id)
+        return
 
-    caption = _build_question_text(question, idx, total)
+    keyboard = _build_question_keyboard(quiz, question)
+    caption = question.header
 
     try:
         # Check if question has an image
-        file_id = question.get("file_id")
-        if file_id:
-            await msg.answer_photo(
-                file_id, caption=caption, reply_markup=keyboard, parse_mode="MarkdownV2"
+        if question.image:
+            await ImageService.send_photo(
+                bot,
+                chat_id,
+                question.image,
+                caption=caption,
+                reply_markup=keyboard,
+                parse_mode="MarkdownV2",
+            )
+        elif question.file_id:
+            await bot.send_photo(
+                chat_id,
+                question.file_id,
+                caption=caption,
+                reply_markup=keyboard,
+                parse_mode="MarkdownV2",
             )
         else:
-            await msg.answer(caption, reply_markup=keyboard, parse_mode="MarkdownV2")
-    except TelegramBadRequest as e:
+            await bot.send_message(
+                chat_id, caption, reply_markup=keyboard, parse_mode="MarkdownV2"
+            )
+    except (TelegramBadRequest, OSError) as e:
         logging.warning(f"Error sending question: {e}")
         # Fallback to text only
-        await msg.answer(caption[:4000], reply_markup=keyboard, parse_mode="MarkdownV2")
-
-    await state.set_state(QuizState.answering)
+        await bot.send_message(
+            chat_id, caption[:4000], reply_markup=keyboard, parse_mode="MarkdownV2"
+        )
 
 
-@router.callback_query(QuizState.answering, F.data.startswith("ans:"))
+@callback_routes.callback_query(router, ANSWER_PREFIX)
 async def handle_answer(cb: CallbackQuery, state: FSMContext, bot: Bot) -> None:
-    """Handle user's answer."""
-    # Parse callback data
+    """Handle user's answer.
+
+    The signed callback data names the question and quiz, so the answer is
+    checked without FSM state or data.
+    """
     try:
-        _, qidx_str, opt_str = cb.data.split(":")
-        qidx = int(qidx_str)
-        opt = int(opt_str)
-    except (ValueError, IndexError) as e:
-        logging.error(f"Invalid callback format: {cb.data} - {e}")
+        _, answer = decode_callback(cb.data)
+    except ValueError as e:
+        logging.error("Invalid answer callback: %s", e)
         await cb.answer("❌ Ошибка обработки ответа")
         return
 
-    lock = _get_answer_lock(cb.message.chat.id, cb.from_user.id)
-    async with lock:
-        # Re-read state after acquiring the lock. Another callback may have
-        # already processed this question while this callback was waiting.
-        data = await state.get_data()
-        if qidx != data.get("idx"):
-            await cb.answer("⚠️ Этот вопрос уже пройден", show_alert=True)
-            return
+    topic = answer.topic
+    level = answer.level
+    version = answer.version
+    qidx = answer.idx
+
+    # No lock: the answer is stored only if the quiz is still at this question
+    # in the database, so concurrent clicks in any process score it once.
+    quiz = QuizSessionRepository.get(cb.message.chat.id, cb.from_user.id)
+    if quiz is None or (quiz.nonce or 0) != answer.nonce or qidx != quiz.idx:
+        await cb.answer("⚠️ Этот вопрос уже пройден", show_alert=True)
+        return
+    if not QuizService.has_version(version):
+        await cb.answer()
+        await end_outdated_quiz(bot, state, quiz)
+        return
 
-        topic = data["topic"]
-        level = data["level"]
-        is_correct = QuizService.check_answer(topic, level, qidx, opt)
+    is_correct = QuizService.check_answer(
+        topic, level, qidx, answer.option, version=version
+    )
+    if not QuizSessionRepository.record_answer(quiz, is_correct):
+        await cb.answer("⚠️ Этот вопрос уже пройден", show_alert=True)
+        return
 
-        results = [*data.get("results", [])]
-        results.append({"idx": qidx, "correct": is_correct})
-        next_idx = qidx + 1
-        score = data.get("score", 0) + int(is_correct)
-        await state.update_data(idx=next_idx, score=score, results=results)
+    total = QuizService.get_question_count(topic, level, version=version)
+    if quiz_compact_mode and quiz.idx < total and not cb.message.photo:
+        question = QuizService.get_question(topic, level, quiz.idx, version=version)
+        # A text message cannot be edited into a photo
+        if question and not question.has_image:
+            await _show_next_question_in_place(
+                cb, state, bot, quiz, question, qidx, is_correct
+            )
+            return
 
-        reference_keyboard = _build_answered_reference_keyboard(
-            cb.message.reply_markup,
-            cb.data,
-            topic,
-            level,
-            qidx,
-            is_correct,
-        )
-        answered_text = _build_answered_question_text(topic, level, qidx, is_correct)
+    reference_keyboard = _build_answered_reference_keyboard(
+        cb.message.reply_markup,
+        cb.data,
+        topic,
+        level,
+        qidx,
+        is_correct,
+        version=version,
+    )
+    answered_text = _build_answered_question_text(
+        topic, level, qidx, is_correct, version=version
+    )
+
+    # Editing the answered question, acknowledging the callback and sending
+    # the next message are independent round trips, so they run together.
+    # Only the last one adds a message to the chat, which keeps the order.
+    if quiz.idx >= total:
+        next_step = show_results(bot, state, quiz)
+    else:
+        next_step = ask_question(bot, state, quiz)
+    edited, _, _ = await _run_together(
+        _edit_answered_question(cb.message, answered_text, reference_keyboard),
+        cb.answer("✅ Верно!" if is_correct else "❌ Неверно"),
+        next_step,
+    )
+    if not edited:
+        # Keep the quiz usable if the original message cannot be edited. The
+        # feedback quotes its question, as the next one is already below it.
         try:
-            if cb.message.photo:
-                await cb.message.edit_caption(
-                    caption=answered_text,
-                    reply_markup=reference_keyboard,
-                    parse_mode="MarkdownV2",
-                )
-            else:
-                await cb.message.edit_text(
-                    answered_text,
-                    reply_markup=reference_keyboard,
-                    parse_mode="MarkdownV2",
-                )
+            await cb.message.reply(
+                _build_answer_feedback(topic, level, qidx, is_correct, version=version),
+                reply_markup=_build_reference_keyboard(
+                    topic, level, qidx, is_correct, version=version
+                ),
+                parse_mode="MarkdownV2",
+            )
         except TelegramBadRequest as e:
-            # Keep the quiz usable if the original message cannot be edited.
-            logging.warning("Error adding answer to question message: %s", e)
-            try:
-                await cb.message.answer(
-                    _build_answer_feedback(topic, level, qidx, is_correct),
-                    reply_markup=_build_reference_keyboard(
-                        topic, level, qidx, is_correct
-                    ),
-                    parse_mode="MarkdownV2",
-                )
-            except TelegramBadRequest as fallback_error:
-                logging.warning("Error sending answer fallback: %s", fallback_error)
-
-    # Notify user
-    await cb.answer("✅ Верно!" if is_correct else "❌ Неверно")
-    # Check if quiz is complete
-    total = QuizService.get_question_count(topic, level)
-    if next_idx >= total:
-        await show_results(cb.message, state, bot, cb.from_user.id)
-    else:
-        await ask_question(cb.message, state)
+            logging.warning("Error sending answer fallback: %s", e)
 
 
-@router.callback_query(F.data.startswith("ref:"))
+async def _show_next_question_in_place(
+    cb: CallbackQuery,
+    state: FSMContext,
+    bot: Bot,
+    quiz: QuizSession,
+    question: Question,
+    answered_idx: int,
+    is_correct: bool,
+) -> None:
+    """Compact mode: edit the quiz message into the answer and next question.
+
+    The answer to the previous question is revealed above the next one, and
+    its reference can be opened from a button below the options. This takes
+    one edit per answer instead of an edit and a new message.
+    """
+    feedback = _build_answer_feedback(
+        quiz.topic, quiz.level, answered_idx, is_correct, version=quiz.version
+    )
+    answers_keyboard = _build_question_keyboard(quiz, question)
+    reference_keyboard = _build_reference_keyboard(
+        quiz.topic,
+        quiz.level,
+        answered_idx,
+        is_correct,
+        as_message=True,
+        version=quiz.version,
+    )
+    keyboard = InlineKeyboardMarkup(
+        inline_keyboard=answers_keyboard.inline_keyboard
+        + reference_keyboard.inline_keyboard
+    )
+    text = f"_Вопрос {answered_idx + 1}:_ {feedback}\n\n{question.header}"
+
+    edited, _ = await _run_together(
+        _edit_answered_question(cb.message, text, keyboard),
+        cb.answer("✅ Верно!" if is_correct else "❌ Неверно"),
+    )
+    if not edited:
+        await ask_question(bot, state, quiz)
+
+
+async def _run_together(*calls: Awaitable[Any]) -> list[Any]:
+    """Await calls concurrently; re-raise the first error once all finished."""
+    results = await asyncio.gather(*calls, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
+
+
+async def _edit_answered_question(
+    msg: Message, text: str, keyboard: InlineKeyboardMarkup
+) -> bool:
+    """Show the answer in the question message. Returns False if it failed."""
+    try:
+        if msg.photo:
+            await msg.edit_caption(
+                caption=text, reply_markup=keyboard, parse_mode="MarkdownV2"
+            )
+        else:
+            await msg.edit_text(text, reply_markup=keyboard, parse_mode="MarkdownV2")
+    except TelegramBadRequest as e:
+        logging.warning("Error adding answer to question message: %s", e)
+        return False
+    return True
+
+
+@callback_routes.callback_query(router, REFERENCE_PREFIX)
+@callback_routes.callback_query(router, REFERENCE_MESSAGE_PREFIX)
 async def show_reference(cb: CallbackQuery) -> None:
     """Expand the short reference below an answer."""
     try:
-        _, topic, level, qidx_str, correct_str = cb.data.split(":")
-        qidx = int(qidx_str)
-        is_correct = bool(int(correct_str))
-    except (AttributeError, ValueError) as e:
-        logging.error("Invalid reference callback: %s - %s", cb.data, e)
+        prefix, reference = decode_callback(cb.data)
+    except ValueError as e:
+        logging.error("Invalid reference callback: %s", e)
         await cb.answer("❌ Справка недоступна", show_alert=True)
         return
 
-    if not QuizService.get_question(topic, level, qidx):
+    topic, level, qidx = reference.topic, reference.level, reference.idx
+    if not QuizService.get_question(topic, level, qidx, version=reference.version):
         await cb.answer("❌ Справка недоступна", show_alert=True)
         return
 
     try:
         expanded_text = _build_answered_question_text(
-            topic, level, qidx, is_correct, include_reference=True
+            topic,
+            level,
+            qidx,
+            reference.is_correct,
+            include_reference=True,
+            version=reference.version,
         )
-        if cb.message.photo:
+        if prefix == REFERENCE_MESSAGE_PREFIX:
+            # The button is below a compact quiz message that must stay as is
+            await cb.message.answer(expanded_text, parse_mode="MarkdownV2")
+        elif cb.message.photo:
             await cb.message.edit_caption(
                 caption=expanded_text,
                 reply_markup=None,
@@ -339,55 +577,111 @@ async def show_reference(cb: CallbackQuery) -> None:
     await cb.answer()
 
 
-async def show_results(msg: Message, state: FSMContext, bot: Bot, user_id: int) -> None:
-    """Show quiz results."""
-    data = await state.get_data()
-    topic = data["topic"]
-    level = data["level"]
-    score = data["score"]
-    results = data["results"]
+def _build_results_page(
+    report: QuizReport, page: int
+) -> tuple[str, InlineKeyboardMarkup]:
+    """Render one page of a results message and its keyboard.
 
-    # Update user's total scores
-    UserService.add_quiz_result(user_id, level, score, len(results))
+    Only the questions of the page are looked up, so opening a page costs
+    the same however long the quiz was.
+    """
+    topic, level, version = report.topic, report.level, report.version
+    total = report.total
+    pages = max(1, -(-total // RESULTS_PER_PAGE))
 
-    # Update pinned score message
-    await UserService.update_pinned_score(bot, user_id, msg.chat.id)
-
-    # Build detailed results
+    text = (
+        f"🏁 *Тест завершён\\!*\n\n"
+        f"📚 Тема: *{escape_md(get_topic_name(topic))}*\n"
+        f"📊 Уровень: *{get_level_name(level)}*\n"
+        f"✨ Результат: *{report.score}* из *{total}*\n\n"
+    )
     lines = []
-    for i, item in enumerate(results):
-        question = QuizService.get_question(topic, level, item["idx"])
+    first = page * RESULTS_PER_PAGE
+    for i in range(first, min(first + RESULTS_PER_PAGE, total)):
+        question = QuizService.get_question(topic, level, i, version=version)
         if question:
-            mark = "✅" if item["correct"] else "❌"
-            correct_answer = QuizService.get_correct_answer(topic, level, item["idx"])
-            q_text = question["question"].splitlines()[0][:50]
+            mark = "✅" if report.is_correct(i) else "❌"
+            answer = (question.correct_answer or "N/A")[:MAX_RESULT_ANSWER_LENGTH]
             lines.append(
-                f"{mark} *Вопрос {i + 1}:* {escape_md(q_text)}\n"
-                f"   _Ответ: {escape_md(correct_answer or 'N/A')}_"
+                f"{mark} *Вопрос {i + 1}:* {escape_md(question.summary)}\n"
+                f"   _Ответ: {escape_md(answer)}_"
+            )
+    text += "\n\n".join(lines)
+    if pages > 1:
+        text += f"\n\n_Страница {page + 1} из {pages}_"
+
+    keyboard = build_restart_keyboard()
+    navigation = []
+    for target, label in ((page - 1, "◀️ Назад"), (page + 1, "Вперёд ▶️")):
+        if 0 <= target < pages:
+            callback = QuizCallback(
+                topic, level, target, nonce=report.nonce or 0, version=version
+            )
+            navigation.append(
+                InlineKeyboardButton(
+                    text=label,
+                    callback_data=encode_callback(RESULTS_PAGE_PREFIX, callback),
+                )
             )
+    if navigation:
+        keyboard = InlineKeyboardMarkup(
+            inline_keyboard=[navigation, *keyboard.inline_keyboard]
+        )
+    return text, keyboard
 
-    result_text = (
-        f"🏁 *Тест завершён\\!*\n\n"
-        f"📚 Тема: *{escape_md(get_topic_name(topic))}*\n"
-        f"📊 Уровень: *{get_level_name(level)}*\n"
-        f"✨ Результат: *{score}* из *{len(results)}*\n\n"
-    )
 
-    # Add detailed results if not too long
-    if len(results) <= 20:
-        result_text += "\n\n".join(lines)
+async def show_results(bot: Bot, state: FSMContext, quiz: QuizSession) -> None:
+    """Show quiz results.
 
-    await msg.answer(
-        result_text, reply_markup=build_restart_keyboard(), parse_mode="MarkdownV2"
-    )
+    The first page is sent; the rest are rendered when the user opens them,
+    from the report kept by ``QuizReportRepository``.
+    """
+    user_id = quiz.user_id
+
+    # Update user's total scores
+    UserService.add_quiz_result(user_id, quiz.level, quiz.score, quiz.idx)
+
+    # Update pinned score message
+    UserService.schedule_pinned_score(bot, user_id, quiz.chat_id)
+
+    # Drop finished quiz progress; the level stays in FSM data
+    report = QuizReportRepository.save(quiz)
+    QuizSessionRepository.finish(quiz.chat_id, user_id)
 
-    # Clear quiz-specific state but keep level
-    await state.update_data(topic=None, idx=0, score=0, results=[])
+    text, keyboard = _build_results_page(report, 0)
+    await bot.send_message(
+        quiz.chat_id, text, reply_markup=keyboard, parse_mode="MarkdownV2"
+    )
     await state.set_state(QuizState.selecting_topic)
 
 
-@router.callback_query(F.data.startswith("topic:"))
-async def handle_topic_without_state(cb: CallbackQuery, state: FSMContext) -> None:
+@callback_routes.callback_query(router, RESULTS_PAGE_PREFIX)
+async def show_results_page(cb: CallbackQuery) -> None:
+    """Turn a results message to another page."""
+    try:
+        _, page = decode_callback(cb.data)
+    except ValueError as e:
+        logging.error("Invalid results page callback: %s", e)
+        await cb.answer("❌ Ошибка обработки ответа")
+        return
+
+    report = QuizReportRepository.get(cb.message.chat.id, cb.from_user.id)
+    if report is None or (report.nonce or 0) != page.nonce:
+        await cb.answer("⚠️ Эти результаты больше недоступны", show_alert=True)
+        return
+
+    text, keyboard = _build_results_page(report, page.idx)
+    try:
+        await cb.message.edit_text(text, reply_markup=keyboard, parse_mode="MarkdownV2")
+    except TelegramBadRequest as e:
+        logging.warning("Error showing results page: %s", e)
+    await cb.answer()
+
+
+@callback_routes.callback_query(router, TOPIC_PREFIX)
+async def handle_topic_without_state(
+    cb: CallbackQuery, state: FSMContext, bot: Bot
+) -> None:
     """Handle topic selection when not in selecting_topic state."""
     data = await state.get_data()
     level = data.get("level")
@@ -404,4 +698,4 @@ async def handle_topic_without_state(cb: CallbackQuery, state: FSMContext) -> No
 
     # Set state and process
     await state.set_state(QuizState.selecting_topic)
-    await choose_topic(cb, state)
+    await choose_topic(cb, state, bot)
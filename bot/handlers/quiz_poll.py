@@ -0,0 +1,144 @@
+import asyncio
+import contextvars
+import logging
+from typing import Optional
+
+from aiogram import Bot, Router
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+from aiogram.types import PollAnswer
+
+from bot.config import poll_batch_interval_ms, poll_batch_size
+from bot.db.models import QuizSession
+from bot.db.repository import QuizSessionRepository
+from bot.handlers.quiz import ask_question, end_outdated_quiz, show_results
+from bot.services.quiz_service import QuizService
+
+router = Router()
+logger = logging.getLogger(__name__)
+
+
+class PollAnswerBatcher:
+    """Scores quiz poll answers in batches.
+
+    The poll already showed the user whether the answer was right, so nothing
+    waits for the score. Answers are collected for ``interval`` seconds or
+    until ``batch_size`` arrive, then looked up by poll id and recorded in one
+    transaction each. The next questions are sent concurrently.
+    """
+
+    def __init__(self, interval: float, batch_size: int) -> None:
+        self.interval = interval
+        self.batch_size = batch_size
+        self._answers: list[tuple[PollAnswer, Bot, BaseStorage]] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.recorded = 0
+
+    def add(self, answer: PollAnswer, bot: Bot, storage: BaseStorage) -> None:
+        self._answers.append((answer, bot, storage))
+        if len(self._answers) >= self.batch_size:
+            self._wakeup.set()
+        if self._task is None or self._task.done():
+            # Not in the context of the update that started the task, so
+            # answers are not tied to that update's FSM scope
+            self._task = asyncio.create_task(self._run(), context=contextvars.Context())
+
+    async def _run(self) -> None:
+        while self._answers:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.process(self._take())
+            except Exception:
+                logger.exception("Failed to process poll answers")
+
+    def _take(self) -> list[tuple[PollAnswer, Bot, BaseStorage]]:
+        batch = self._answers[: self.batch_size]
+        del self._answers[: self.batch_size]
+        return batch
+
+    async def flush(self) -> None:
+        """Process all collected answers now."""
+        while self._answers:
+            await self.process(self._take())
+
+    async def process(self, batch: list[tuple[PollAnswer, Bot, BaseStorage]]) -> None:
+        """Record a batch of answers and move each quiz to its next question."""
+        quizzes = QuizSessionRepository.get_by_polls(
+            [answer.poll_id for answer, _, _ in batch]
+        )
+        answers, targets, outdated = [], [], []
+        for answer, bot, storage in batch:
+            # The owner's first answer to a poll wins; quiz polls cannot be
+            # re-voted. Votes of other members of a group are ignored.
+            quiz = quizzes.get(answer.poll_id)
+            if quiz is None or answer.user is None or quiz.user_id != answer.user.id:
+                continue
+            del quizzes[answer.poll_id]
+            if not QuizService.has_version(quiz.version):
+                outdated.append((quiz, bot, storage))
+                continue
+            option = answer.option_ids[0] if answer.option_ids else -1
+            is_correct = QuizService.check_answer(
+                quiz.topic, quiz.level, quiz.idx, option, version=quiz.version
+            )
+            answers.append((quiz, is_correct))
+            targets.append((quiz, bot, storage))
+
+        recorded = QuizSessionRepository.record_answers(answers)
+        self.batches += 1
+        self.recorded += sum(recorded)
+
+        results = await asyncio.gather(
+            *(
+                _advance(quiz, bot, storage)
+                for (quiz, bot, storage), stored in zip(targets, recorded)
+                if stored
+            ),
+            *(_end(quiz, bot, storage) for quiz, bot, storage in outdated),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.error("Failed to send the next quiz question: %s", result)
+
+
+def _state(quiz: QuizSession, bot: Bot, storage: BaseStorage) -> FSMContext:
+    return FSMContext(
+        storage=storage,
+        key=StorageKey(bot_id=bot.id, chat_id=quiz.chat_id, user_id=quiz.user_id),
+    )
+
+
+async def _end(quiz: QuizSession, bot: Bot, storage: BaseStorage) -> None:
+    await end_outdated_quiz(bot, _state(quiz, bot, storage), quiz)
+
+
+async def _advance(quiz: QuizSession, bot: Bot, storage: BaseStorage) -> None:
+    state = _state(quiz, bot, storage)
+    total = QuizService.get_question_count(quiz.topic, quiz.level, version=quiz.version)
+    if quiz.idx >= total:
+        await show_results(bot, state, quiz)
+    else:
+        await ask_question(bot, state, quiz)
+
+
+_poll_answers = PollAnswerBatcher(poll_batch_interval_ms / 1000, poll_batch_size)
+
+
+@router.poll_answer()
+async def handle_poll_answer(
+    poll_answer: PollAnswer, bot: Bot, fsm_storage: BaseStorage
+) -> None:
+    """Queue an answer to a quiz poll for batch scoring."""
+    _poll_answers.add(poll_answer, bot, fsm_storage)
+
+
+async def flush_poll_answers() -> None:
+    """Score poll answers that are still queued."""
+    await _poll_answers.flush()
@@ -0,0 +1,4 @@
+from bot.middlewares import CallbackRouter
+
+# Callback query handlers of all routers, by callback data prefix
+callback_routes = CallbackRouter()
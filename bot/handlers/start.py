@@ -1,11 +1,19 @@
-from aiogram import Router, F, Bot
+from aiogram import Router, Bot
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, CallbackQuery
 
 from bot.states import QuizState
-from bot.keyboards import build_level_keyboard, build_topics_keyboard
-from bot.keyboards.builders import LEVELS, get_level_name
+from bot.handlers.routes import callback_routes
+from bot.keyboards import (
+    LEVEL_MENU,
+    LEVEL_PREFIX,
+    TOPIC_MENU,
+    build_level_keyboard,
+    build_topics_keyboard,
+    decode_choice,
+)
+from bot.keyboards.builders import get_level_name
 from bot.services.user_service import UserService, escape_md
 from bot.db.repository import UserRepository
 
@@ -98,11 +106,12 @@ async def process_name(msg: Message, state: FSMContext) -> None:
     await state.set_state(QuizState.selecting_level)
 
 
-@router.callback_query(QuizState.selecting_level, F.data.startswith("level:"))
+@callback_routes.callback_query(router, LEVEL_PREFIX, QuizState.selecting_level)
 async def process_level(cb: CallbackQuery, state: FSMContext, bot: Bot) -> None:
     """Process level selection."""
-    level = cb.data.split(":", 1)[1]
-    if level not in LEVELS:
+    try:
+        level = decode_choice(cb.data)
+    except ValueError:
         await cb.answer("Неизвестный уровень", show_alert=True)
         return
 
@@ -110,7 +119,7 @@ async def process_level(cb: CallbackQuery, state: FSMContext, bot: Bot) -> None:
     UserService.set_level(cb.from_user.id, level)
 
     # Update pinned score message
-    await UserService.update_pinned_score(bot, cb.from_user.id, cb.message.chat.id)
+    UserService.schedule_pinned_score(bot, cb.from_user.id, cb.message.chat.id)
 
     await cb.message.edit_text(
         f"Уровень: *{get_level_name(level)}* ✅\n\n" "Теперь выбери тему:",
@@ -122,7 +131,7 @@ async def process_level(cb: CallbackQuery, state: FSMContext, bot: Bot) -> None:
     await cb.answer()
 
 
-@router.callback_query(F.data == "select_level")
+@callback_routes.callback_query(router, LEVEL_MENU, exact=True)
 async def select_level_again(cb: CallbackQuery, state: FSMContext) -> None:
     """Handle request to change level."""
     await cb.message.edit_text(
@@ -132,7 +141,7 @@ async def select_level_again(cb: CallbackQuery, state: FSMContext) -> None:
     await cb.answer()
 
 
-@router.callback_query(F.data == "select_topic")
+@callback_routes.callback_query(router, TOPIC_MENU, exact=True)
 async def select_topic_again(cb: CallbackQuery, state: FSMContext) -> None:
     """Handle request to select another topic."""
     data = await state.get_data()
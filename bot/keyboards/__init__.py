@@ -5,6 +5,22 @@ from bot.keyboards.builders import (
     build_restart_keyboard,
     build_feedback_keyboard,
 )
+from bot.keyboards.callbacks import (
+    ANSWER_PREFIX,
+    FEEDBACK,
+    LEVEL_MENU,
+    LEVEL_PREFIX,
+    REFERENCE_MESSAGE_PREFIX,
+    REFERENCE_PREFIX,
+    RESULTS_PAGE_PREFIX,
+    TOPIC_MENU,
+    TOPIC_PREFIX,
+    QuizCallback,
+    decode_callback,
+    decode_choice,
+    encode_callback,
+    encode_choice,
+)
 
 __all__ = [
     "build_level_keyboard",
@@ -12,4 +28,18 @@ __all__ = [
     "build_answers_keyboard",
     "build_restart_keyboard",
     "build_feedback_keyboard",
+    "ANSWER_PREFIX",
+    "FEEDBACK",
+    "LEVEL_MENU",
+    "LEVEL_PREFIX",
+    "REFERENCE_MESSAGE_PREFIX",
+    "REFERENCE_PREFIX",
+    "RESULTS_PAGE_PREFIX",
+    "TOPIC_MENU",
+    "TOPIC_PREFIX",
+    "QuizCallback",
+    "decode_callback",
+    "decode_choice",
+    "encode_callback",
+    "encode_choice",
 ]
@@ -1,31 +1,26 @@
 import random
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
-# Level display names
-LEVELS = {
-    "junior": "Junior",
-    "middle": "Middle",
-    "senior": "Senior",
-}
-
-# Topic display names (Russian)
-TOPICS = {
-    "file_systems": "Файловые системы",
-    "permissions": "Права и пользователи",
-    "processes": "Процессы",
-    "resources": "Системные ресурсы",
-    "systemd": "Сервисы (systemd)",
-    "networking": "Сети",
-    "boot": "Загрузка ОС",
-    "bash": "Bash и автоматизация",
-}
+from bot.keyboards.callbacks import (
+    FEEDBACK,
+    LEVEL_MENU,
+    LEVEL_PREFIX,
+    TOPIC_MENU,
+    TOPIC_PREFIX,
+    encode_choice,
+)
+from bot.keyboards.names import LEVELS, TOPICS
 
 
 def build_level_keyboard() -> InlineKeyboardMarkup:
     """Build keyboard for level selection."""
     return InlineKeyboardMarkup(
         inline_keyboard=[
-            [InlineKeyboardButton(text=name, callback_data=f"level:{key}")]
+            [
+                InlineKeyboardButton(
+                    text=name, callback_data=encode_choice(LEVEL_PREFIX, key)
+                )
+            ]
             for key, name in LEVELS.items()
         ]
     )
@@ -38,7 +33,7 @@ def build_topics_keyboard(selected_topic: str | None = None) -> InlineKeyboardMa
             [
                 InlineKeyboardButton(
                     text=f"👀 {name}" if key == selected_topic else name,
-                    callback_data=f"topic:{key}",
+                    callback_data=encode_choice(TOPIC_PREFIX, key),
                 )
             ]
             for key, name in TOPICS.items()
@@ -47,10 +42,10 @@ def build_topics_keyboard(selected_topic: str | None = None) -> InlineKeyboardMa
 
 
 def build_answers_keyboard(
-    options: list[str], question_idx: int, shuffle: bool = True
+    options: list[str], callback_data: list[str], shuffle: bool = True
 ) -> tuple[InlineKeyboardMarkup, list[int]]:
     """
-    Build keyboard for answer options.
+    Build keyboard for answer options; ``callback_data[i]`` belongs to option i.
 
     Returns:
         tuple: (keyboard, order) where order maps display position to original index
@@ -61,11 +56,7 @@ def build_answers_keyboard(
 
     keyboard = InlineKeyboardMarkup(
         inline_keyboard=[
-            [
-                InlineKeyboardButton(
-                    text=options[i], callback_data=f"ans:{question_idx}:{i}"
-                )
-            ]
+            [InlineKeyboardButton(text=options[i], callback_data=callback_data[i])]
             for i in indices
         ]
     )
@@ -75,12 +66,12 @@ def build_answers_keyboard(
 def build_restart_keyboard(include_feedback: bool = True) -> InlineKeyboardMarkup:
     """Build keyboard for restart/continue options."""
     buttons = [
-        [InlineKeyboardButton(text="Выбрать тему", callback_data="select_topic")],
-        [InlineKeyboardButton(text="Сменить уровень", callback_data="select_level")],
+        [InlineKeyboardButton(text="Выбрать тему", callback_data=TOPIC_MENU)],
+        [InlineKeyboardButton(text="Сменить уровень", callback_data=LEVEL_MENU)],
     ]
     if include_feedback:
         buttons.append(
-            [InlineKeyboardButton(text="Оставить отзыв", callback_data="feedback")]
+            [InlineKeyboardButton(text="Оставить отзыв", callback_data=FEEDBACK)]
         )
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
@@ -89,7 +80,7 @@ def build_feedback_keyboard() -> InlineKeyboardMarkup:
     """Build keyboard with feedback button."""
     return InlineKeyboardMarkup(
         inline_keyboard=[
-            [InlineKeyboardButton(text="Оставить отзыв", callback_data="feedback")]
+            [InlineKeyboardButton(text="Оставить отзыв", callback_data=FEEDBACK)]
         ]
     )
 
@@ -0,0 +1,128 @@
+"""Callback data of the bot's buttons.
+
+The first character of callback data names the action, so callback queries
+can be routed with one lookup, see ``bot.middlewares.CallbackRouter``:
+
+    A  answer               R  reference        M  reference as a message
+    P  results page
+    T  topic + topic id     L  level + level id
+    t  topic menu           l  level menu       f  feedback
+
+Topic and level ids are positions in ``TOPICS`` and ``LEVELS``. Answer and
+reference buttons carry the question they belong to, so their handlers need
+no FSM data:
+
+    <prefix><base64url(fields + signature)>
+
+``fields`` are the topic and level ids, the question index, the chosen
+option, whether the answer was correct, the quiz nonce and the content
+version. The signature is a truncated HMAC-SHA256 of the prefix and fields,
+so a client cannot forge progress or answers. The result is 36 bytes, within
+Telegram's limit of 64.
+"""
+
+import base64
+import hashlib
+import hmac
+import struct
+from typing import NamedTuple, Optional
+
+from bot.config import callback_secret
+from bot.keyboards.names import LEVELS, TOPICS
+
+ANSWER_PREFIX = "A"
+REFERENCE_PREFIX = "R"
+# Reference below a compact quiz message, sent as a new message
+REFERENCE_MESSAGE_PREFIX = "M"
+RESULTS_PAGE_PREFIX = "P"
+TOPIC_PREFIX = "T"
+LEVEL_PREFIX = "L"
+TOPIC_MENU = "t"
+LEVEL_MENU = "l"
+FEEDBACK = "f"
+
+_FIELDS = struct.Struct("<BBHB?IQ")
+_SIGNATURE_SIZE = 8
+_KEY = hashlib.sha256(b"callback-data:" + callback_secret.encode("utf-8")).digest()
+
+_TOPIC_KEYS = list(TOPICS)
+_LEVEL_KEYS = list(LEVELS)
+_CHOICES = {TOPIC_PREFIX: _TOPIC_KEYS, LEVEL_PREFIX: _LEVEL_KEYS}
+
+
+class QuizCallback(NamedTuple):
+    """Question a quiz button belongs to."""
+
+    topic: str
+    level: str
+    idx: int
+    option: int = 0
+    is_correct: bool = False
+    # Random number of the quiz the question was sent in
+    nonce: int = 0
+    version: Optional[int] = None
+
+
+def _sign(prefix: str, fields: bytes) -> bytes:
+    return hmac.new(_KEY, prefix.encode() + fields, hashlib.sha256).digest()[
+        :_SIGNATURE_SIZE
+    ]
+
+
+def encode_callback(prefix: str, callback: QuizCallback) -> str:
+    """Encode and sign callback data. Raises ValueError for unknown topics."""
+    fields = _FIELDS.pack(
+        _TOPIC_KEYS.index(callback.topic),
+        _LEVEL_KEYS.index(callback.level),
+        callback.idx,
+        callback.option,
+        callback.is_correct,
+        callback.nonce,
+        callback.version or 0,
+    )
+    payload = base64.urlsafe_b64encode(fields + _sign(prefix, fields))
+    return prefix + payload.rstrip(b"=").decode("ascii")
+
+
+def decode_callback(data: str) -> tuple[str, QuizCallback]:
+    """Verify and decode callback data into its prefix and fields.
+
+    Raises ValueError if the data is malformed or its signature is wrong.
+    """
+    prefix, payload = data[:1], data[1:]
+    try:
+        raw = base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Malformed callback data: {data!r}") from e
+    if len(raw) != _FIELDS.size + _SIGNATURE_SIZE:
+        raise ValueError(f"Malformed callback data: {data!r}")
+
+    fields, signature = raw[: _FIELDS.size], raw[_FIELDS.size :]  # noqa: E203
+    if not hmac.compare_digest(signature, _sign(prefix, fields)):
+        raise ValueError(f"Bad callback data signature: {data!r}")
+
+    topic, level, idx, option, is_correct, nonce, version = _FIELDS.unpack(fields)
+    if topic >= len(_TOPIC_KEYS) or level >= len(_LEVEL_KEYS):
+        raise ValueError(f"Unknown topic or level in callback data: {data!r}")
+    return prefix, QuizCallback(
+        _TOPIC_KEYS[topic],
+        _LEVEL_KEYS[level],
+        idx,
+        option,
+        is_correct,
+        nonce,
+        version or None,
+    )
+
+
+def encode_choice(prefix: str, key: str) -> str:
+    """Encode a topic or level button. Raises ValueError for unknown keys."""
+    return prefix + str(_CHOICES[prefix].index(key))
+
+
+def decode_choice(data: str) -> str:
+    """Get the topic or level key of a button. Raises ValueError if unknown."""
+    keys = _CHOICES.get(data[:1])
+    if keys is None or not data[1:].isdigit() or int(data[1:]) >= len(keys):
+        raise ValueError(f"Unknown choice in callback data: {data!r}")
+    return keys[int(data[1:])]
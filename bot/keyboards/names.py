@@ -0,0 +1,24 @@
+"""Display names of quiz levels and topics, in menu order.
+
+Callback data refers to levels and topics by position, so new entries are
+added at the end.
+"""
+
+# Level display names
+LEVELS = {
+    "junior": "Junior",
+    "middle": "Middle",
+    "senior": "Senior",
+}
+
+# Topic display names (Russian)
+TOPICS = {
+    "file_systems": "Файловые системы",
+    "permissions": "Права и пользователи",
+    "processes": "Процессы",
+    "resources": "Системные ресурсы",
+    "systemd": "Сервисы (systemd)",
+    "networking": "Сети",
+    "boot": "Загрузка ОС",
+    "bash": "Bash и автоматизация",
+}
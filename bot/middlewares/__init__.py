@@ -0,0 +1,14 @@
+from bot.middlewares.callback_router import CallbackRouter
+from bot.middlewares.fsm_scope import FSMScopeMiddleware
+from bot.middlewares.rate_limit import RateLimitMiddleware, low_priority
+from bot.middlewares.scheduler import UpdateScheduler
+from bot.middlewares.throttle import CallbackThrottleMiddleware
+
+__all__ = [
+    "CallbackRouter",
+    "CallbackThrottleMiddleware",
+    "FSMScopeMiddleware",
+    "RateLimitMiddleware",
+    "low_priority",
+    "UpdateScheduler",
+]
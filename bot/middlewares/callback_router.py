@@ -0,0 +1,73 @@
+from typing import Any, Awaitable, Callable, Optional
+
+from aiogram import BaseMiddleware, F, Router
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.fsm.state import State
+from aiogram.types import CallbackQuery, TelegramObject
+
+
+class CallbackRouter(BaseMiddleware):
+    """Dispatch callback queries by the first character of their data.
+
+    Handlers are registered with ``callback_query()``, which also adds them
+    to an aiogram router with the equivalent filters. As an outer middleware
+    of ``dp.callback_query`` it finds the handlers for a prefix with one dict
+    lookup and calls the first whose state matches, without evaluating the
+    filters of every router. Queries it has no handler for continue through
+    the routers, ending at the fallback router.
+    """
+
+    def __init__(self) -> None:
+        # prefix -> (state, whether data must equal the prefix, handler)
+        self._routes: dict[str, list[tuple[Optional[str], bool, HandlerObject]]] = {}
+        self.routed = 0
+        self.passed = 0
+
+    def callback_query(
+        self,
+        router: Router,
+        prefix: str,
+        state: Optional[State] = None,
+        exact: bool = False,
+    ) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """Register a handler for callback data starting with ``prefix``.
+
+        With ``exact``, the data must be the prefix alone, as on buttons
+        without fields. Handlers of one prefix are tried in registration
+        order.
+        """
+
+        def register(callback: Callable[..., Any]) -> Callable[..., Any]:
+            filters = [F.data == prefix if exact else F.data.startswith(prefix)]
+            if state is not None:
+                filters.insert(0, state)
+            router.callback_query(*filters)(callback)
+            self._routes.setdefault(prefix, []).append(
+                (
+                    state.state if state is not None else None,
+                    exact,
+                    HandlerObject(callback),
+                )
+            )
+            return callback
+
+        return register
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: CallbackQuery,
+        data: dict[str, Any],
+    ) -> Any:
+        prefix = event.data[:1] if event.data else ""
+        routes = self._routes.get(prefix)
+        if routes:
+            raw_state = data.get("raw_state")
+            for state, exact, route in routes:
+                if exact and event.data != prefix:
+                    continue
+                if state is None or state == raw_state:
+                    self.routed += 1
+                    return await route.call(event, **{**data, "handler": route})
+        self.passed += 1
+        return await handler(event, data)
@@ -0,0 +1,36 @@
+import logging
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from bot.db.fsm_storage import SQLiteStorage
+
+logger = logging.getLogger(__name__)
+
+
+class FSMScopeMiddleware(BaseMiddleware):
+    """Load and write each FSM record at most once per update.
+
+    Must be registered before aiogram's FSM middleware so the state it reads
+    for filters comes from the same cached record as the handlers' reads.
+    """
+
+    def __init__(self, storage: SQLiteStorage) -> None:
+        self.storage = storage
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        async with self.storage.update_scope() as scope:
+            result = await handler(event, data)
+        logger.debug(
+            "FSM queries for update %s: %d select(s), %d upsert(s)",
+            getattr(event, "update_id", None),
+            scope.selects,
+            scope.upserts,
+        )
+        return result
@@ -0,0 +1,210 @@
+import asyncio
+import contextlib
+import heapq
+import itertools
+import logging
+import time
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional, Union
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+_priority: ContextVar[int] = ContextVar(
+    "telegram_request_priority", default=INTERACTIVE
+)
+
+
+@contextlib.contextmanager
+def low_priority() -> Iterator[None]:
+    """Send the Telegram requests made inside the block after interactive ones.
+
+    Tasks created inside the block inherit the priority.
+    """
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class _Gate:
+    """Token bucket whose waiters are released in priority, then FIFO order."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        clock: Callable[[], float],
+        on_queue: Callable[[int], None],
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._on_queue = on_queue
+        self._tokens = burst
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._pump: Optional[asyncio.Task] = None
+
+    @property
+    def idle(self) -> bool:
+        self._refill()
+        return not self._waiters and self._tokens >= self.burst
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _delay(self) -> float:
+        """Seconds until a token is available, or 0 after taking one."""
+        self._refill()
+        blocked = self._blocked_until - self._clock()
+        if blocked > 0:
+            return blocked
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def block(self, seconds: float) -> None:
+        """Hold every waiter back, e.g. for a RetryAfter from Telegram."""
+        self._blocked_until = max(self._blocked_until, self._clock() + seconds)
+        self._tokens = 0.0
+
+    async def acquire(self, priority: int, seq: int) -> bool:
+        """Take a token, waiting if needed. Returns True if the caller waited."""
+        if not self._waiters and self._delay() == 0:
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, seq, future))
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.create_task(self._release_waiters())
+        self._on_queue(1)
+        try:
+            await future
+        finally:
+            self._on_queue(-1)
+        return True
+
+    async def _release_waiters(self) -> None:
+        while self._waiters:
+            delay = self._delay()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                # The waiter was cancelled; give its token to the next one.
+                self._tokens += 1
+                continue
+            future.set_result(None)
+
+
+class RateLimitMiddleware(BaseRequestMiddleware):
+    """Pace outgoing Telegram requests to stay within the Bot API limits.
+
+    Requests addressed to a chat take a token from that chat's bucket and then
+    from the global bucket. Waiting requests are released interactive first,
+    then in arrival order; use ``low_priority()`` for background updates.
+    A ``TelegramRetryAfter`` blocks the chat for the given time and the request
+    is queued again ahead of later ones, up to ``max_retries`` times.
+    Requests without a chat, such as answerCallbackQuery, are not delayed.
+
+    Registered on the bot session: ``bot.session.middleware(limiter)``.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30,
+        chat_rate: float = 1,
+        chat_burst: float = 3,
+        max_retries: int = 3,
+        max_idle_chats: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.max_idle_chats = max_idle_chats
+        self._clock = clock
+        self._global = _Gate(global_rate, global_rate, clock, self._count_queued)
+        self._chats: dict[Union[int, str], _Gate] = {}
+        self._seq = itertools.count()
+        self.sent = 0
+        self.delayed = 0
+        self.retries = 0
+        self.queued = 0
+        self.max_queue = 0
+
+    def _count_queued(self, delta: int) -> None:
+        self.queued += delta
+        self.max_queue = max(self.max_queue, self.queued)
+
+    def _chat_gate(self, chat_id: Union[int, str]) -> _Gate:
+        gate = self._chats.get(chat_id)
+        if gate is None:
+            if len(self._chats) >= self.max_idle_chats:
+                self._chats = {
+                    key: value for key, value in self._chats.items() if not value.idle
+                }
+            gate = self._chats[chat_id] = _Gate(
+                self.chat_rate, self.chat_burst, self._clock, self._count_queued
+            )
+        return gate
+
+    def stats(self) -> dict[str, int]:
+        """Return request counters and the current and peak queue depth."""
+        return {
+            "sent": self.sent,
+            "delayed": self.delayed,
+            "retries": self.retries,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+        }
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        gate = self._chat_gate(chat_id)
+        priority = _priority.get()
+        seq = next(self._seq)
+        for attempt in itertools.count():
+            waited = await gate.acquire(priority, seq)
+            if await self._global.acquire(priority, seq) or waited:
+                self.delayed += 1
+            try:
+                response = await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                if attempt >= self.max_retries:
+                    raise
+                self.retries += 1
+                gate.block(e.retry_after)
+                logger.warning(
+                    f"Flood control in chat {chat_id}, retrying "
+                    f"{type(method).__name__} in {e.retry_after}s"
+                )
+                continue
+            self.sent += 1
+            return response
@@ -0,0 +1,194 @@
+import asyncio
+import inspect
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional, Union
+
+from aiogram import BaseMiddleware, Router
+from aiogram.dispatcher.middlewares.error import ErrorsMiddleware
+from aiogram.types import TelegramObject
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateScheduler(BaseMiddleware):
+    """Run updates with bounded concurrency, one at a time per user.
+
+    Registered as an outer middleware of ``dp.update`` ahead of the FSM
+    middlewares: the rest of the update's processing is queued and the
+    middleware returns. At most ``concurrency`` updates run at once; updates
+    of one user (or of one chat, for updates without a user) run in the
+    order they arrived.
+
+    When ``max_pending`` updates are queued or running, accepting the next
+    one waits until one finishes. With ``start_polling(handle_as_tasks=False)``
+    this holds back the next getUpdates call, so a backlog stays on Telegram's
+    side instead of in memory.
+
+    As the middleware returns once the update is queued, aiogram logs the
+    update as handled after a few microseconds; the time it actually took is
+    logged here. aiogram's own error handling has finished by then too, so
+    exceptions of queued updates are passed to the error handlers of
+    ``dispatcher``, if given. Exceptions that are not handled there are
+    logged.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 100,
+        max_pending: int = 1000,
+        window: int = 1000,
+        clock: Callable[[], float] = time.monotonic,
+        dispatcher: Optional[Router] = None,
+    ) -> None:
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self._clock = clock
+        self._errors = ErrorsMiddleware(dispatcher) if dispatcher else None
+        self._slots = asyncio.Semaphore(concurrency)
+        self._tails: dict[Union[int, str], asyncio.Task] = {}
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        # Seconds between accepting and starting recent updates
+        self._waits: deque[float] = deque(maxlen=window)
+        # Seconds recent updates took to process
+        self._runs: deque[float] = deque(maxlen=window)
+        self.pending = 0
+        self.running = 0
+        self.max_queue = 0
+        self.processed = 0
+        self.throttled = 0
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        chat = data.get("event_chat")
+        if user is not None:
+            key = user.id
+        elif chat is not None:
+            key = chat.id
+        else:
+            key = f"update:{getattr(event, 'update_id', id(event))}"
+        if self._errors is not None:
+            job = self._errors(handler, event, data)
+        else:
+            job = handler(event, data)
+        await self.submit(
+            key, job, label=f"Update id={getattr(event, 'update_id', None)}"
+        )
+
+    async def submit(
+        self,
+        key: Union[int, str],
+        job: Awaitable[Any],
+        label: Optional[str] = None,
+    ) -> None:
+        """Queue a job after the previous jobs of ``key``.
+
+        Waits while the scheduler is full. The job runs in the context of
+        the caller. With a ``label``, the time the job took is logged under
+        it.
+        """
+        if self.pending >= self.max_pending:
+            self.throttled += 1
+            if self.throttled % 100 == 1:
+                logger.warning(f"{self.pending} updates pending, holding back new ones")
+            while self.pending >= self.max_pending:
+                self._not_full.clear()
+                await self._not_full.wait()
+
+        self.pending += 1
+        self.max_queue = max(self.max_queue, self.pending - self.running)
+        self._idle.clear()
+        task = asyncio.create_task(
+            self._run(self._tails.get(key), job, self._clock(), label)
+        )
+        self._tails[key] = task
+        task.add_done_callback(lambda done: self._forget(key, done))
+
+    def _forget(self, key: Union[int, str], task: asyncio.Task) -> None:
+        if self._tails.get(key) is task:
+            del self._tails[key]
+
+    async def _run(
+        self,
+        previous: Optional[asyncio.Task],
+        job: Awaitable[Any],
+        queued: float,
+        label: Optional[str],
+    ) -> None:
+        started = False
+        try:
+            if previous is not None:
+                await asyncio.wait([previous])
+            async with self._slots:
+                start = self._clock()
+                self._waits.append(start - queued)
+                self.running += 1
+                started = True
+                try:
+                    await job
+                except Exception:
+                    logger.exception("Failed to process update")
+                finally:
+                    self.running -= 1
+                    self.processed += 1
+                    duration = self._clock() - start
+                    self._runs.append(duration)
+                    if label is not None:
+                        logger.info(
+                            "%s is processed. Waited %d ms, ran %d ms",
+                            label,
+                            (start - queued) * 1000,
+                            duration * 1000,
+                        )
+        finally:
+            if not started and inspect.iscoroutine(job):
+                # Cancelled while queued
+                job.close()
+            self.pending -= 1
+            if self.pending < self.max_pending:
+                self._not_full.set()
+            if self.pending == 0:
+                self._idle.set()
+
+    async def join(self) -> None:
+        """Wait until every accepted update has been processed."""
+        await self._idle.wait()
+        logger.info(f"Update scheduler stopped: {self.stats()}")
+
+    def stats(self) -> dict[str, Union[int, float]]:
+        """Return queue depth and counters, and wait and run times in ms.
+
+        Time percentiles cover the most recent updates.
+        """
+
+        def percentile(times: list[float], fraction: float) -> float:
+            if not times:
+                return 0.0
+            return round(
+                times[min(len(times) - 1, int(fraction * len(times)))] * 1000, 2
+            )
+
+        waits = sorted(self._waits)
+        runs = sorted(self._runs)
+        return {
+            "queued": self.pending - self.running,
+            "running": self.running,
+            "max_queue": self.max_queue,
+            "processed": self.processed,
+            "throttled": self.throttled,
+            "wait_p50_ms": percentile(waits, 0.5),
+            "wait_p90_ms": percentile(waits, 0.9),
+            "wait_p99_ms": percentile(waits, 0.99),
+            "run_p50_ms": percentile(runs, 0.5),
+            "run_p90_ms": percentile(runs, 0.9),
+            "run_p99_ms": percentile(runs, 0.99),
+        }
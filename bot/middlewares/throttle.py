@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import CallbackQuery, TelegramObject, Update
+
+logger = logging.getLogger(__name__)
+
+
+class CallbackThrottleMiddleware(BaseMiddleware):
+    """Drop repeated clicks on the same button.
+
+    A callback query with the same user and data as one accepted less than
+    ``window`` seconds earlier is acknowledged with an empty answer and goes
+    no further: no FSM read, no queueing, no handler. Registered as an outer
+    middleware of ``dp.update`` ahead of the scheduler and FSM middlewares.
+
+    The empty answer is sent in the background: this middleware runs in the
+    getUpdates loop, which would otherwise wait for every such request.
+    """
+
+    def __init__(
+        self,
+        window: float = 1.0,
+        max_entries: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.window = window
+        self.max_entries = max_entries
+        self._clock = clock
+        # (user id, callback data) -> time of the accepted click, oldest first
+        self._seen: dict[tuple[int, str], float] = {}
+        # Answers being sent, referenced until done
+        self._answers: set[asyncio.Task] = set()
+        self.suppressed = 0
+
+    def _expire(self, now: float) -> None:
+        """Forget clicks older than the window, and the oldest ones over the cap."""
+        while self._seen:
+            key, seen = next(iter(self._seen.items()))
+            if seen > now - self.window and len(self._seen) < self.max_entries:
+                return
+            del self._seen[key]
+
+    @staticmethod
+    async def _answer(query: CallbackQuery) -> None:
+        try:
+            await query.answer()
+        except TelegramAPIError as e:
+            logger.warning("Failed to answer a repeated callback query: %s", e)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: dict[str, Any],
+    ) -> Any:
+        query = event.callback_query
+        if query is None or query.data is None:
+            return await handler(event, data)
+
+        now = self._clock()
+        self._expire(now)
+        key = (query.from_user.id, query.data)
+        if key in self._seen:
+            self.suppressed += 1
+            logger.debug(
+                f"Repeated callback query suppressed ({self.suppressed} so far)"
+            )
+            task = asyncio.create_task(self._answer(query))
+            self._answers.add(task)
+            task.add_done_callback(self._answers.discard)
+            return None
+
+        self._seen[key] = now
+        return await handler(event, data)
@@ -0,0 +1,85 @@
+import asyncio
+import hashlib
+from pathlib import Path
+from typing import Any, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, Message
+
+from bot.db.repository import TelegramFileRepository
+
+IMAGES_PATH = Path(__file__).parent.parent / "images"
+
+
+class ImageService:
+    """Sends local images from bot/images, uploading each one only once.
+
+    Telegram returns a file_id for every uploaded photo, which can be sent
+    again without the bytes. File ids are stored by SHA-256 of the file
+    content, so an edited image is uploaded again and an unchanged one never
+    is, even after a restart. Hashes are cached by file size and mtime.
+    """
+
+    _digests: dict[Path, tuple[tuple[int, int], str]] = {}
+    _file_ids: dict[str, str] = {}
+    _upload_locks: dict[str, asyncio.Lock] = {}
+    uploads = 0
+
+    @classmethod
+    def digest(cls, path: Path) -> str:
+        """Get the SHA-256 of a file's content."""
+        stat = path.stat()
+        signature = (stat.st_size, stat.st_mtime_ns)
+        cached = cls._digests.get(path)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        with path.open("rb") as f:
+            digest = hashlib.file_digest(f, "sha256").hexdigest()
+        cls._digests[path] = (signature, digest)
+        return digest
+
+    @classmethod
+    def get_file_id(cls, digest: str) -> Optional[str]:
+        """Get the file_id of already uploaded content."""
+        file_id = cls._file_ids.get(digest)
+        if file_id is None:
+            file_id = TelegramFileRepository.get(digest)
+            if file_id is not None:
+                cls._file_ids[digest] = file_id
+        return file_id
+
+    @classmethod
+    def forget(cls, digest: str) -> None:
+        cls._file_ids.pop(digest, None)
+        TelegramFileRepository.delete(digest)
+
+    @classmethod
+    async def send_photo(
+        cls, bot: Bot, chat_id: int, name: str, **kwargs: Any
+    ) -> Message:
+        """Send bot/images/<name> as a photo, by file_id once it is uploaded."""
+        path = IMAGES_PATH / name
+        digest = cls.digest(path)
+        file_id = cls.get_file_id(digest)
+        if file_id is not None:
+            try:
+                return await bot.send_photo(chat_id, file_id, **kwargs)
+            except TelegramBadRequest:
+                # The file_id is no longer valid, e.g. it belongs to another bot
+                cls.forget(digest)
+
+        # Concurrent first sends of the same image wait for one upload
+        lock = cls._upload_locks.setdefault(digest, asyncio.Lock())
+        async with lock:
+            file_id = cls.get_file_id(digest)
+            if file_id is not None:
+                return await bot.send_photo(chat_id, file_id, **kwargs)
+
+            message = await bot.send_photo(chat_id, FSInputFile(path), **kwargs)
+            cls.uploads += 1
+            file_id = message.photo[-1].file_id
+            TelegramFileRepository.save(digest, file_id)
+            cls._file_ids[digest] = file_id
+            return message
@@ -0,0 +1,170 @@
+"""Binary quiz bank read through mmap.
+
+The bank is compiled from quizzes.json and references.json:
+
+    python -m bot.services.quiz_bank [output-path]
+
+Layout (little-endian):
+
+    header     magic "LQZB", format (u16), content version (u64),
+               directory length (u32)
+    directory  JSON object {"topic/level": [table offset, question count]}
+    tables     per topic/level, count + 1 record offsets (u64)
+    records    UTF-8 JSON [question, reference] per question
+
+Table and record offsets are relative to the end of the directory.
+
+Only the header and directory are parsed when a bank is opened. Questions
+are decoded on access, so worker processes share the file through the OS page
+cache and resident memory does not grow with the size of the bank.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Iterator, Optional
+
+from bot.cache import LRUCache
+from bot.services.quiz_service import (
+    QUIZ_PATH,
+    REFERENCES_PATH,
+    Index,
+    Question,
+    QuizService,
+)
+
+MAGIC = b"LQZB"
+FORMAT = 1
+HEADER = struct.Struct("<4sHQI")
+OFFSET = struct.Struct("<Q")
+OFFSET_PAIR = struct.Struct("<QQ")
+DECODED_CACHE_SIZE = 1024
+DEFAULT_BANK_PATH = QUIZ_PATH.with_suffix(".bank")
+
+
+class BankQuestions(Sequence):
+    """Questions of one topic and level, decoded from the bank on access."""
+
+    def __init__(self, bank: "QuizBank", section: str, table: int, count: int) -> None:
+        self._bank = bank
+        self._section = section
+        self._table = table
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> Question:
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+
+        key = (self._section, index)
+        question = self._bank.decoded.get(key)
+        if question is None:
+            data_start = self._bank.data_start
+            start, end = OFFSET_PAIR.unpack_from(
+                self._bank.buffer, data_start + self._table + index * OFFSET.size
+            )
+            raw, reference = json.loads(
+                self._bank.buffer[data_start + start : data_start + end]  # noqa: E203
+            )
+            question = Question(raw, index, self._count, reference)
+            self._bank.decoded.set(key, question)
+        return question
+
+    def __iter__(self) -> Iterator[Question]:
+        return (self[index] for index in range(self._count))
+
+
+class QuizBank:
+    """Read-only view of a compiled quiz bank file."""
+
+    def __init__(self, path: Path) -> None:
+        with path.open("rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, file_format, self.version, directory_length = HEADER.unpack_from(
+            self.buffer
+        )
+        if magic != MAGIC or file_format != FORMAT:
+            raise ValueError(f"Not a quiz bank file: {path}")
+
+        self.data_start = HEADER.size + directory_length
+        directory = json.loads(self.buffer[HEADER.size : self.data_start])  # noqa: E203
+        self.decoded: LRUCache[tuple[str, int], Question] = LRUCache(DECODED_CACHE_SIZE)
+        self.index: Index = {}
+        for section, (table, count) in directory.items():
+            topic, level = section.split("/", 1)
+            self.index[(topic, level)] = BankQuestions(self, section, table, count)
+
+
+def open_bank(path: Path) -> tuple[int, Index]:
+    """Open a bank file and return its content version and lazy index."""
+    bank = QuizBank(path)
+    return bank.version, bank.index
+
+
+def build_bank(
+    path: Path, quizzes: dict, references: dict, version: Optional[int] = None
+) -> None:
+    """Write quiz content to a bank file, replacing it atomically."""
+    if version is None:
+        version, _ = QuizService.compile(quizzes, references)
+
+    sections = []
+    for topic, levels in quizzes.items():
+        for level, questions in levels.items():
+            if not isinstance(questions, list):
+                continue
+            level_references = references.get(topic, {}).get(level, {})
+            records = [
+                json.dumps(
+                    [question, level_references.get(str(question_idx), "")],
+                    ensure_ascii=False,
+                    separators=(",", ":"),
+                ).encode("utf-8")
+                for question_idx, question in enumerate(questions)
+            ]
+            sections.append((f"{topic}/{level}", records))
+
+    # Offsets are relative to the end of the directory, so the directory can
+    # be encoded before the position of the data is known.
+    directory = {}
+    position = 0
+    for name, records in sections:
+        directory[name] = [position, len(records)]
+        position += (len(records) + 1) * OFFSET.size
+
+    tables = bytearray()
+    body = bytearray()
+    for _, records in sections:
+        for record in records:
+            tables += OFFSET.pack(position + len(body))
+            body += record
+        tables += OFFSET.pack(position + len(body))
+
+    encoded_directory = json.dumps(directory, separators=(",", ":")).encode("utf-8")
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with tmp_path.open("wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT, version, len(encoded_directory)))
+        f.write(encoded_directory)
+        f.write(tables)
+        f.write(body)
+    os.replace(tmp_path, path)
+
+
+def main() -> None:
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BANK_PATH
+    with QUIZ_PATH.open(encoding="utf-8") as f:
+        quizzes = json.load(f)
+    with REFERENCES_PATH.open(encoding="utf-8") as f:
+        references = json.load(f)
+    build_bank(path, quizzes, references)
+    print(f"Quiz bank written to {path}")
+
+
+if __name__ == "__main__":
+    main()
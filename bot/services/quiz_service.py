@@ -1,16 +1,44 @@
+import asyncio
+import hashlib
 import json
+import logging
 from pathlib import Path
+from collections.abc import Sequence
 from typing import Optional
 
+from bot.config import quiz_bank_path
+from bot.services.user_service import escape_md
+
 QUIZ_PATH = Path(__file__).parent.parent / "data" / "quizzes.json"
 REFERENCES_PATH = Path(__file__).parent.parent / "data" / "references.json"
+# Compiled binary bank (see bot.services.quiz_bank); used instead of JSON if set
+BANK_PATH = Path(quiz_bank_path) if quiz_bank_path else None
+
+logger = logging.getLogger(__name__)
+
+
+Index = dict[tuple[str, str], Sequence["Question"]]
+
+# Compiled content versions kept for quizzes started before a reload.
+MAX_CONTENT_VERSIONS = 8
 
 
 class QuizService:
-    """Service for quiz data operations."""
+    """Service for quiz data operations.
+
+    Content is compiled into an index identified by a hash of the quiz and
+    reference data. A reload installs a new index but keeps recent ones, so
+    a quiz started on an older version keeps valid question indices when it
+    passes that ``version`` to the getters. A version that is no longer kept
+    has no questions; see ``has_version()``.
+    """
 
     _quizzes: Optional[dict] = None
     _references: Optional[dict] = None
+    _index: Optional[Index] = None
+    _version: Optional[int] = None
+    _versions: dict[int, Index] = {}
+    _mtimes: Optional[tuple[float, ...]] = None
 
     @classmethod
     def load_quizzes(cls) -> dict:
@@ -42,63 +70,241 @@ class QuizService:
             return quizzes[topic].get("title", topic)
         return topic
 
+    @staticmethod
+    def _validate(topic: str, level: str, question_idx: int, question: dict) -> None:
+        options = question.get("options")
+        if (
+            not isinstance(question.get("question"), str)
+            or not isinstance(options, list)
+            or not options
+            or not 0 <= int(question.get("correct", -1)) < len(options)
+        ):
+            raise ValueError(f"Invalid question {topic}/{level}/{question_idx}")
+
+    @staticmethod
+    def compile(quizzes: dict, references: dict) -> tuple[int, Index]:
+        """Validate content and compile it into a versioned question index."""
+        index = {}
+        for topic, levels in quizzes.items():
+            for level, questions in levels.items():
+                if not isinstance(questions, list):
+                    continue
+                for question_idx, question in enumerate(questions):
+                    QuizService._validate(topic, level, question_idx, question)
+                level_references = references.get(topic, {}).get(level, {})
+                index[(topic, level)] = tuple(
+                    Question(
+                        question,
+                        question_idx,
+                        len(questions),
+                        level_references.get(str(question_idx), ""),
+                    )
+                    for question_idx, question in enumerate(questions)
+                )
+
+        digest = hashlib.sha1(
+            json.dumps([quizzes, references], sort_keys=True).encode("utf-8")
+        ).digest()
+        return int.from_bytes(digest[:7], "big"), index
+
     @classmethod
-    def get_questions(cls, topic: str, level: str) -> list[dict]:
+    def _install(cls, version: int, index: Index) -> None:
+        """Make a compiled index current while keeping recent versions."""
+        cls._versions[version] = index
+        while len(cls._versions) > MAX_CONTENT_VERSIONS:
+            del cls._versions[next(iter(cls._versions))]
+        cls._index = index
+        cls._version = version
+
+    @classmethod
+    def load_index(cls) -> Index:
+        """Compile quizzes and references into per-topic/level question tuples."""
+        if cls._index is None:
+            if BANK_PATH is not None:
+                from bot.services.quiz_bank import open_bank
+
+                cls._install(*open_bank(BANK_PATH))
+            else:
+                cls._install(*cls.compile(cls.load_quizzes(), cls.load_references()))
+        return cls._index
+
+    @classmethod
+    def get_version(cls) -> int:
+        """Get the version of the current content."""
+        cls.load_index()
+        return cls._version
+
+    @staticmethod
+    def _content_mtimes() -> tuple[float, ...]:
+        if BANK_PATH is not None:
+            return (BANK_PATH.stat().st_mtime,)
+        return QUIZ_PATH.stat().st_mtime, REFERENCES_PATH.stat().st_mtime
+
+    @staticmethod
+    def read_content() -> tuple[Optional[dict], Optional[dict], int, Index]:
+        """Read and compile the content files. Blocking.
+
+        A bank is opened rather than parsed, so no raw content is returned.
+        """
+        if BANK_PATH is not None:
+            from bot.services.quiz_bank import open_bank
+
+            return None, None, *open_bank(BANK_PATH)
+
+        with QUIZ_PATH.open(encoding="utf-8") as f:
+            quizzes = json.load(f)
+        with REFERENCES_PATH.open(encoding="utf-8") as f:
+            references = json.load(f)
+        return quizzes, references, *QuizService.compile(quizzes, references)
+
+    @classmethod
+    async def reload(cls) -> bool:
+        """Re-read content off the event loop and swap it in if it changed."""
+        quizzes, references, version, index = await asyncio.to_thread(cls.read_content)
+        cls.load_index()
+        if version == cls._version:
+            return False
+
+        # Installed in one step on the event loop thread, so handlers never
+        # observe a half-updated service.
+        cls._quizzes = quizzes
+        cls._references = references
+        cls._install(version, index)
+        logger.info("Quiz content reloaded: version %x", version)
+        return True
+
+    @classmethod
+    async def watch(cls, interval: float) -> None:
+        """Reload content whenever the files' modification times change."""
+        cls._mtimes = cls._content_mtimes()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                mtimes = cls._content_mtimes()
+            except OSError as e:
+                logger.warning("Quiz content is not readable: %s", e)
+                continue
+            if mtimes == cls._mtimes:
+                continue
+
+            cls._mtimes = mtimes
+            try:
+                await cls.reload()
+            except Exception:
+                # Keep serving the previous content until the next edit.
+                logger.exception("Quiz content reload failed")
+
+    @classmethod
+    def get_questions(
+        cls, topic: str, level: str, version: Optional[int] = None
+    ) -> Sequence["Question"]:
         """Get questions for a specific topic and level."""
-        quizzes = cls.load_quizzes()
-        if topic in quizzes and level in quizzes[topic]:
-            return quizzes[topic][level]
-        return []
+        index = cls.load_index()
+        if version is not None and version != cls._version:
+            index = cls._versions.get(version, {})
+        return index.get((topic, level), ())
 
     @classmethod
-    def get_question(cls, topic: str, level: str, index: int) -> Optional[dict]:
+    def has_version(cls, version: Optional[int]) -> bool:
+        """Check whether the questions of a content version are still kept.
+
+        Only ``MAX_CONTENT_VERSIONS`` versions are kept, and only the current
+        one after a restart. ``None`` stands for the current version.
+        """
+        cls.load_index()
+        return version is None or version in cls._versions
+
+    @classmethod
+    def get_question(
+        cls, topic: str, level: str, index: int, version: Optional[int] = None
+    ) -> Optional["Question"]:
         """Get a specific question."""
-        questions = cls.get_questions(topic, level)
+        questions = cls.get_questions(topic, level, version)
         if 0 <= index < len(questions):
             return questions[index]
         return None
 
     @classmethod
-    def get_question_count(cls, topic: str, level: str) -> int:
+    def get_question_count(
+        cls, topic: str, level: str, version: Optional[int] = None
+    ) -> int:
         """Get number of questions for a topic and level."""
-        return len(cls.get_questions(topic, level))
+        return len(cls.get_questions(topic, level, version))
 
     @classmethod
     def check_answer(
-        cls, topic: str, level: str, question_idx: int, answer_idx: int
+        cls,
+        topic: str,
+        level: str,
+        question_idx: int,
+        answer_idx: int,
+        version: Optional[int] = None,
     ) -> bool:
         """Check if the answer is correct."""
-        question = cls.get_question(topic, level, question_idx)
-        if question:
-            correct = question.get("correct")
-            # Handle both int and str types for backwards compatibility
-            return answer_idx == int(correct)
-        return False
+        question = cls.get_question(topic, level, question_idx, version)
+        return question is not None and answer_idx == question.correct
 
     @classmethod
     def get_correct_answer(
-        cls, topic: str, level: str, question_idx: int
+        cls, topic: str, level: str, question_idx: int, version: Optional[int] = None
     ) -> Optional[str]:
         """Get the correct answer text for a question."""
-        question = cls.get_question(topic, level, question_idx)
-        if question:
-            correct_idx = int(question.get("correct", 0))
-            options = question.get("options", [])
-            if 0 <= correct_idx < len(options):
-                return options[correct_idx]
-        return None
+        question = cls.get_question(topic, level, question_idx, version)
+        return question.correct_answer if question else None
 
     @classmethod
-    def get_reference(cls, topic: str, level: str, question_idx: int) -> str:
+    def get_reference(
+        cls, topic: str, level: str, question_idx: int, version: Optional[int] = None
+    ) -> str:
         """Get a short reference shown after answering a question."""
-        question = cls.get_question(topic, level, question_idx)
-        if not question:
-            return ""
+        question = cls.get_question(topic, level, question_idx, version)
+        return question.reference if question else ""
+
 
-        references = cls.load_references()
-        reference = references.get(topic, {}).get(level, {}).get(str(question_idx), "")
-        if not reference:
-            return ""
+class Question:
+    """Quiz question compiled once at load time.
 
+    ``header`` is the ready MarkdownV2 text of the question, including its
+    position in the quiz, so sending or editing a question does no string work.
+    """
+
+    __slots__ = (
+        "text",
+        "options",
+        "correct",
+        "correct_answer",
+        "reference",
+        "summary",
+        "header",
+        "file_id",
+        "image",
+    )
+
+    def __init__(
+        self, question: dict, index: int, total: int, reference: str = ""
+    ) -> None:
+        self.text: str = question["question"]
+        self.options: tuple[str, ...] = tuple(question.get("options", ()))
+        # Handle both int and str types for backwards compatibility
+        self.correct = int(question.get("correct", 0))
+        self.correct_answer: Optional[str] = (
+            self.options[self.correct]
+            if 0 <= self.correct < len(self.options)
+            else None
+        )
         lines = str(reference).splitlines()[:3]
-        return "\n".join(line.strip() for line in lines if line.strip())
+        self.reference = "\n".join(line.strip() for line in lines if line.strip())
+        self.file_id: Optional[str] = question.get("file_id")
+        # Local file in bot/images, sent through ImageService
+        self.image: Optional[str] = question.get("image")
+
+        lines = self.text.splitlines()
+        self.summary = lines[0][:50]
+        header = f"❓ _Вопрос {index + 1} из {total}_\n\n*{escape_md(lines[0])}*"
+        if len(lines) > 1:
+            header += "\n" + "\n".join(escape_md(line) for line in lines[1:])
+        self.header = header
+
+    @property
+    def has_image(self) -> bool:
+        return bool(self.file_id or self.image)
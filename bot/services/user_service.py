@@ -1,10 +1,17 @@
+import asyncio
+import logging
 import re
 from typing import Optional
 from aiogram import Bot
 from aiogram.exceptions import TelegramBadRequest
 
+from bot.cache import LRUCache
+from bot.config import pinned_score_delay
 from bot.db.repository import UserRepository
 from bot.db.models import User
+from bot.middlewares.rate_limit import low_priority
+
+logger = logging.getLogger(__name__)
 
 
 def escape_md(text: str) -> str:
@@ -73,49 +80,132 @@ class UserService:
 
     @staticmethod
     async def update_pinned_score(bot: Bot, telegram_id: int, chat_id: int) -> None:
-        """Update or create pinned score message."""
-        user = UserRepository.get_by_telegram_id(telegram_id)
-        if not user:
-            return
+        """Update or create pinned score message now."""
+        await _pinned_scores.update(bot, telegram_id, chat_id)
 
-        scores = user.get_all_scores()
-        text = (
-            f"📊 *{escape_md(user.name)}*\n\n"
-            f"*Junior:* {scores['junior']['correct']} из {scores['junior']['total']}\n"
-            f"*Middle:* {scores['middle']['correct']} из {scores['middle']['total']}\n"
-            f"*Senior:* {scores['senior']['correct']} из {scores['senior']['total']}"
-        )
+    @staticmethod
+    def schedule_pinned_score(bot: Bot, telegram_id: int, chat_id: int) -> None:
+        """Update the pinned score message in the background."""
+        _pinned_scores.schedule(bot, telegram_id, chat_id)
 
+    @staticmethod
+    async def flush_pinned_scores() -> None:
+        """Wait for scheduled pinned score updates."""
+        await _pinned_scores.flush()
+
+
+class PinnedScoreUpdater:
+    """Keeps users' pinned score messages up to date.
+
+    ``schedule()`` returns at once. Requests for a user that arrive within
+    ``delay`` are coalesced into one update, which runs in a background task
+    with low request priority. The last text written to each pinned message
+    is remembered, so an update that would not change it sends nothing.
+    """
+
+    def __init__(self, delay: float, cache_size: int = 10000) -> None:
+        self.delay = delay
+        # telegram_id -> (pinned message id, text)
+        self._rendered: LRUCache[int, tuple[int, str]] = LRUCache(cache_size)
+        self._pending: dict[int, tuple[Bot, int]] = {}
+        self._tasks: dict[int, asyncio.Task] = {}
+        self.scheduled = 0
+        self.sent = 0
+        self.skipped = 0
+
+    def schedule(self, bot: Bot, telegram_id: int, chat_id: int) -> None:
+        self.scheduled += 1
+        self._pending[telegram_id] = (bot, chat_id)
+        if telegram_id not in self._tasks:
+            with low_priority():
+                self._tasks[telegram_id] = asyncio.create_task(self._run(telegram_id))
+
+    async def _run(self, telegram_id: int) -> None:
         try:
-            if user.pinned_message_id:
-                # Try to edit existing message
+            # Requests made while an update is running get one more update
+            while telegram_id in self._pending:
+                await asyncio.sleep(self.delay)
+                bot, chat_id = self._pending.pop(telegram_id)
+                await self.update(bot, telegram_id, chat_id)
+        except Exception:
+            logger.exception("Failed to update pinned score")
+        finally:
+            del self._tasks[telegram_id]
+
+    async def flush(self) -> None:
+        """Wait until all scheduled updates are done."""
+        while self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    def stats(self) -> dict[str, int]:
+        """Return counters of scheduled, sent and skipped updates."""
+        return {
+            "scheduled": self.scheduled,
+            "sent": self.sent,
+            "skipped": self.skipped,
+            "pending": len(self._pending),
+        }
+
+    async def update(self, bot: Bot, telegram_id: int, chat_id: int) -> None:
+        with low_priority():
+            user = UserRepository.get_by_telegram_id(telegram_id)
+            if not user:
+                return
+
+            scores = user.get_all_scores()
+            text = (
+                f"📊 *{escape_md(user.name)}*\n\n"
+                f"*Junior:* {scores['junior']['correct']} из {scores['junior']['total']}\n"
+                f"*Middle:* {scores['middle']['correct']} из {scores['middle']['total']}\n"
+                f"*Senior:* {scores['senior']['correct']} из {scores['senior']['total']}"
+            )
+            if user.pinned_message_id and self._rendered.get(telegram_id) == (
+                user.pinned_message_id,
+                text,
+            ):
+                self.skipped += 1
+                return
+
+            try:
+                if user.pinned_message_id:
+                    # Try to edit existing message
+                    try:
+                        await bot.edit_message_text(
+                            text=text,
+                            chat_id=chat_id,
+                            message_id=user.pinned_message_id,
+                            parse_mode="MarkdownV2",
+                        )
+                        self.sent += 1
+                        self._rendered.set(telegram_id, (user.pinned_message_id, text))
+                        return
+                    except TelegramBadRequest as e:
+                        if "message is not modified" in e.message:
+                            self.skipped += 1
+                            self._rendered.set(
+                                telegram_id, (user.pinned_message_id, text)
+                            )
+                            return
+                        # Message was deleted or can't be edited, create new one
+
+                # Create and pin new message
+                msg = await bot.send_message(chat_id, text, parse_mode="MarkdownV2")
+                self.sent += 1
                 try:
-                    await bot.edit_message_text(
-                        text=text,
+                    await bot.pin_chat_message(
                         chat_id=chat_id,
-                        message_id=user.pinned_message_id,
-                        parse_mode="MarkdownV2",
+                        message_id=msg.message_id,
+                        disable_notification=True,
                     )
-                    return
                 except TelegramBadRequest:
-                    # Message was deleted or can't be edited, create new one
+                    # Can't pin in this chat type, that's ok
                     pass
+                UserRepository.update_pinned_message(telegram_id, msg.message_id)
+                self._rendered.set(telegram_id, (msg.message_id, text))
 
-            # Create and pin new message
-            msg = await bot.send_message(chat_id, text, parse_mode="MarkdownV2")
-            try:
-                await bot.pin_chat_message(
-                    chat_id=chat_id,
-                    message_id=msg.message_id,
-                    disable_notification=True,
-                )
-            except TelegramBadRequest:
-                # Can't pin in this chat type, that's ok
-                pass
-            UserRepository.update_pinned_message(telegram_id, msg.message_id)
-
-        except TelegramBadRequest as e:
-            # Log but don't fail
-            import logging
-
-            logging.warning(f"Failed to update pinned score: {e}")
+            except TelegramBadRequest as e:
+                # Log but don't fail
+                logger.warning(f"Failed to update pinned score: {e}")
+
+
+_pinned_scores = PinnedScoreUpdater(pinned_score_delay)
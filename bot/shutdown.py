@@ -0,0 +1,21 @@
+from typing import Any, Awaitable, Callable
+
+from aiogram import Dispatcher
+
+
+def register_shutdown_hooks(
+    dp: Dispatcher, *hooks: Callable[..., Awaitable[Any]]
+) -> None:
+    """Register shutdown hooks of ``dp`` that run before FSM storage closes.
+
+    aiogram registers closing FSM storage when the dispatcher is created,
+    which would make it the first shutdown hook. Queued updates and flushing
+    hooks still use storage, so it is moved behind ``hooks``, which run in
+    the given order.
+    """
+    dp.shutdown.handlers = [
+        handler for handler in dp.shutdown.handlers if handler.callback != dp.fsm.close
+    ]
+    for hook in hooks:
+        dp.shutdown.register(hook)
+    dp.shutdown.register(dp.fsm.close)
@@ -0,0 +1,67 @@
+import asyncio
+import contextlib
+import logging
+import signal
+from typing import Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+
+def create_app(
+    dp: Dispatcher, bot: Bot, path: str, secret_token: Optional[str] = None
+) -> web.Application:
+    """Build the aiohttp app that feeds webhook updates to the dispatcher.
+
+    Requests without the matching ``X-Telegram-Bot-Api-Secret-Token`` header
+    are rejected with 401. Updates are answered right away and processed in
+    the background, so Telegram never waits for a handler. The dispatcher's
+    startup and shutdown hooks run with the app's.
+    """
+    app = web.Application()
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=secret_token).register(
+        app, path=path
+    )
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def wait_for_signal() -> None:
+    """Wait for SIGINT or SIGTERM."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        with contextlib.suppress(NotImplementedError):
+            loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+
+async def serve_app(app: web.Application, host: str, port: int) -> None:
+    """Serve an aiohttp app until SIGINT/SIGTERM or cancellation."""
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+        logger.info(f"Listening for webhook updates on {host}:{port}")
+        await wait_for_signal()
+    finally:
+        # Runs the app's shutdown hooks
+        await runner.cleanup()
+
+
+async def run_webhook(
+    dp: Dispatcher,
+    bot: Bot,
+    host: str,
+    port: int,
+    path: str,
+    secret_token: Optional[str] = None,
+) -> None:
+    """Serve webhook updates until SIGINT/SIGTERM or cancellation.
+
+    The dispatcher shutdown closes FSM storage and the bot session.
+    """
+    await serve_app(create_app(dp, bot, path, secret_token), host, port)
@@ -0,0 +1,269 @@
+"""Multi-process mode: one front process and ``WORKERS`` worker processes.
+
+The front process receives updates by polling or webhook and writes each one
+as a JSON line to the stdin of a worker chosen by the user's id. Every worker
+runs its own dispatcher, so all updates of a user are handled by the same
+process, one after another, and per-process state such as the FSM record
+cache stays consistent.
+
+Workers are started by the front process as ``python -m bot.workers``.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+from typing import Any, Awaitable, Callable, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiohttp import web
+
+from bot.config import (
+    bot_mode,
+    webhook_host,
+    webhook_path,
+    webhook_port,
+    webhook_secret,
+)
+from bot.webhook import serve_app, wait_for_signal
+
+logger = logging.getLogger(__name__)
+
+WORKER_INDEX_ENV = "WORKER_INDEX"
+
+
+def shard_key(update: dict[str, Any]) -> int:
+    """Get the id that decides which worker handles an update.
+
+    This is the id of the user who caused the update, or the chat id for
+    updates without a user. Updates with neither go by update id.
+    """
+    for value in update.values():
+        if not isinstance(value, dict):
+            continue
+        user = value.get("from") or value.get("user")
+        if isinstance(user, dict) and "id" in user:
+            return user["id"]
+        chat = value.get("chat")
+        if isinstance(chat, dict) and "id" in chat:
+            return chat["id"]
+    return update["update_id"]
+
+
+def dump_update(update: Update) -> dict[str, Any]:
+    """Convert a parsed update back to the JSON sent by Telegram.
+
+    Fields are dumped under their Bot API names, such as ``from`` rather
+    than ``from_user``, which ``shard_key()`` and the workers' parsing expect.
+    """
+    return update.model_dump(mode="json", exclude_none=True, by_alias=True)
+
+
+class WorkerPool:
+    """Worker processes fed with updates over their stdin pipes.
+
+    A worker that exits before ``close()`` is started again. Updates routed
+    to it meanwhile wait for the new process; updates it had read but not
+    yet handled are lost.
+    """
+
+    def __init__(self, size: int, restart_delay: float = 1.0) -> None:
+        self.size = size
+        self.restart_delay = restart_delay
+        self._processes: list[asyncio.subprocess.Process] = []
+        self._ready = [asyncio.Event() for _ in range(size)]
+        self._watchers: list[asyncio.Task] = []
+        self._closing = False
+        self.routed = [0] * size
+        self.restarts = [0] * size
+
+    async def _spawn(self, index: int) -> asyncio.subprocess.Process:
+        return await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-m",
+            "bot.workers",
+            stdin=asyncio.subprocess.PIPE,
+            env={**os.environ, WORKER_INDEX_ENV: str(index)},
+        )
+
+    async def start(self) -> None:
+        for index in range(self.size):
+            self._processes.append(await self._spawn(index))
+            self._ready[index].set()
+        self._watchers = [
+            asyncio.create_task(self._watch(index)) for index in range(self.size)
+        ]
+        logger.info(f"Started {self.size} worker processes")
+
+    async def _watch(self, index: int) -> None:
+        """Start worker ``index`` again whenever it exits."""
+        while True:
+            code = await self._processes[index].wait()
+            if self._closing:
+                return
+            self._ready[index].clear()
+            logger.error(f"Worker {index} exited with code {code}, restarting")
+            while True:
+                await asyncio.sleep(self.restart_delay)
+                try:
+                    self._processes[index] = await self._spawn(index)
+                except OSError as e:
+                    logger.error(f"Failed to restart worker {index}: {e}")
+                    continue
+                break
+            self.restarts[index] += 1
+            self._ready[index].set()
+
+    async def route(self, update: dict[str, Any]) -> None:
+        """Send an update to its worker, waiting if the pipe is full.
+
+        If the worker has exited, waits until it is started again.
+        """
+        index = shard_key(update) % self.size
+        line = json.dumps(update, ensure_ascii=False).encode("utf-8") + b"\n"
+        while True:
+            await self._ready[index].wait()
+            process = self._processes[index]
+            try:
+                process.stdin.write(line)
+                await process.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                # _watch() sets the event again once a new process is running
+                if self._processes[index] is process:
+                    self._ready[index].clear()
+                continue
+            self.routed[index] += 1
+            return
+
+    async def close(self) -> None:
+        """Let workers finish queued updates and wait for them to exit."""
+        self._closing = True
+        for watcher in self._watchers:
+            watcher.cancel()
+        for process in self._processes:
+            process.stdin.close()
+        await asyncio.gather(*(process.wait() for process in self._processes))
+        logger.info(
+            f"Worker processes stopped, updates routed: {self.routed}, "
+            f"restarts: {self.restarts}"
+        )
+
+
+async def poll_updates(
+    bot: Bot, pool: WorkerPool, allowed_updates: list[str], timeout: int = 30
+) -> None:
+    """Long-poll Telegram and route every update to the pool."""
+    offset: Optional[int] = None
+    while True:
+        try:
+            updates = await bot.get_updates(
+                offset=offset, timeout=timeout, allowed_updates=allowed_updates
+            )
+        except Exception as e:
+            logger.error(f"Failed to get updates: {e}")
+            await asyncio.sleep(1)
+            continue
+        for update in updates:
+            await pool.route(dump_update(update))
+            offset = update.update_id + 1
+
+
+def create_front_app(
+    pool: WorkerPool, path: str, secret_token: Optional[str] = None
+) -> web.Application:
+    """Build a webhook app that routes updates to the pool unparsed."""
+
+    async def handle(request: web.Request) -> web.Response:
+        if secret_token and (
+            request.headers.get("X-Telegram-Bot-Api-Secret-Token") != secret_token
+        ):
+            return web.Response(status=401)
+        await pool.route(await request.json())
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_post(path, handle)
+    return app
+
+
+async def run_front(bot: Bot, dp: Dispatcher, size: int) -> None:
+    """Receive updates in this process and route them to ``size`` workers.
+
+    Only the dispatcher's startup and shutdown hooks run here; its handlers
+    run in the workers.
+    """
+    pool = WorkerPool(size)
+    await pool.start()
+    try:
+        await dp.emit_startup(bot=bot)
+        if bot_mode == "webhook":
+            app = create_front_app(pool, webhook_path, webhook_secret)
+            await serve_app(app, webhook_host, webhook_port)
+        else:
+            # A failing poller stops the front instead of leaving it idle
+            tasks = [
+                asyncio.create_task(
+                    poll_updates(bot, pool, dp.resolve_used_update_types())
+                ),
+                asyncio.create_task(wait_for_signal()),
+            ]
+            try:
+                done, _ = await asyncio.wait(
+                    tasks, return_when=asyncio.FIRST_COMPLETED
+                )
+            finally:
+                for task in tasks:
+                    task.cancel()
+            for task in done:
+                task.result()
+    finally:
+        await pool.close()
+        await dp.emit_shutdown(bot=bot)
+        await bot.session.close()
+
+
+async def serve_updates(
+    reader: asyncio.StreamReader,
+    handle: Callable[[dict[str, Any]], Awaitable[Any]],
+) -> None:
+    """Pass JSON line updates from ``reader`` to ``handle`` until EOF.
+
+    Updates are passed one at a time. The dispatcher's UpdateScheduler
+    queues them per user; while it is full, the pipe fills up and holds the
+    front process back.
+    """
+    while line := await reader.readline():
+        await handle(json.loads(line))
+
+
+async def run_worker(bot: Bot, dp: Dispatcher) -> None:
+    """Serve updates written by the front process to stdin."""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=2**24)
+    await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), sys.stdin
+    )
+    try:
+        await serve_updates(reader, lambda update: dp.feed_raw_update(bot, update))
+    finally:
+        await dp.emit_shutdown(bot=bot)
+        await bot.session.close()
+
+
+async def _main() -> None:
+    # Imported here: bot.__main__ builds this process's bot and dispatcher
+    from bot.__main__ import bot, dp, prepare
+
+    watcher = prepare()
+    logger.info(f"Worker {os.environ.get(WORKER_INDEX_ENV)} started")
+    try:
+        await run_worker(bot, dp)
+    finally:
+        if watcher:
+            watcher.cancel()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,13 @@
+import pytest
+
+from bot.db.repository import UserRepository
+from bot.handlers.quiz import _render_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    UserRepository.clear_cache()
+    _render_cache.clear()
+    yield
+    UserRepository.clear_cache()
+    _render_cache.clear()
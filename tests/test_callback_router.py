@@ -0,0 +1,104 @@
+import asyncio
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.types import CallbackQuery, Update
+
+from bot.keyboards import (
+    LEVEL_PREFIX,
+    TOPIC_MENU,
+    TOPIC_PREFIX,
+    build_topics_keyboard,
+    decode_choice,
+    encode_choice,
+)
+from bot.middlewares import CallbackRouter
+from bot.states import QuizState
+
+
+def _callback(update_id: int, data: str) -> Update:
+    return Update(
+        update_id=update_id,
+        callback_query={
+            "id": str(update_id),
+            "from": {"id": 5, "is_bot": False, "first_name": "Test"},
+            "chat_instance": "1",
+            "data": data,
+        },
+    )
+
+
+def test_choice_callback_data_round_trips():
+    data = encode_choice(TOPIC_PREFIX, "bash")
+
+    assert decode_choice(data) == "bash"
+    assert decode_choice(encode_choice(LEVEL_PREFIX, "senior")) == "senior"
+    button = build_topics_keyboard().inline_keyboard[0][0]
+    assert decode_choice(button.callback_data) == "file_systems"
+    for unknown in ("T99", "T-1", "Tx", "X0", ""):
+        try:
+            decode_choice(unknown)
+        except ValueError:
+            continue
+        raise AssertionError(f"decoded unknown choice {unknown!r}")
+
+
+def test_callbacks_are_dispatched_by_prefix_with_router_fallback():
+    handled = []
+
+    def build_routes() -> tuple[CallbackRouter, Router, Router]:
+        routes = CallbackRouter()
+        router = Router()
+        fallback = Router()
+
+        @routes.callback_query(router, TOPIC_PREFIX, QuizState.selecting_topic)
+        async def choose(cb: CallbackQuery):
+            handled.append(("choose", cb.data))
+
+        @routes.callback_query(router, TOPIC_PREFIX)
+        async def without_state(cb: CallbackQuery, raw_state):
+            handled.append(("without state", raw_state))
+
+        @routes.callback_query(router, TOPIC_MENU, exact=True)
+        async def topic_menu(cb: CallbackQuery):
+            handled.append(("menu", cb.data))
+
+        @fallback.callback_query()
+        async def unknown(cb: CallbackQuery):
+            handled.append(("unknown", cb.data))
+
+        return routes, router, fallback
+
+    async def dispatch(use_routes: bool) -> CallbackRouter:
+        routes, router, fallback = build_routes()
+        dp = Dispatcher()
+        if use_routes:
+            dp.callback_query.outer_middleware(routes)
+        dp.include_routers(router, fallback)
+        bot = Bot(token="1:TEST")
+        await dp.feed_update(bot, _callback(1, "T3"))
+        await dp.storage.set_state(
+            StorageKey(bot_id=1, chat_id=5, user_id=5), QuizState.selecting_topic
+        )
+        await dp.feed_update(bot, _callback(2, "T4"))
+        await dp.feed_update(bot, _callback(3, "Z"))
+        await dp.feed_update(bot, _callback(4, TOPIC_MENU))
+        # Buttons sent before the prefixes were introduced
+        await dp.feed_update(bot, _callback(5, "topic:bash"))
+        await bot.session.close()
+        return routes
+
+    expected = [
+        ("without state", None),
+        ("choose", "T4"),
+        ("unknown", "Z"),
+        ("menu", "t"),
+        ("unknown", "topic:bash"),
+    ]
+    asyncio.run(dispatch(use_routes=False))
+    assert handled == expected
+
+    handled.clear()
+    routes = asyncio.run(dispatch(use_routes=True))
+    assert handled == expected
+    assert (routes.routed, routes.passed) == (3, 2)
@@ -2,11 +2,19 @@ import asyncio
 from types import SimpleNamespace
 from unittest.mock import AsyncMock, patch
 
-from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from aiogram.exceptions import TelegramBadRequest, TelegramNetworkError
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.methods import EditMessageText
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, PollAnswer
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
 
 from bot.handlers import setup_routers
 from bot.handlers.feedback import (
     _FEEDBACK_RETURN_STATE_KEY,
+    FeedbackOutbox,
+    _split_feedback,
     cmd_feedback,
     handle_feedback,
     router as feedback_router,
@@ -17,11 +25,31 @@ from bot.handlers.quiz import (
     _build_answer_feedback,
     _build_reference_keyboard,
     _build_answered_keyboard,
+    _build_answered_question_text,
     handle_answer,
+    render_cache_stats,
     show_reference,
+    show_results,
+    show_results_page,
+)
+from bot.handlers.quiz_poll import PollAnswerBatcher
+from bot.keyboards import (
+    ANSWER_PREFIX,
+    REFERENCE_MESSAGE_PREFIX,
+    REFERENCE_PREFIX,
+    QuizCallback,
+    decode_callback,
+    encode_callback,
 )
 from bot.handlers.start import process_level, process_name, router as start_router
-from bot.db.models import User
+from bot.db.models import Base, User
+from bot.db.repository import (
+    FeedbackRepository,
+    QuizSessionRepository,
+    UserRepository,
+)
+from bot.services.quiz_service import Question
+from bot.services.user_service import PinnedScoreUpdater
 from bot.config import get_feedback_chat_id
 from bot.states import QuizState
 
@@ -85,7 +113,14 @@ def test_feedback_command_uses_plain_text_before_setting_state():
     asyncio.run(run_test())
 
 
-def test_feedback_is_delivered_to_configured_receiver():
+def test_feedback_is_stored_then_delivered_to_configured_receiver(
+    tmp_path, monkeypatch
+):
+    _use_temporary_database(tmp_path, monkeypatch)
+    outbox = FeedbackOutbox(retry_delay=5, max_retry_delay=60)
+    monkeypatch.setattr("bot.handlers.feedback._outbox", outbox)
+    monkeypatch.setattr("bot.handlers.feedback.feedback_channel_id", "-10012345")
+
     async def run_test():
         state = FakeState({"pending": True})
         message = SimpleNamespace(
@@ -97,8 +132,8 @@ def test_feedback_is_delivered_to_configured_receiver():
         )
         bot = AsyncMock()
 
-        with patch("bot.handlers.feedback.feedback_channel_id", "-10012345"):
-            await handle_feedback(message, state, bot)
+        await handle_feedback(message, state, bot)
+        await outbox.close()
 
         bot.send_message.assert_awaited_once()
         assert bot.send_message.await_args.kwargs["chat_id"] == -10012345
@@ -109,8 +144,148 @@ def test_feedback_is_delivered_to_configured_receiver():
 
     asyncio.run(run_test())
 
+    assert FeedbackRepository.next_attempt() is None
+
+
+def test_feedback_outbox_retries_with_backoff_and_sends_digest(tmp_path, monkeypatch):
+    _use_temporary_database(tmp_path, monkeypatch)
+    monkeypatch.setattr("bot.handlers.feedback.feedback_channel_id", "-10012345")
+    now = 1000.0
+    outbox = FeedbackOutbox(retry_delay=5, max_retry_delay=8, clock=lambda: now)
+    bot = AsyncMock()
+    bot.send_message.side_effect = TelegramNetworkError(
+        method=AsyncMock(), message="timeout"
+    )
+    for text in ("first", "second", "third"):
+        FeedbackRepository.add(text)
+
+    async def deliver_due():
+        batch = FeedbackRepository.claim(now, outbox.batch_size, outbox.lease)
+        outbox._bot = bot
+        await outbox.deliver(batch)
+        return batch
+
+    async def run_test():
+        nonlocal now
+        assert len(await deliver_due()) == 3
+        assert FeedbackRepository.next_attempt() == 1005
+
+        # Not due before the backoff ends; the delay doubles up to the cap
+        now = 1004
+        assert await deliver_due() == []
+        now = 1005
+        await deliver_due()
+        assert FeedbackRepository.next_attempt() == 1005 + 8
+
+        bot.send_message.side_effect = None
+        bot.send_message.reset_mock()
+        now = 1013
+        await deliver_due()
+
+    asyncio.run(run_test())
+
+    bot.send_message.assert_awaited_once()
+    text = bot.send_message.await_args.kwargs["text"]
+    assert text.startswith("✉️ Новые отзывы от @LinuxQuizBot: 3")
+    assert text.index("first") < text.index("second") < text.index("third")
+    assert FeedbackRepository.next_attempt() is None
+    assert (outbox.sent, outbox.delivered, outbox.failed) == (1, 3, 2)
+
+
+def test_feedback_outbox_splits_long_feedback_and_drops_rejected(
+    tmp_path, monkeypatch
+):
+    _use_temporary_database(tmp_path, monkeypatch)
+    monkeypatch.setattr("bot.handlers.feedback.feedback_channel_id", "-10012345")
+    now = 0.0
+    outbox = FeedbackOutbox(
+        retry_delay=5, max_retry_delay=60, max_attempts=2, clock=lambda: now
+    )
+    bot = AsyncMock()
+
+    async def deliver_due(time):
+        nonlocal now
+        now = time
+        outbox._bot = bot
+        await outbox.deliver(FeedbackRepository.claim(now, outbox.batch_size, 60))
+
+    async def run_test():
+        FeedbackRepository.add("short")
+        for part in _split_feedback("line\n" * 1000 + "x" * 3000):
+            FeedbackRepository.add(part)
+        await deliver_due(0)
+        texts = [call.kwargs["text"] for call in bot.send_message.await_args_list]
+        assert len(texts) == 3
+        assert all(len(text) <= 4096 for text in texts)
+        assert "Часть 1/2" in texts[1] and "Часть 2/2" in texts[2]
+        assert FeedbackRepository.next_attempt() is None
+
+        # A rejected digest is retried item by item; only the rejected one is dropped
+        def reject_bad(chat_id, text, parse_mode):
+            if "bad" in text:
+                raise TelegramBadRequest(method=AsyncMock(), message="bad text")
+
+        bot.send_message.reset_mock()
+        bot.send_message.side_effect = reject_bad
+        FeedbackRepository.add("good")
+        FeedbackRepository.add("bad")
+        await deliver_due(0)
+        assert outbox.dropped == 1
+        assert FeedbackRepository.next_attempt() is None
+
+        # Other failures stop being retried after max_attempts
+        bot.send_message.side_effect = TelegramNetworkError(
+            method=AsyncMock(), message="timeout"
+        )
+        FeedbackRepository.add("unlucky")
+        await deliver_due(0)
+        assert FeedbackRepository.next_attempt() == 5
+        await deliver_due(5)
+        assert FeedbackRepository.next_attempt() is None
+        assert outbox.dropped == 2
+
+    asyncio.run(run_test())
+
+
+def test_feedback_that_cannot_be_stored_is_reported(monkeypatch):
+    monkeypatch.setattr("bot.handlers.feedback.feedback_channel_id", "-10012345")
+    monkeypatch.setattr(
+        "bot.handlers.feedback._outbox",
+        FeedbackOutbox(retry_delay=5, max_retry_delay=60),
+    )
+
+    async def run_test():
+        state = FakeState({}, QuizState.waiting_for_feedback)
+        message = SimpleNamespace(
+            text="Great quiz!",
+            from_user=SimpleNamespace(
+                id=20, username="student", full_name="Test Student"
+            ),
+            answer=AsyncMock(),
+        )
+        with patch(
+            "bot.db.repository.FeedbackRepository.add_all",
+            side_effect=OperationalError("INSERT", {}, Exception("disk I/O error")),
+        ):
+            await handle_feedback(message, state, AsyncMock())
+
+        message.answer.assert_awaited_once_with(
+            "Не удалось отправить отзыв. Ошибка записана в журнал бота.",
+            parse_mode=None,
+        )
+        # The user stays in the feedback flow and can send it again
+        assert state.state_name == QuizState.waiting_for_feedback
+
+    asyncio.run(run_test())
+
+
+def test_feedback_restores_interrupted_quiz_state(tmp_path, monkeypatch):
+    _use_temporary_database(tmp_path, monkeypatch)
+    monkeypatch.setattr(
+        "bot.handlers.feedback._outbox",
+        FeedbackOutbox(retry_delay=5, max_retry_delay=60),
+    )
 
-def test_feedback_restores_interrupted_quiz_state():
     async def run_test():
         state = FakeState(
             {
@@ -154,7 +329,6 @@ def test_feedback_failure_is_reported_and_state_is_kept():
             answer=AsyncMock(),
         )
         bot = AsyncMock()
-        bot.send_message.side_effect = ValueError("invalid chat id")
 
         with patch("bot.handlers.feedback.feedback_channel_id", "invalid"):
             await handle_feedback(message, state, bot)
@@ -176,17 +350,104 @@ def test_feedback_chat_not_found_has_actionable_error():
     )
 
 
-def test_duplicate_answers_are_processed_once():
+def _use_temporary_database(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr("bot.db.repository.get_session", sessionmaker(bind=engine))
+
+
+def _answer_data(quiz, option, idx=None):
+    callback = QuizCallback(
+        quiz.topic,
+        quiz.level,
+        quiz.idx if idx is None else idx,
+        option,
+        nonce=quiz.nonce,
+        version=quiz.version,
+    )
+    return encode_callback(ANSWER_PREFIX, callback)
+
+
+def _reference_data(is_correct, prefix=REFERENCE_PREFIX):
+    return encode_callback(
+        prefix, QuizCallback("bash", "junior", 0, is_correct=is_correct)
+    )
+
+
+def test_callback_data_is_signed_and_fits_telegram_limit():
+    callback = QuizCallback(
+        "networking", "senior", 65535, 9, True, 2**32 - 1, 2**56 - 1
+    )
+    data = encode_callback(ANSWER_PREFIX, callback)
+
+    assert len(data.encode()) <= 64
+    assert decode_callback(data) == (ANSWER_PREFIX, callback)
+    for forged in (
+        REFERENCE_PREFIX + data[1:],
+        data[:-1] + ("A" if data[-1] != "A" else "B"),
+        data[:10],
+        "ans:0:1",
+    ):
+        try:
+            decode_callback(forged)
+        except ValueError:
+            continue
+        raise AssertionError(f"accepted forged callback data {forged!r}")
+
+
+def test_answer_from_a_replaced_quiz_is_rejected(tmp_path, monkeypatch):
+    _use_temporary_database(tmp_path, monkeypatch)
+    old = QuizSessionRepository.start(10, 20, "bash", "junior", 2)
+    QuizSessionRepository.start(10, 20, "bash", "junior", 2)
+
     async def run_test():
-        state = FakeState(
-            {
-                "topic": "bash",
-                "level": "junior",
-                "idx": 0,
-                "score": 0,
-                "results": [],
-            }
+        callback = SimpleNamespace(
+            data=_answer_data(old, 0),
+            message=SimpleNamespace(chat=SimpleNamespace(id=10)),
+            from_user=SimpleNamespace(id=20),
+            answer=AsyncMock(),
+        )
+        await handle_answer(callback, FakeState({}), AsyncMock())
+        callback.answer.assert_awaited_once_with(
+            "⚠️ Этот вопрос уже пройден", show_alert=True
+        )
+
+    asyncio.run(run_test())
+    assert QuizSessionRepository.get(10, 20).idx == 0
+
+
+def test_answer_to_a_quiz_on_dropped_content_ends_the_quiz(tmp_path, monkeypatch):
+    _use_temporary_database(tmp_path, monkeypatch)
+    # A content version that is not kept, e.g. from before a restart
+    quiz = QuizSessionRepository.start(10, 20, "bash", "junior", 2, version=12345)
+
+    async def run_test():
+        state = FakeState({"level": "junior"}, QuizState.answering)
+        callback = SimpleNamespace(
+            data=_answer_data(quiz, 0),
+            message=SimpleNamespace(chat=SimpleNamespace(id=10)),
+            from_user=SimpleNamespace(id=20),
+            answer=AsyncMock(),
         )
+        bot = AsyncMock()
+        await handle_answer(callback, state, bot)
+
+        callback.answer.assert_awaited_once_with()
+        bot.send_message.assert_awaited_once()
+        assert "/start" in bot.send_message.await_args.args[1]
+        assert state.state_name is None
+
+    asyncio.run(run_test())
+    assert QuizSessionRepository.get(10, 20) is None
+
+
+def test_duplicate_answers_are_processed_once(tmp_path, monkeypatch):
+    _use_temporary_database(tmp_path, monkeypatch)
+    quiz = QuizSessionRepository.start(10, 20, "bash", "junior", 2)
+    first_data, second_data = _answer_data(quiz, 0), _answer_data(quiz, 1)
+
+    async def run_test():
+        state = FakeState({"level": "junior"})
         message = SimpleNamespace(
             chat=SimpleNamespace(id=10),
             answer=AsyncMock(),
@@ -196,15 +457,15 @@ def test_duplicate_answers_are_processed_once():
             photo=None,
             reply_markup=InlineKeyboardMarkup(
                 inline_keyboard=[
-                    [InlineKeyboardButton(text="First", callback_data="ans:0:0")],
-                    [InlineKeyboardButton(text="Second", callback_data="ans:0:1")],
+                    [InlineKeyboardButton(text="First", callback_data=first_data)],
+                    [InlineKeyboardButton(text="Second", callback_data=second_data)],
                 ]
             ),
         )
 
         def callback():
             return SimpleNamespace(
-                data="ans:0:1",
+                data=second_data,
                 message=message,
                 from_user=SimpleNamespace(id=20),
                 answer=AsyncMock(),
@@ -229,7 +490,7 @@ def test_duplicate_answers_are_processed_once():
             ),
             patch(
                 "bot.handlers.quiz.QuizService.get_question",
-                return_value={"question": "Test question"},
+                return_value=Question({"question": "Test question"}, 0, 2),
             ),
             patch(
                 "bot.handlers.quiz.ask_question", new_callable=AsyncMock
@@ -240,9 +501,10 @@ def test_duplicate_answers_are_processed_once():
                 handle_answer(duplicate, state, AsyncMock()),
             )
 
-        assert state.data["idx"] == 1
-        assert state.data["score"] == 1
-        assert state.data["results"] == [{"idx": 0, "correct": True}]
+        quiz = QuizSessionRepository.get(10, 20)
+        assert quiz.idx == 1
+        assert quiz.score == 1
+        assert quiz.get_results() == [True]
         check_answer.assert_called_once()
         ask_question.assert_awaited_once()
         message.edit_text.assert_awaited_once()
@@ -262,6 +524,176 @@ def test_duplicate_answers_are_processed_once():
     asyncio.run(run_test())
 
 
+def test_answer_calls_run_concurrently_and_fallback_follows_next_question(
+    tmp_path, monkeypatch
+):
+    _use_temporary_database(tmp_path, monkeypatch)
+    quiz = QuizSessionRepository.start(10, 20, "bash", "junior", 2)
+    events = []
+
+    def call(name, error=None):
+        async def side_effect(*args, **kwargs):
+            events.append(f"{name} started")
+            await asyncio.sleep(0.01)
+            events.append(f"{name} done")
+            if error:
+                raise error
+
+        return side_effect
+
+    async def run_test():
+        edit_error = TelegramBadRequest(
+            EditMessageText(text=""), "message can't be edited"
+        )
+        message = SimpleNamespace(
+            chat=SimpleNamespace(id=10),
+            edit_text=AsyncMock(side_effect=call("edit", edit_error)),
+            reply=AsyncMock(side_effect=call("fallback")),
+            photo=None,
+            reply_markup=None,
+        )
+        callback = SimpleNamespace(
+            data=_answer_data(quiz, 0),
+            message=message,
+            from_user=SimpleNamespace(id=20),
+            answer=AsyncMock(side_effect=call("answer")),
+        )
+
+        with (
+            patch("bot.handlers.quiz.QuizService.check_answer", return_value=False),
+            patch("bot.handlers.quiz.QuizService.get_question_count", return_value=2),
+            patch(
+                "bot.handlers.quiz.ask_question",
+                side_effect=call("next question"),
+            ),
+        ):
+            await handle_answer(callback, FakeState({}), AsyncMock())
+
+    asyncio.run(run_test())
+
+    assert events[:3] == ["edit started", "answer started", "next question started"]
+    assert events[-2:] == ["fallback started", "fallback done"]
+    assert events.index("next question done") < events.index("fallback started")
+
+
+def test_compact_mode_edits_next_question_into_the_same_message(tmp_path, monkeypatch):
+    _use_temporary_database(tmp_path, monkeypatch)
+    monkeypatch.setattr("bot.handlers.quiz.quiz_compact_mode", True)
+    quiz = QuizSessionRepository.start(10, 20, "bash", "junior", 2)
+    questions = [
+        Question({"question": "First?", "options": ["a", "b"], "correct": 0}, 0, 2),
+        Question({"question": "Second?", "options": ["c", "d"], "correct": 1}, 1, 2),
+    ]
+
+    async def run_test():
+        message = SimpleNamespace(
+            chat=SimpleNamespace(id=10),
+            answer=AsyncMock(),
+            edit_text=AsyncMock(),
+            photo=None,
+            reply_markup=None,
+        )
+        callback = SimpleNamespace(
+            data=_answer_data(quiz, 0),
+            message=message,
+            from_user=SimpleNamespace(id=20),
+            answer=AsyncMock(),
+        )
+
+        with patch(
+            "bot.handlers.quiz.QuizService.get_questions", return_value=questions
+        ):
+            await handle_answer(callback, FakeState({}), AsyncMock())
+
+        message.answer.assert_not_awaited()
+        message.edit_text.assert_awaited_once()
+        assert message.edit_text.await_args.args == (
+            "_Вопрос 1:_ ✅ Верно\\!\n*Ответ:* a\n\n" "❓ _Вопрос 2 из 2_\n\n*Second?*",
+        )
+        rows = message.edit_text.await_args.kwargs["reply_markup"].inline_keyboard
+        assert sorted(row[0].callback_data for row in rows[:2]) == sorted(
+            [_answer_data(quiz, 0, idx=1), _answer_data(quiz, 1, idx=1)]
+        )
+        assert decode_callback(rows[2][0].callback_data) == (
+            REFERENCE_MESSAGE_PREFIX,
+            QuizCallback("bash", "junior", 0, is_correct=True, version=quiz.version),
+        )
+        callback.answer.assert_awaited_once_with("✅ Верно!")
+
+    asyncio.run(run_test())
+
+
+def test_results_are_paginated_and_pages_rendered_on_demand(tmp_path, monkeypatch):
+    _use_temporary_database(tmp_path, monkeypatch)
+    UserRepository.create(20, "Test")
+    quiz = QuizSessionRepository.start(10, 20, "bash", "junior", 25)
+    for idx in range(25):
+        QuizSessionRepository.record_answer(quiz, idx % 2 == 0)
+    long_text = "Очень длинный вопрос о *разметке* " * 20
+    question = Question(
+        {"question": long_text, "options": [long_text, "b"], "correct": 0}, 0, 25
+    )
+    bot = SimpleNamespace(send_message=AsyncMock())
+    monkeypatch.setattr(
+        "bot.handlers.quiz.UserService.schedule_pinned_score", lambda *args: None
+    )
+
+    async def run_test():
+        with patch(
+            "bot.handlers.quiz.QuizService.get_question", return_value=question
+        ) as get_question:
+            await show_results(bot, FakeState({}), quiz)
+            assert get_question.call_count == 10
+
+            text = bot.send_message.await_args.args[1]
+            rows = bot.send_message.await_args.kwargs["reply_markup"].inline_keyboard
+            assert len(text) < 4096
+            assert "*Вопрос 10:*" in text and "Вопрос 11" not in text
+            assert "_Страница 1 из 3_" in text
+            assert [button.text for button in rows[0]] == ["Вперёд ▶️"]
+
+            message = SimpleNamespace(
+                chat=SimpleNamespace(id=10), edit_text=AsyncMock()
+            )
+            callback = SimpleNamespace(
+                data=rows[0][0].callback_data,
+                message=message,
+                from_user=SimpleNamespace(id=20),
+                answer=AsyncMock(),
+            )
+            await show_results_page(callback)
+            assert get_question.call_count == 20
+
+        text = message.edit_text.await_args.args[0]
+        rows = message.edit_text.await_args.kwargs["reply_markup"].inline_keyboard
+        assert len(text) < 4096
+        assert "*Вопрос 11:*" in text and "*Вопрос 20:*" in text
+        assert "_Страница 2 из 3_" in text
+        assert [button.text for button in rows[0]] == ["◀️ Назад", "Вперёд ▶️"]
+        callback.answer.assert_awaited_once_with()
+
+        # A newer quiz replaces the report behind the old buttons
+        newer = QuizSessionRepository.start(10, 20, "bash", "junior", 1)
+        QuizSessionRepository.record_answer(newer, True)
+        with patch("bot.handlers.quiz.QuizService.get_question", return_value=question):
+            await show_results(bot, FakeState({}), newer)
+        stale = SimpleNamespace(
+            data=rows[0][0].callback_data,
+            message=message,
+            from_user=SimpleNamespace(id=20),
+            answer=AsyncMock(),
+        )
+        await show_results_page(stale)
+        stale.answer.assert_awaited_once_with(
+            "⚠️ Эти результаты больше недоступны", show_alert=True
+        )
+
+    asyncio.run(run_test())
+
+    assert QuizSessionRepository.get(10, 20) is None
+    assert UserRepository.get_by_telegram_id(20).junior_correct == 14
+
+
 def test_answered_keyboard_marks_incorrect_selection():
     keyboard = InlineKeyboardMarkup(
         inline_keyboard=[
@@ -353,6 +785,33 @@ def test_answer_feedback_omits_missing_reference():
     )
 
 
+def test_answered_text_is_rendered_once_per_content_version():
+    question = Question(
+        {"question": "Что делает ls?", "options": ["ls -la", "pwd"], "correct": 0},
+        0,
+        1,
+    )
+    with (
+        patch(
+            "bot.handlers.quiz.QuizService.get_question", return_value=question
+        ) as get_question,
+        patch(
+            "bot.handlers.quiz.QuizService.get_correct_answer",
+            return_value="ls -la",
+        ),
+    ):
+        first = _build_answered_question_text("bash", "junior", 0, True, version=1)
+        second = _build_answered_question_text("bash", "junior", 0, True, version=1)
+        _build_answered_question_text("bash", "junior", 0, True, version=2)
+
+    assert first is second
+    assert first.startswith(question.header)
+    assert get_question.call_count == 2
+    stats = render_cache_stats()
+    assert stats["hits"] == 1
+    assert stats["hit_rate"] == 0.2
+
+
 def test_reference_keyboard_is_shown_without_manual_reference():
     keyboard = _build_reference_keyboard("bash", "junior", 0, True)
 
@@ -363,7 +822,7 @@ def test_show_reference_expands_answer_message():
     async def run_test():
         message = SimpleNamespace(edit_text=AsyncMock(), photo=None)
         callback = SimpleNamespace(
-            data="ref:bash:junior:0:1",
+            data=_reference_data(True),
             message=message,
             answer=AsyncMock(),
         )
@@ -371,7 +830,7 @@ def test_show_reference_expands_answer_message():
         with (
             patch(
                 "bot.handlers.quiz.QuizService.get_question",
-                return_value={"question": "What does echo do?"},
+                return_value=Question({"question": "What does echo do?"}, 0, 20),
             ),
             patch("bot.handlers.quiz.QuizService.get_question_count", return_value=20),
             patch(
@@ -402,7 +861,7 @@ def test_show_reference_edits_photo_caption():
     async def run_test():
         message = SimpleNamespace(edit_caption=AsyncMock(), photo=[object()])
         callback = SimpleNamespace(
-            data="ref:bash:junior:0:0",
+            data=_reference_data(False),
             message=message,
             answer=AsyncMock(),
         )
@@ -410,7 +869,7 @@ def test_show_reference_edits_photo_caption():
         with (
             patch(
                 "bot.handlers.quiz.QuizService.get_question",
-                return_value={"question": "Photo question"},
+                return_value=Question({"question": "Photo question"}, 0, 1),
             ),
             patch("bot.handlers.quiz.QuizService.get_question_count", return_value=1),
             patch(
@@ -435,3 +894,91 @@ def test_show_reference_edits_photo_caption():
         )
 
     asyncio.run(run_test())
+
+
+def test_pinned_score_updates_are_coalesced_and_skip_unchanged_text(
+    tmp_path, monkeypatch
+):
+    _use_temporary_database(tmp_path, monkeypatch)
+    UserRepository.create(20, "Alex")
+    updater = PinnedScoreUpdater(delay=0.01)
+    bot = SimpleNamespace(
+        send_message=AsyncMock(return_value=SimpleNamespace(message_id=5)),
+        pin_chat_message=AsyncMock(),
+        edit_message_text=AsyncMock(),
+    )
+
+    async def run_test():
+        for _ in range(3):
+            updater.schedule(bot, 20, 10)
+        await updater.flush()
+
+        # Changing the level does not change the card
+        UserRepository.update_level(20, "middle")
+        updater.schedule(bot, 20, 10)
+        await updater.flush()
+
+        UserRepository.add_to_scores(20, "junior", 1, 1)
+        updater.schedule(bot, 20, 10)
+        await updater.flush()
+
+    asyncio.run(run_test())
+
+    bot.send_message.assert_awaited_once()
+    bot.pin_chat_message.assert_awaited_once()
+    bot.edit_message_text.assert_awaited_once()
+    assert "*Junior:* 1 из 1" in bot.edit_message_text.await_args.kwargs["text"]
+    assert UserRepository.get_pinned_message_id(20) == 5
+    assert updater.stats() == {"scheduled": 5, "sent": 2, "skipped": 1, "pending": 0}
+
+
+def test_poll_answers_are_scored_in_one_batch(tmp_path, monkeypatch):
+    _use_temporary_database(tmp_path, monkeypatch)
+    monkeypatch.setattr("bot.handlers.quiz.quiz_poll_mode", True)
+    questions = [
+        Question({"question": "First?", "options": ["a", "b"], "correct": 0}, 0, 2),
+        Question({"question": "Second?", "options": ["c", "d"], "correct": 1}, 1, 2),
+    ]
+    for user_id in (20, 21, 22):
+        QuizSessionRepository.start(user_id, user_id, "bash", "junior", 2)
+        QuizSessionRepository.set_poll(user_id, user_id, f"poll-{user_id}")
+    bot = SimpleNamespace(
+        id=1,
+        send_poll=AsyncMock(
+            return_value=SimpleNamespace(poll=SimpleNamespace(id="next"))
+        ),
+    )
+    storage = MemoryStorage()
+
+    def poll_answer(poll_id, user_id, option):
+        return PollAnswer(
+            poll_id=poll_id,
+            user={"id": user_id, "is_bot": False, "first_name": "Test"},
+            option_ids=[option],
+        )
+
+    async def run_test():
+        batcher = PollAnswerBatcher(interval=0.01, batch_size=10)
+        batcher.add(poll_answer("poll-20", 20, 0), bot, storage)
+        batcher.add(poll_answer("poll-20", 20, 1), bot, storage)
+        batcher.add(poll_answer("poll-21", 21, 0), bot, storage)
+        batcher.add(poll_answer("poll-21", 99, 0), bot, storage)
+        batcher.add(poll_answer("unknown", 20, 0), bot, storage)
+        # In a group another member may vote before the quiz owner
+        batcher.add(poll_answer("poll-22", 99, 1), bot, storage)
+        batcher.add(poll_answer("poll-22", 22, 0), bot, storage)
+        with patch(
+            "bot.services.quiz_service.QuizService.get_questions",
+            return_value=questions,
+        ):
+            await batcher.flush()
+        assert (batcher.batches, batcher.recorded) == (1, 3)
+
+    asyncio.run(run_test())
+
+    for user_id in (20, 21, 22):
+        quiz = QuizSessionRepository.get(user_id, user_id)
+        assert (quiz.idx, quiz.score, quiz.poll_id) == (1, 1, "next")
+    assert bot.send_poll.await_count == 3
+    assert bot.send_poll.await_args.kwargs["question"] == "2/2. Second?"
+    assert bot.send_poll.await_args.kwargs["correct_option_id"] == 1
@@ -1,13 +1,21 @@
 import asyncio
+import threading
 from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 
+from aiogram import Bot, Dispatcher
+from aiogram.fsm.context import FSMContext
 from aiogram.fsm.storage.base import StorageKey
-from sqlalchemy import create_engine
+from aiogram.types import FSInputFile, Message, Update
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 
-from bot.db.fsm_storage import SQLiteStorage
-from bot.db.models import Base, User
-from bot.db.repository import UserRepository
+from bot.cache import LRUCache
+from bot.db.fsm_storage import SQLiteStorage, _current_scope
+from bot.db.models import Base, QuizSession, User, migrate_scores
+from bot.db.repository import FSMRepository, QuizSessionRepository, UserRepository
+from bot.middlewares import FSMScopeMiddleware
+from bot.services.image_service import ImageService
 
 
 def _temporary_session_factory(tmp_path):
@@ -33,6 +41,31 @@ def test_fsm_state_survives_storage_recreation(tmp_path, monkeypatch):
     asyncio.run(exercise_storage())
 
 
+def test_fsm_storage_does_not_block_event_loop(tmp_path, monkeypatch):
+    sessions = _temporary_session_factory(tmp_path)
+    monkeypatch.setattr("bot.db.repository.get_session", sessions)
+    key = StorageKey(bot_id=1, chat_id=2, user_id=3)
+    threads = []
+    original_get = FSMRepository.get
+
+    def recording_get(storage_key):
+        threads.append(threading.current_thread())
+        return original_get(storage_key)
+
+    monkeypatch.setattr(FSMRepository, "get", staticmethod(recording_get))
+
+    async def exercise_storage():
+        storage = SQLiteStorage()
+        await storage.set_data(key, {"idx": 1})
+        assert await storage.get_data(key) == {"idx": 1}
+        await storage.close()
+
+    asyncio.run(exercise_storage())
+
+    assert threads
+    assert all(thread is not threading.main_thread() for thread in threads)
+
+
 def test_score_increments_are_atomic(tmp_path, monkeypatch):
     sessions = _temporary_session_factory(tmp_path)
     monkeypatch.setattr("bot.db.repository.get_session", sessions)
@@ -53,3 +86,299 @@ def test_score_increments_are_atomic(tmp_path, monkeypatch):
     assert all(result is not None for result in results)
     scores = UserRepository.get_by_telegram_id(42).get_scores("junior")
     assert scores == {"correct": increments, "total": increments}
+
+
+def test_update_scope_costs_one_select_and_one_upsert(tmp_path, monkeypatch):
+    sessions = _temporary_session_factory(tmp_path)
+    monkeypatch.setattr("bot.db.repository.get_session", sessions)
+    storage = SQLiteStorage()
+    dp = Dispatcher(storage=storage, disable_fsm=True)
+    dp.update.outer_middleware(FSMScopeMiddleware(storage))
+    dp.update.outer_middleware(dp.fsm)
+    scopes = []
+
+    @dp.message()
+    async def handler(message: Message, state: FSMContext) -> None:
+        scopes.append(_current_scope.get())
+        data = await state.get_data()
+        await state.update_data(idx=data.get("idx", 0) + 1)
+        await state.get_data()
+        await state.set_state("QuizState:answering")
+
+    update = Update.model_validate(
+        {
+            "update_id": 1,
+            "message": {
+                "message_id": 1,
+                "date": 0,
+                "chat": {"id": 2, "type": "private"},
+                "from": {"id": 3, "is_bot": False, "first_name": "Student"},
+                "text": "hello",
+            },
+        }
+    )
+
+    async def feed_updates():
+        bot = Bot(token="1:TEST")
+        await dp.feed_update(bot, update)
+        await dp.feed_update(bot, update)
+        await bot.session.close()
+
+    asyncio.run(feed_updates())
+
+    assert [(scope.selects, scope.upserts) for scope in scopes] == [(1, 1), (1, 1)]
+    assert storage.select_count == 2
+    assert storage.upsert_count == 2
+    assert FSMRepository.get(
+        SQLiteStorage._key(StorageKey(bot_id=1, chat_id=2, user_id=3))
+    ) == ("QuizState:answering", {"idx": 2})
+
+
+def test_concurrent_updates_share_cached_record(tmp_path, monkeypatch):
+    sessions = _temporary_session_factory(tmp_path)
+    monkeypatch.setattr("bot.db.repository.get_session", sessions)
+    key = StorageKey(bot_id=1, chat_id=2, user_id=3)
+
+    async def exercise_storage():
+        storage = SQLiteStorage()
+        first_wrote = asyncio.Event()
+
+        async def first_update():
+            async with storage.update_scope():
+                await storage.get_data(key)
+                await storage.set_data(key, {"idx": 1})
+                first_wrote.set()
+                await asyncio.sleep(0.01)
+
+        async def second_update():
+            async with storage.update_scope():
+                await storage.get_state(key)
+                await first_wrote.wait()
+                return await storage.get_data(key)
+
+        _, seen = await asyncio.gather(first_update(), second_update())
+        assert seen == {"idx": 1}
+        assert await SQLiteStorage().get_data(key) == {"idx": 1}
+
+    asyncio.run(exercise_storage())
+
+
+def test_write_behind_batches_dirty_records(tmp_path, monkeypatch):
+    sessions = _temporary_session_factory(tmp_path)
+    monkeypatch.setattr("bot.db.repository.get_session", sessions)
+    keys = [StorageKey(bot_id=1, chat_id=chat_id, user_id=3) for chat_id in (1, 2, 3)]
+
+    async def exercise_storage():
+        storage = SQLiteStorage(write_behind=True, flush_interval=60, flush_batch=2)
+        await storage.set_data(keys[0], {"idx": 1})
+        await storage.set_state(keys[0], "QuizState:answering")
+        assert await SQLiteStorage().get_state(keys[0]) is None
+
+        await storage.set_data(keys[1], {"idx": 2})
+        for _ in range(10):
+            if storage.flush_count:
+                break
+            await asyncio.sleep(0.01)
+        assert storage.flush_count == 1
+        assert await SQLiteStorage().get_state(keys[0]) == "QuizState:answering"
+        assert await SQLiteStorage().get_data(keys[1]) == {"idx": 2}
+
+        await storage.set_data(keys[2], {"idx": 3})
+        assert await storage.get_data(keys[2]) == {"idx": 3}
+        assert await SQLiteStorage().get_data(keys[2]) == {}
+
+        await storage.close()
+        assert storage.flush_count == 2
+        assert await SQLiteStorage().get_data(keys[2]) == {"idx": 3}
+
+    asyncio.run(exercise_storage())
+
+
+def test_write_behind_cache_evicts_only_clean_records(tmp_path, monkeypatch):
+    sessions = _temporary_session_factory(tmp_path)
+    monkeypatch.setattr("bot.db.repository.get_session", sessions)
+    keys = [StorageKey(bot_id=1, chat_id=chat_id, user_id=3) for chat_id in (1, 2, 3)]
+
+    async def exercise_storage():
+        storage = SQLiteStorage(
+            write_behind=True, cache_size=1, flush_interval=60, flush_batch=100
+        )
+        for index, key in enumerate(keys):
+            await storage.set_data(key, {"idx": index})
+        assert len(storage._records) == 3
+
+        await storage.flush()
+        assert len(storage._records) == 1
+        assert await storage.get_data(keys[0]) == {"idx": 0}
+        await storage.close()
+
+    asyncio.run(exercise_storage())
+
+
+def test_quiz_answers_are_fixed_size_updates(tmp_path, monkeypatch):
+    sessions = _temporary_session_factory(tmp_path)
+    monkeypatch.setattr("bot.db.repository.get_session", sessions)
+
+    quiz = QuizSessionRepository.start(2, 3, "bash", "junior", 20)
+    assert len(quiz.answers) == 3
+
+    for is_correct in (True, False, True):
+        assert QuizSessionRepository.record_answer(quiz, is_correct)
+
+    stale = QuizSessionRepository.get(2, 3)
+    stale.idx = 1
+    assert not QuizSessionRepository.record_answer(stale, True)
+
+    stored = QuizSessionRepository.get(2, 3)
+    assert (stored.idx, stored.score) == (3, 2)
+    assert stored.get_results() == [True, False, True]
+    assert len(stored.answers) == 3
+
+    QuizSessionRepository.finish(2, 3)
+    assert QuizSessionRepository.get(2, 3) is None
+
+
+def test_parallel_answers_from_separate_connections_are_scored_once(
+    tmp_path, monkeypatch
+):
+    # Every worker gets its own engine, like separate bot processes would
+    setup = _temporary_session_factory(tmp_path)
+    monkeypatch.setattr("bot.db.repository.get_session", setup)
+    QuizSessionRepository.start(2, 3, "bash", "junior", 20)
+
+    workers = 8
+    factories = [
+        sessionmaker(bind=create_engine(f"sqlite:///{tmp_path / 'test.db'}"))
+        for _ in range(workers)
+    ]
+    quizzes = []
+    for factory in factories:
+        with factory() as session:
+            quizzes.append(session.get(QuizSession, (2, 3)))
+    barrier = threading.Barrier(workers)
+    local = threading.local()
+    monkeypatch.setattr("bot.db.repository.get_session", lambda: local.factory())
+
+    def click(worker: int) -> bool:
+        local.factory = factories[worker]
+        # All clicks read the question before any of them stores an answer
+        barrier.wait()
+        return QuizSessionRepository.record_answer(quizzes[worker], True)
+
+    with ThreadPoolExecutor(workers) as pool:
+        recorded = list(pool.map(click, range(workers)))
+
+    local.factory = setup
+    stored = QuizSessionRepository.get(2, 3)
+    assert sum(recorded) == 1
+    assert (stored.idx, stored.score) == (1, 1)
+
+
+def test_legacy_json_scores_are_migrated(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE TABLE users (id INTEGER PRIMARY KEY, telegram_id BIGINT, "
+                "name VARCHAR(100), level VARCHAR(20), scores_junior VARCHAR(100), "
+                "scores_middle VARCHAR(100), scores_senior VARCHAR(100), "
+                "pinned_message_id BIGINT)"
+            )
+        )
+        connection.execute(
+            text(
+                "INSERT INTO users (telegram_id, name, scores_junior, scores_middle) "
+                """VALUES (42, 'Legacy', '{"correct": 3, "total": 5}', NULL)"""
+            )
+        )
+
+    migrate_scores(engine)
+    migrate_scores(engine)
+    monkeypatch.setattr("bot.db.repository.get_session", sessionmaker(bind=engine))
+
+    user = UserRepository.add_to_scores(42, "junior", 1, 2)
+    assert user.get_all_scores() == {
+        "junior": {"correct": 4, "total": 7},
+        "middle": {"correct": 0, "total": 0},
+        "senior": {"correct": 0, "total": 0},
+    }
+
+
+def test_user_cache_is_read_through_and_invalidated_on_write(tmp_path, monkeypatch):
+    sessions = _temporary_session_factory(tmp_path)
+    monkeypatch.setattr("bot.db.repository.get_session", sessions)
+    UserRepository.create(42, "Cached user")
+
+    assert UserRepository.get_by_telegram_id(42).level is None
+    assert UserRepository.get_by_telegram_id(42).level is None
+    assert UserRepository.cache_stats() == {"hits": 1, "misses": 1, "size": 1}
+
+    UserRepository.update_level(42, "middle")
+    assert UserRepository.get_by_telegram_id(42).level == "middle"
+
+    UserRepository.add_to_scores(42, "middle", 1, 1)
+    user = UserRepository.get_by_telegram_id(42)
+    assert user.get_scores("middle") == {"correct": 1, "total": 1}
+    assert UserRepository.cache_stats()["misses"] == 3
+
+
+def test_lru_cache_expires_and_evicts_entries():
+    now = [0.0]
+    cache = LRUCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+
+    now[0] = 11
+    assert cache.get("a") is None
+
+    generation = cache.generation
+    cache.invalidate("c")
+    cache.set("c", 4, generation)
+    assert cache.get("c") is None
+
+
+def test_images_are_uploaded_once_per_content_hash(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        "bot.db.repository.get_session", _temporary_session_factory(tmp_path)
+    )
+    monkeypatch.setattr("bot.services.image_service.IMAGES_PATH", tmp_path)
+    monkeypatch.setattr(ImageService, "_digests", {})
+    monkeypatch.setattr(ImageService, "_file_ids", {})
+    monkeypatch.setattr(ImageService, "_upload_locks", {})
+    monkeypatch.setattr(ImageService, "uploads", 0)
+    image = tmp_path / "disk.png"
+    image.write_bytes(b"first")
+    sent = []
+
+    async def send_photo(chat_id, photo, **kwargs):
+        await asyncio.sleep(0)
+        sent.append(photo)
+        file_id = f"id-{len(sent)}" if isinstance(photo, FSInputFile) else photo
+        return SimpleNamespace(photo=[SimpleNamespace(file_id=file_id)])
+
+    bot = SimpleNamespace(send_photo=send_photo)
+
+    async def send_twice():
+        await asyncio.gather(
+            ImageService.send_photo(bot, 1, "disk.png", caption="a"),
+            ImageService.send_photo(bot, 2, "disk.png", caption="b"),
+        )
+
+    asyncio.run(send_twice())
+    assert isinstance(sent[0], FSInputFile)
+    assert sent[1] == "id-1"
+
+    # A restart keeps the file_id, which is stored in the database
+    ImageService._file_ids.clear()
+    asyncio.run(ImageService.send_photo(bot, 1, "disk.png"))
+    assert sent[2] == "id-1"
+
+    image.write_bytes(b"second version")
+    asyncio.run(ImageService.send_photo(bot, 1, "disk.png"))
+    asyncio.run(ImageService.send_photo(bot, 1, "disk.png"))
+    assert isinstance(sent[3], FSInputFile)
+    assert sent[4] == "id-4"
+    assert ImageService.uploads == 2
@@ -1,6 +1,10 @@
+import asyncio
 import json
 
-from bot.services.quiz_service import QuizService
+import pytest
+
+from bot.services.quiz_bank import build_bank, open_bank
+from bot.services.quiz_service import QUIZ_PATH, REFERENCES_PATH, QuizService
 
 
 def test_reference_is_loaded_from_references_file(tmp_path, monkeypatch):
@@ -33,6 +37,7 @@ def test_reference_is_loaded_from_references_file(tmp_path, monkeypatch):
     monkeypatch.setattr("bot.services.quiz_service.REFERENCES_PATH", references_path)
     monkeypatch.setattr(QuizService, "_quizzes", None)
     monkeypatch.setattr(QuizService, "_references", None)
+    monkeypatch.setattr(QuizService, "_index", None)
 
     assert QuizService.get_reference("bash", "junior", 0) == (
         "pwd показывает текущий каталог."
@@ -65,5 +70,130 @@ def test_missing_reference_returns_empty_string(tmp_path, monkeypatch):
     monkeypatch.setattr("bot.services.quiz_service.REFERENCES_PATH", references_path)
     monkeypatch.setattr(QuizService, "_quizzes", None)
     monkeypatch.setattr(QuizService, "_references", None)
+    monkeypatch.setattr(QuizService, "_index", None)
 
     assert QuizService.get_reference("bash", "junior", 0) == ""
+
+
+def test_questions_are_compiled_once_with_rendered_fields(tmp_path, monkeypatch):
+    quizzes_path = tmp_path / "quizzes.json"
+    references_path = tmp_path / "references.json"
+    quizzes_path.write_text(
+        json.dumps(
+            {
+                "bash": {
+                    "title": "Bash",
+                    "junior": [
+                        {
+                            "question": "Что выведет echo?\necho a.b",
+                            "options": ["a.b", "ab"],
+                            "correct": "0",
+                        }
+                    ],
+                }
+            }
+        ),
+        encoding="utf-8",
+    )
+    references_path.write_text(
+        json.dumps({"bash": {"junior": {"0": " one \n\n two\nthree\nfour"}}}),
+        encoding="utf-8",
+    )
+
+    monkeypatch.setattr("bot.services.quiz_service.QUIZ_PATH", quizzes_path)
+    monkeypatch.setattr("bot.services.quiz_service.REFERENCES_PATH", references_path)
+    monkeypatch.setattr(QuizService, "_quizzes", None)
+    monkeypatch.setattr(QuizService, "_references", None)
+    monkeypatch.setattr(QuizService, "_index", None)
+
+    question = QuizService.get_question("bash", "junior", 0)
+
+    assert question is QuizService.get_question("bash", "junior", 0)
+    assert question.header == "❓ _Вопрос 1 из 1_\n\n*Что выведет echo?*\necho a\\.b"
+    assert question.correct_answer == "a.b"
+    assert question.reference == "one\ntwo"
+    assert QuizService.check_answer("bash", "junior", 0, 0)
+    assert QuizService.get_question("bash", "middle", 0) is None
+
+
+def test_reload_swaps_content_and_keeps_started_version(tmp_path, monkeypatch):
+    quizzes_path = tmp_path / "quizzes.json"
+    references_path = tmp_path / "references.json"
+
+    def write_quizzes(*texts):
+        questions = [
+            {"question": text, "options": ["A", "B"], "correct": 0} for text in texts
+        ]
+        quizzes_path.write_text(
+            json.dumps({"bash": {"title": "Bash", "junior": questions}}),
+            encoding="utf-8",
+        )
+
+    write_quizzes("First", "Second")
+    references_path.write_text(json.dumps({}), encoding="utf-8")
+    monkeypatch.setattr("bot.services.quiz_service.QUIZ_PATH", quizzes_path)
+    monkeypatch.setattr("bot.services.quiz_service.REFERENCES_PATH", references_path)
+    monkeypatch.setattr(QuizService, "_quizzes", None)
+    monkeypatch.setattr(QuizService, "_references", None)
+    monkeypatch.setattr(QuizService, "_index", None)
+    monkeypatch.setattr(QuizService, "_version", None)
+    monkeypatch.setattr(QuizService, "_versions", {})
+
+    started = QuizService.get_version()
+    write_quizzes("Only")
+
+    assert asyncio.run(QuizService.reload())
+    assert not asyncio.run(QuizService.reload())
+    assert QuizService.get_version() != started
+    assert QuizService.get_question_count("bash", "junior") == 1
+    assert QuizService.get_question("bash", "junior", 0).text == "Only"
+    assert QuizService.get_question_count("bash", "junior", version=started) == 2
+    assert QuizService.get_question("bash", "junior", 1, version=started).text == (
+        "Second"
+    )
+    # A version that is no longer kept has no questions instead of current ones
+    assert QuizService.has_version(started)
+    assert not QuizService.has_version(12345)
+    assert QuizService.get_question_count("bash", "junior", version=12345) == 0
+
+    quizzes_path.write_text(
+        json.dumps({"bash": {"junior": [{"question": "Broken", "options": []}]}}),
+        encoding="utf-8",
+    )
+    with pytest.raises(ValueError):
+        asyncio.run(QuizService.reload())
+    assert QuizService.get_question("bash", "junior", 0).text == "Only"
+
+
+def test_bank_matches_json_content_and_decodes_lazily(tmp_path, monkeypatch):
+    with QUIZ_PATH.open(encoding="utf-8") as f:
+        quizzes = json.load(f)
+    with REFERENCES_PATH.open(encoding="utf-8") as f:
+        references = json.load(f)
+    bank_path = tmp_path / "quizzes.bank"
+    build_bank(bank_path, quizzes, references)
+
+    version, index = QuizService.compile(quizzes, references)
+    bank_version, bank_index = open_bank(bank_path)
+
+    assert bank_version == version
+    assert bank_index.keys() == index.keys()
+    decoded = bank_index[("bash", "junior")]._bank.decoded
+    assert decoded.stats()["size"] == 0
+    bank_index[("bash", "junior")][0]
+    assert decoded.stats()["size"] == 1
+    for key, questions in index.items():
+        assert len(bank_index[key]) == len(questions)
+        for question, bank_question in zip(questions, bank_index[key]):
+            assert bank_question.header == question.header
+            assert bank_question.correct_answer == question.correct_answer
+            assert bank_question.reference == question.reference
+
+    monkeypatch.setattr("bot.services.quiz_service.BANK_PATH", bank_path)
+    monkeypatch.setattr(QuizService, "_index", None)
+    monkeypatch.setattr(QuizService, "_version", None)
+    monkeypatch.setattr(QuizService, "_versions", {})
+    assert QuizService.get_version() == version
+    assert QuizService.get_correct_answer("bash", "junior", 0) == (
+        index[("bash", "junior")][0].correct_answer
+    )
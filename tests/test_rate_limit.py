@@ -0,0 +1,74 @@
+import asyncio
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import AnswerCallbackQuery, SendMessage
+
+from bot.middlewares.rate_limit import RateLimitMiddleware, low_priority
+
+
+def test_chat_requests_are_paced_with_interactive_first():
+    async def run_test():
+        limiter = RateLimitMiddleware(global_rate=1000, chat_rate=50, chat_burst=1)
+        sent = []
+
+        async def make_request(bot, method):
+            sent.append(method.text)
+            return method.text
+
+        async def send(text):
+            return await limiter(make_request, None, SendMessage(chat_id=1, text=text))
+
+        async def send_background(text):
+            with low_priority():
+                return await send(text)
+
+        first = asyncio.create_task(send("first"))
+        await asyncio.sleep(0)
+        background = asyncio.create_task(send_background("background"))
+        await asyncio.sleep(0)
+        reply = asyncio.create_task(send("reply"))
+        await asyncio.gather(first, background, reply)
+
+        assert sent == ["first", "reply", "background"]
+        stats = limiter.stats()
+        assert stats["sent"] == 3
+        assert stats["delayed"] == 2
+        assert stats["max_queue"] == 2
+        assert stats["queued"] == 0
+
+    asyncio.run(run_test())
+
+
+def test_retry_after_requeues_request():
+    async def run_test():
+        limiter = RateLimitMiddleware(chat_rate=100, max_retries=1)
+        method = SendMessage(chat_id=1, text="hi")
+        calls = []
+
+        async def make_request(bot, method):
+            calls.append(method)
+            if len(calls) == 1:
+                raise TelegramRetryAfter(method, "Too Many Requests", retry_after=0)
+            return "ok"
+
+        assert await limiter(make_request, None, method) == "ok"
+        assert len(calls) == 2
+        assert limiter.stats()["retries"] == 1
+
+    asyncio.run(run_test())
+
+
+def test_requests_without_chat_are_not_limited():
+    async def run_test():
+        limiter = RateLimitMiddleware(global_rate=1, chat_rate=1, chat_burst=1)
+
+        async def make_request(bot, method):
+            return True
+
+        for _ in range(5):
+            await limiter(
+                make_request, None, AnswerCallbackQuery(callback_query_id="1")
+            )
+        assert limiter.stats()["sent"] == 0
+
+    asyncio.run(run_test())
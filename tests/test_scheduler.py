@@ -0,0 +1,152 @@
+import asyncio
+from types import SimpleNamespace
+
+from aiogram import Bot, Dispatcher
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.types import ErrorEvent, Message, Update
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from bot.db.fsm_storage import SQLiteStorage
+from bot.db.models import Base
+from bot.middlewares import FSMScopeMiddleware
+from bot.middlewares.scheduler import UpdateScheduler
+from bot.shutdown import register_shutdown_hooks
+
+
+def _message_update() -> Update:
+    return Update.model_validate(
+        {
+            "update_id": 1,
+            "message": {
+                "message_id": 1,
+                "date": 0,
+                "chat": {"id": 2, "type": "private"},
+                "from": {"id": 2, "is_bot": False, "first_name": "Test"},
+                "text": "hello",
+            },
+        }
+    )
+
+
+def test_scheduler_bounds_concurrency_and_holds_back_intake():
+    async def run_test():
+        scheduler = UpdateScheduler(concurrency=2, max_pending=4)
+        release = asyncio.Event()
+        running = 0
+        peak = 0
+
+        async def job():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await release.wait()
+            running -= 1
+
+        for user in range(4):
+            await scheduler.submit(user, job())
+        await asyncio.sleep(0)
+
+        # The fifth update is not accepted while four are pending
+        fifth = asyncio.create_task(scheduler.submit(4, job()))
+        await asyncio.sleep(0.01)
+        assert not fifth.done()
+        stats = scheduler.stats()
+        assert (stats["running"], stats["queued"], stats["throttled"]) == (2, 2, 1)
+
+        release.set()
+        await fifth
+        await scheduler.join()
+        assert peak == 2
+        stats = scheduler.stats()
+        assert (stats["processed"], stats["queued"], stats["max_queue"]) == (5, 0, 4)
+        assert stats["wait_p50_ms"] <= stats["wait_p99_ms"]
+
+    asyncio.run(run_test())
+
+
+def test_scheduler_middleware_orders_updates_of_one_user():
+    async def run_test():
+        scheduler = UpdateScheduler(concurrency=10)
+        handled = []
+
+        async def handler(event, data):
+            await asyncio.sleep(0.02 if event.update_id == 1 else 0)
+            handled.append(event.update_id)
+
+        def data(user_id):
+            return {"event_from_user": SimpleNamespace(id=user_id)}
+
+        await scheduler(handler, SimpleNamespace(update_id=1), data(7))
+        await scheduler(handler, SimpleNamespace(update_id=2), data(8))
+        await scheduler(handler, SimpleNamespace(update_id=3), data(7))
+        # Updates without a user or chat are independent of each other
+        await scheduler(handler, SimpleNamespace(update_id=4), {})
+        await scheduler.join()
+
+        assert handled.index(1) < handled.index(3)
+        assert handled.index(2) < handled.index(1)
+        assert handled.index(4) < handled.index(1)
+
+    asyncio.run(run_test())
+
+
+def test_shutdown_finishes_queued_updates_before_closing_storage(
+    tmp_path, monkeypatch
+):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr("bot.db.repository.get_session", sessionmaker(bind=engine))
+
+    async def run_test():
+        storage = SQLiteStorage(write_behind=True, flush_interval=60)
+        dp = Dispatcher(storage=storage, disable_fsm=True)
+        scheduler = UpdateScheduler()
+        dp.update.outer_middleware(scheduler)
+        dp.update.outer_middleware(FSMScopeMiddleware(storage))
+        dp.update.outer_middleware(dp.fsm)
+        register_shutdown_hooks(dp, scheduler.join)
+
+        @dp.message()
+        async def on_message(message: Message, state: FSMContext):
+            await asyncio.sleep(0.02)
+            await state.set_state("QuizState:answering")
+
+        bot = Bot(token="1:TEST")
+        update = _message_update()
+        await dp.feed_update(bot, update)
+        assert scheduler.stats()["processed"] == 0
+        await dp.emit_shutdown(bot=bot)
+
+        assert scheduler.stats()["processed"] == 1
+        key = StorageKey(bot_id=1, chat_id=2, user_id=2)
+        assert await SQLiteStorage().get_state(key) == "QuizState:answering"
+
+    asyncio.run(run_test())
+
+
+def test_failures_of_queued_updates_reach_error_handlers():
+    async def run_test():
+        dp = Dispatcher()
+        scheduler = UpdateScheduler(dispatcher=dp)
+        dp.update.outer_middleware(scheduler)
+        errors = []
+
+        @dp.message()
+        async def on_message(message: Message):
+            await asyncio.sleep(0.01)
+            raise RuntimeError("handler failure")
+
+        @dp.errors()
+        async def on_error(event: ErrorEvent):
+            errors.append(str(event.exception))
+
+        update = _message_update()
+        await dp.feed_update(Bot(token="1:TEST"), update)
+        await scheduler.join()
+
+        assert errors == ["handler failure"]
+        assert scheduler.stats()["run_p50_ms"] >= 10
+
+    asyncio.run(run_test())
@@ -0,0 +1,72 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from bot.middlewares.throttle import CallbackThrottleMiddleware
+
+
+def _update(user_id, data):
+    return SimpleNamespace(
+        callback_query=SimpleNamespace(
+            from_user=SimpleNamespace(id=user_id), data=data, answer=AsyncMock()
+        )
+    )
+
+
+def test_repeated_clicks_are_answered_without_reaching_handlers():
+    now = 0.0
+    throttle = CallbackThrottleMiddleware(window=1.0, clock=lambda: now)
+    handler = AsyncMock(return_value="handled")
+
+    async def click(user_id, data):
+        update = _update(user_id, data)
+        return update, await throttle(handler, update, {})
+
+    async def run_test():
+        nonlocal now
+        first, result = await click(1, "A1")
+        assert result == "handled"
+        first.callback_query.answer.assert_not_awaited()
+
+        # The empty answer does not hold back the caller
+        answered = asyncio.Event()
+        repeated = _update(1, "A1")
+        repeated.callback_query.answer.side_effect = answered.wait
+        assert await throttle(handler, repeated, {}) is None
+        assert len(throttle._answers) == 1
+        answered.set()
+        await asyncio.sleep(0)
+        repeated.callback_query.answer.assert_awaited_once_with()
+        await asyncio.sleep(0)
+        assert not throttle._answers
+
+        # Another button or another user is not a repeat
+        await click(1, "A2")
+        await click(2, "A1")
+
+        now = 1.5
+        _, result = await click(1, "A1")
+        assert result == "handled"
+
+        # Updates other than callback queries pass through
+        message = SimpleNamespace(callback_query=None)
+        assert await throttle(handler, message, {}) == "handled"
+
+    asyncio.run(run_test())
+
+    assert handler.await_count == 5
+    assert throttle.suppressed == 1
+
+
+def test_throttle_memory_is_bounded():
+    throttle = CallbackThrottleMiddleware(window=60, max_entries=3, clock=lambda: 0)
+    handler = AsyncMock()
+
+    async def run_test():
+        for user_id in range(10):
+            await throttle(handler, _update(user_id, "A1"), {})
+
+    asyncio.run(run_test())
+
+    assert len(throttle._seen) == 3
+    assert handler.await_count == 10
@@ -0,0 +1,57 @@
+import asyncio
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Message
+from aiohttp.test_utils import TestClient, TestServer
+
+from bot.webhook import create_app
+
+
+def _update(update_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": 1, "type": "private"},
+            "from": {"id": 1, "is_bot": False, "first_name": "Test"},
+            "text": "hello",
+        },
+    }
+
+
+def test_webhook_checks_secret_and_feeds_updates():
+    async def run_test():
+        dp = Dispatcher()
+        received = []
+        started = []
+
+        @dp.message()
+        async def on_message(message: Message):
+            received.append(message.message_id)
+
+        dp.startup.register(lambda: started.append(True))
+        app = create_app(dp, Bot(token="1:TEST"), "/hook", secret_token="s3cret")
+
+        async with TestClient(TestServer(app)) as client:
+            assert started == [True]
+
+            rejected = await client.post("/hook", json=_update(1))
+            assert rejected.status == 401
+
+            for update_id in range(2, 12):
+                response = await client.post(
+                    "/hook",
+                    json=_update(update_id),
+                    headers={"X-Telegram-Bot-Api-Secret-Token": "s3cret"},
+                )
+                assert response.status == 200
+
+            for _ in range(100):
+                if len(received) == 10:
+                    break
+                await asyncio.sleep(0.01)
+
+        assert sorted(received) == list(range(2, 12))
+
+    asyncio.run(run_test())
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import sys
+
+from aiogram.types import Update
+
+from bot.middlewares import UpdateScheduler
+from bot.workers import WorkerPool, dump_update, serve_updates, shard_key
+
+
+def _message(update_id: int, user_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Test"},
+            "text": "hello",
+        },
+    }
+
+
+def test_shard_key_uses_the_user_of_any_update_type():
+    callback = {
+        "update_id": 2,
+        "callback_query": {
+            "id": "1",
+            "from": {"id": 42, "is_bot": False, "first_name": "Test"},
+            "chat_instance": "1",
+            "data": "ans:0",
+        },
+    }
+    poll_answer = {
+        "update_id": 3,
+        "poll_answer": {"poll_id": "p", "user": {"id": 42}, "option_ids": [0]},
+    }
+    channel_post = {
+        "update_id": 4,
+        "channel_post": {"message_id": 1, "date": 0, "chat": {"id": -100}},
+    }
+
+    assert shard_key(_message(1, 42)) == 42
+    assert shard_key(callback) == 42
+    assert shard_key(poll_answer) == 42
+    assert shard_key(channel_post) == -100
+    assert shard_key({"update_id": 5}) == 5
+
+
+def test_polled_updates_are_routed_by_their_user():
+    callback = Update.model_validate(
+        {
+            "update_id": 77,
+            "callback_query": {
+                "id": "1",
+                "from": {"id": 42, "is_bot": False, "first_name": "Test"},
+                "chat_instance": "1",
+                "data": "A",
+            },
+        }
+    )
+    message = Update.model_validate(_message(78, 43))
+
+    assert shard_key(dump_update(callback)) == 42
+    assert shard_key(dump_update(message)) == 43
+    # Workers parse the dump back into the same update
+    assert Update.model_validate(dump_update(callback)) == callback
+
+
+def test_served_updates_keep_order_per_user_and_run_users_concurrently():
+    async def run_test():
+        reader = asyncio.StreamReader()
+        # User 1's first update is the slowest and must still be handled first
+        updates = [_message(1, 1), _message(2, 2), _message(3, 1), _message(4, 2)]
+        for update in updates:
+            reader.feed_data(json.dumps(update).encode("utf-8") + b"\n")
+        reader.feed_eof()
+
+        scheduler = UpdateScheduler(concurrency=10)
+        handled = []
+
+        async def handle(update: dict) -> None:
+            await asyncio.sleep(0.05 if update["update_id"] == 1 else 0.01)
+            handled.append(update["update_id"])
+            if update["update_id"] == 4:
+                raise RuntimeError("handler failure")
+
+        await serve_updates(
+            reader, lambda update: scheduler.submit(shard_key(update), handle(update))
+        )
+        await scheduler.join()
+
+        assert sorted(handled) == [1, 2, 3, 4]
+        assert handled.index(1) < handled.index(3)
+        assert handled.index(2) < handled.index(4)
+        assert handled.index(4) < handled.index(1)
+        assert scheduler.stats()["processed"] == 4
+
+    asyncio.run(run_test())
+
+
+class _RecordingPool(WorkerPool):
+    """Pool whose workers append received lines to a file."""
+
+    def __init__(self, size, path):
+        super().__init__(size, restart_delay=0)
+        self.path = path
+
+    async def _spawn(self, index):
+        script = (
+            "import sys\n"
+            "for line in sys.stdin:\n"
+            f"    with open({str(self.path)!r}, 'a') as f:\n"
+            "        f.write(line)\n"
+        )
+        return await asyncio.create_subprocess_exec(
+            sys.executable, "-c", script, stdin=asyncio.subprocess.PIPE
+        )
+
+
+def test_pool_restarts_an_exited_worker_and_routes_to_it(tmp_path):
+    async def run_test():
+        path = tmp_path / "received.jsonl"
+        pool = _RecordingPool(1, path)
+        await pool.start()
+        await pool.route(_message(1, 1))
+        pool._processes[0].kill()
+        await pool._processes[0].wait()
+
+        await asyncio.wait_for(pool.route(_message(2, 1)), timeout=10)
+        await pool.close()
+
+        received = [json.loads(line)["update_id"] for line in path.open()]
+        assert 2 in received
+        assert pool.restarts == [1]
+        assert pool.routed == [2]
+
+    asyncio.run(run_test())